@@ -1,36 +1,251 @@
-from typing import IO
-from .gpx import GPX
+"""
+Importing the package is cheap: classes and modules are imported
+on first access (PEP 562), so short-lived jobs pay only for what they use.
+"""
+from __future__ import annotations
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    from typing import IO, Iterator, AsyncIterator, Awaitable, Optional, Union, Any
+    from .gpx import GPX
+    from .gpxtrackpoint import GPXTrackPoint
+    from .gpxtrack import GPXTrack
+    from .filters import FilterSpec
+    from .progress import ProgressObserver
 
 name = ' gpx_lite '
-__all__ = ['gpx.py', 'gpxtrack.py', 'gpxtracksegment.py', 'gpxtrackpoint.py']
+__all__ = ['gpx.py', 'gpxtrack.py', 'gpxtracksegment.py', 'gpxcolumnarsegment.py', 'gpxtrackpoint.py',
+           'binary.py', 'parallel.py', 'spatial.py', 'temporal.py', 'filters.py',
+           'progress.py', 'lazy.py', 'compression.py', 'aio.py']
+
+_CLASSES = {'GPX': 'gpx',
+            'GPXTrack': 'gpxtrack',
+            'GPXTrackSegment': 'gpxtracksegment',
+            'GPXColumnarSegment': 'gpxcolumnarsegment',
+            'GPXTrackPoint': 'gpxtrackpoint',
+            'GPXParser': 'parser',
+            'FilterSpec': 'filters',
+            'SpatialIndex': 'spatial',
+            'TemporalIndex': 'temporal',
+            'LazyGPX': 'lazy',
+            'GPXWriter': 'writer'}
+_MODULES = {'gpx', 'gpxtrack', 'gpxtracksegment', 'gpxcolumnarsegment', 'gpxtrackpoint', 'parser',
+            'utils', 'geo', 'binary', 'parallel', 'scanner', 'writer', 'spatial', 'temporal',
+            'filters', 'progress', 'lazy', 'compression', 'aio', 'benchmark'}
+
+
+def __getattr__(attr: str):
+    from importlib import import_module
+
+    if attr in _CLASSES:
+        value = getattr(import_module('.' + _CLASSES[attr], __name__), attr)
+    elif attr in _MODULES:
+        value = import_module('.' + attr, __name__)
+    else:
+        raise AttributeError('module %r has no attribute %r' % (__name__, attr))
+    globals()[attr] = value
+    return value
 
 
-def parse(file: IO)->GPX:
+def __dir__():
+    return sorted(set(globals()) | set(_CLASSES) | _MODULES)
+
+
+def parse(file: Union[str, IO], columnar: bool=False, epoch_time: bool=False,
+          filters: Optional[FilterSpec]=None, progress: Optional[ProgressObserver]=None,
+          engine: str='etree', read_ahead: bool=False)->GPX:
 
     """
     Wrapper fo GPXParser.parse(),
     loads gpx from xml file.
 
-    :param file: file handler
+    :param file: path or file handler, gzip, bzip2 and xz compressed input is detected
+    :param columnar: load segments as compact GPXColumnarSegment
+    :param epoch_time: store decoded epoch time in points instead of strings
+    :param filters: gpx_lite.filters.FilterSpec applied while reading
+    :param progress: gpx_lite.progress.ProgressObserver, e.g. TqdmObserver() for a progress bar
+    :param engine: 'etree' or 'expat', faster reading without building xml elements
+    :param read_ahead: read and decompress the file on a background thread
     :return: gpx loaded from xml
     """
     from . import parser
 
-    parser = parser.GPXParser(file)
+    parser = parser.GPXParser(file, columnar, epoch_time, filters, progress, engine, read_ahead)
     return parser.parse()
 
 
-def iterparse(file: IO)->GPX:
+def iterparse(file: Union[str, IO], columnar: bool=False, epoch_time: bool=False,
+              filters: Optional[FilterSpec]=None, progress: Optional[ProgressObserver]=None,
+              engine: str='etree', read_ahead: bool=False)->GPX:
 
     """
     Wrapper fo GPXParser.iterparse(),
     loads gpx from xml file.
 
-    :param file: file handler
+    :param file: path or file handler, gzip, bzip2 and xz compressed input is detected
+    :param columnar: load segments as compact GPXColumnarSegment
+    :param epoch_time: store decoded epoch time in points instead of strings
+    :param filters: gpx_lite.filters.FilterSpec applied while reading
+    :param progress: gpx_lite.progress.ProgressObserver, e.g. TqdmObserver() for a progress bar
+    :param engine: 'etree' or 'expat', faster reading without building xml elements
+    :param read_ahead: read and decompress the file on a background thread
     :return: gpx loaded from xml
     """
 
     from . import parser
 
-    parser = parser.GPXParser(file)
+    parser = parser.GPXParser(file, columnar, epoch_time, filters, progress, engine, read_ahead)
     return parser.iterparse()
+
+
+def iter_tracks(file: Union[str, IO], columnar: bool=False, epoch_time: bool=False,
+                filters: Optional[FilterSpec]=None, progress: Optional[ProgressObserver]=None,
+                engine: str='etree', read_ahead: bool=False)->Iterator[GPXTrack]:
+
+    """
+    Wrapper fo GPXParser.stream(),
+    yields tracks from xml file one by one.
+
+    :param file: path or file handler, gzip, bzip2 and xz compressed input is detected
+    :param columnar: load segments as compact GPXColumnarSegment
+    :param epoch_time: store decoded epoch time in points instead of strings
+    :param filters: gpx_lite.filters.FilterSpec applied while reading
+    :param progress: gpx_lite.progress.ProgressObserver, e.g. TqdmObserver() for a progress bar
+    :param engine: 'etree' or 'expat', faster reading without building xml elements
+    :param read_ahead: read and decompress the file on a background thread
+    :return: iterator over tracks
+    """
+
+    from . import parser
+
+    parser = parser.GPXParser(file, columnar, epoch_time, filters, progress, engine, read_ahead)
+    return parser.stream()
+
+
+def aparse(source: Any, columnar: bool=False, epoch_time: bool=False,
+           filters: Optional[FilterSpec]=None, progress: Optional[ProgressObserver]=None,
+           executor: Optional[ThreadPoolExecutor]=None)->Awaitable[GPX]:
+
+    """
+    Wrapper fo gpx_lite.aio.AsyncGPXParser.aparse(),
+    loads gpx from asyncio.StreamReader, async file or async iterable of chunks.
+
+    Usage:
+
+        gpx = await gpx_lite.aparse(reader)
+
+    :param source: asyncio.StreamReader, async file or async iterable of bytes or text chunks
+    :param columnar: load segments as compact GPXColumnarSegment
+    :param epoch_time: store decoded epoch time in points instead of strings
+    :param filters: gpx_lite.filters.FilterSpec applied while reading
+    :param progress: gpx_lite.progress.ProgressObserver
+    :param executor: thread pool parsing the chunks, None to parse in the event loop,
+                     a process pool is rejected
+    :return: awaitable gpx loaded from xml
+    """
+
+    from . import aio
+
+    return aio.AsyncGPXParser(source, columnar, epoch_time, filters, progress, executor=executor).aparse()
+
+
+def aiter_tracks(source: Any, columnar: bool=False, epoch_time: bool=False,
+                 filters: Optional[FilterSpec]=None, progress: Optional[ProgressObserver]=None,
+                 executor: Optional[ThreadPoolExecutor]=None)->AsyncIterator[GPXTrack]:
+
+    """
+    Wrapper fo gpx_lite.aio.AsyncGPXParser.astream(),
+    yields tracks from asyncio.StreamReader, async file or async iterable of chunks.
+
+    Usage:
+
+        async for track in gpx_lite.aiter_tracks(reader):
+            ...
+
+    :param source: asyncio.StreamReader, async file or async iterable of bytes or text chunks
+    :param columnar: load segments as compact GPXColumnarSegment
+    :param epoch_time: store decoded epoch time in points instead of strings
+    :param filters: gpx_lite.filters.FilterSpec applied while reading
+    :param progress: gpx_lite.progress.ProgressObserver
+    :param executor: thread pool parsing the chunks, None to parse in the event loop,
+                     a process pool is rejected
+    :return: async iterator over tracks
+    """
+
+    from . import aio
+
+    return aio.AsyncGPXParser(source, columnar, epoch_time, filters, progress, executor=executor).astream()
+
+
+def parse_parallel(path: str, workers: Optional[int]=None,
+                   columnar: bool=False, epoch_time: bool=False,
+                   filters: Optional[FilterSpec]=None, chunk_size: int=32 * 1000 * 1000)->GPX:
+
+    """
+    Wrapper fo gpx_lite.parallel.parse_parallel(),
+    loads gpx from xml file using several processes.
+
+    :param path: path to gpx file
+    :param workers: number of processes, os.cpu_count() by default
+    :param columnar: load segments as compact GPXColumnarSegment
+    :param epoch_time: store decoded epoch time in points instead of strings
+    :param filters: gpx_lite.filters.FilterSpec applied while reading
+    :param chunk_size: approximate number of bytes parsed by one process task
+    :return: gpx loaded from xml
+    """
+
+    from . import parallel
+
+    return parallel.parse_parallel(path, workers, columnar, epoch_time, filters, chunk_size)
+
+
+def load_binary(path: str)->GPX:
+
+    """
+    Wrapper fo gpx_lite.binary.load_binary(),
+    memory-maps gpx saved by GPX.save_binary().
+
+    :param path: path to binary file
+    :return: gpx loaded from binary file
+    """
+
+    from . import binary
+
+    return binary.load_binary(path)
+
+
+def load(path: str, sidecar: bool=True)->GPX:
+
+    """
+    Wrapper fo gpx_lite.binary.load(),
+    loads gpx from xml file, reusing binary sidecar file next to it
+    (name.gpxb, name.gpx.gz.gpxb for compressed files) if it is up to date.
+
+    :param path: path to gpx file
+    :param sidecar: use and update binary sidecar file
+    :return: gpx loaded from xml or sidecar
+    """
+
+    from . import binary
+
+    return binary.load(path, sidecar)
+
+
+def merge_by_time(*sources: Any, external: bool=False, run_size: int=1000000,
+                  directory: Optional[str]=None)->Iterator[GPXTrackPoint]:
+
+    """
+    Wrapper fo gpx_lite.temporal.merge_by_time(),
+    merges points of gpx, tracks and segments into one stream ordered by time.
+
+    :param sources: gpx, tracks, segments or iterables of points, segments or tracks
+    :param external: sort unsorted sources with temporary files
+    :param run_size: number of points sorted in memory at once, with external
+    :param directory: directory of temporary files, system default by default
+    :return: iterator over points ordered by time
+    """
+
+    from . import temporal
+
+    return temporal.merge_by_time(*sources, external=external, run_size=run_size, directory=directory)
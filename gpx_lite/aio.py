@@ -0,0 +1,211 @@
+"""
+Asyncio API for parsing and writing gpx.
+
+Xml is read from asyncio.StreamReader, async files (anything with
+async read(size)) or async iterables of chunks, and parsed by the expat
+engine one small chunk at a time between reads. The event loop is blocked
+at most for parsing of one chunk, or not at all with a thread executor.
+Compressed input is detected and decompressed as in gpx_lite.compression.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from inspect import isawaitable
+from typing import AsyncIterator, Callable, List, Optional, Union, Any
+
+from gpx_lite.gpx import GPX
+from gpx_lite.gpxtrack import GPXTrack
+from gpx_lite.parser import GPXParser
+from gpx_lite.filters import FilterSpec
+from gpx_lite.progress import ProgressObserver, ProgressStats
+from gpx_lite.compression import StreamDecompressor, detect
+from gpx_lite.writer import ChunkedWriter, gpx_header, is_binary, GPX_FOOTER, DEFAULT_BUFFER_SIZE
+
+ASYNC_CHUNK_SIZE = 64 * 1024  # bytes parsed without giving control to the event loop
+
+
+async def _chunks(source: Any, chunk_size: int)->AsyncIterator[Union[str, bytes]]:
+    if hasattr(source, 'read'):
+        while True:
+            data: Union[str, bytes] = await source.read(chunk_size)
+            if not data:
+                return
+            yield data
+    else:
+        async for data in source:
+            if data:
+                yield data
+
+
+class AsyncGPXParser(GPXParser):
+    """
+    Parser for gpx tracks in asyncio services, always uses the expat engine.
+
+    Args:
+       source: asyncio.StreamReader, async file or async iterable of bytes or text chunks
+       columnar: if True, segments are loaded as compact GPXColumnarSegment
+       epoch_time: if True, points store time decoded to microseconds since epoch
+       filters: FilterSpec applied while reading
+       progress: ProgressObserver, bytes are counted as received, compressed if compressed
+       chunk_size: size of chunks parsed at once
+       executor: thread pool parsing the chunks, None to parse in the event loop,
+                 not a process pool, the parser keeps its state between chunks
+
+    Usage:
+
+        reader, writer = await asyncio.open_connection(host, port)
+        async for track in AsyncGPXParser(reader).astream():
+            ...
+    """
+
+    __slots__ = ('_chunk_size', '_executor')
+
+    def __init__(self, source: Any, columnar: bool=False, epoch_time: bool=False,
+                 filters: Optional[FilterSpec]=None, progress: Optional[ProgressObserver]=None,
+                 chunk_size: int=ASYNC_CHUNK_SIZE, executor: Optional[ThreadPoolExecutor]=None)->None:
+        if isinstance(executor, ProcessPoolExecutor):
+            raise ValueError('Chunks must be parsed by a thread executor, a process pool '
+                             'would get a copy of the parser without its state')
+        super().__init__(source, columnar, epoch_time, filters, progress, 'expat')
+        self._chunk_size: int = chunk_size
+        self._executor: Optional[ThreadPoolExecutor] = executor
+
+    async def aparse(self)->GPX:
+        """
+        :return: gpx with loaded data
+        """
+        self._gpx.tracks = [track async for track in self.astream()]
+        return self._gpx
+
+    async def astream(self)->AsyncIterator[GPXTrack]:
+        """
+        Yields every track as soon as its closing tag is received.
+
+        :return: async iterator over tracks in the order they appear in the source
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        observer: Optional[ProgressObserver] = self._progress
+        stats: Optional[ProgressStats] = ProgressStats('parse') if observer is not None else None
+        feed: Callable[[Union[str, bytes]], List[GPXTrack]] = self._expat_feeder(stats)
+        chunk_size: int = self._chunk_size
+        decompressor: Optional[StreamDecompressor] = None
+        # first bytes kept until there are enough of them to detect compression
+        head: Optional[bytes] = b''
+        if observer is not None:
+            observer.start(stats)
+        async for data in _chunks(self._source, chunk_size):
+            if stats is not None:
+                stats.bytes += len(data) if isinstance(data, bytes) else len(data.encode('utf-8'))
+            if head is not None:
+                if isinstance(data, bytes):
+                    data = head + data
+                    if len(data) < 6:
+                        head = data
+                        continue
+                    compression: Optional[str] = detect(data)
+                    decompressor = StreamDecompressor(compression) if compression is not None else None
+                head = None
+            if decompressor is not None:
+                data = decompressor.decompress(data)
+            for offset in range(0, len(data), chunk_size):
+                chunk: Union[str, bytes] = data[offset:offset + chunk_size]
+                if self._executor is None:
+                    tracks: List[GPXTrack] = feed(chunk)
+                else:
+                    tracks = await loop.run_in_executor(self._executor, feed, chunk)
+                for track in tracks:
+                    yield track
+                await asyncio.sleep(0)
+        for track in (feed(head) if head else []) + feed(b''):
+            yield track
+        if stats is not None:
+            stats.finish()
+            observer.finish(stats)
+
+
+async def _write(target: Any, chunks: List[Union[str, bytes]])->None:
+    for chunk in chunks:
+        written: Any = target.write(chunk)
+        if isawaitable(written):
+            await written
+    chunks.clear()
+    if hasattr(target, 'drain'):
+        await target.drain()
+
+
+class _Collector:
+    """
+    File handler for ChunkedWriter keeping written chunks
+    until they are written to the async target.
+    """
+
+    __slots__ = ('chunks', 'mode')
+
+    def __init__(self, binary: bool)->None:
+        self.chunks: List[Union[str, bytes]] = []
+        self.mode: str = 'wb' if binary else 'w'
+
+    def write(self, chunk: Union[str, bytes])->None:
+        self.chunks.append(chunk)
+
+
+async def awrite_to_file(gpx: GPX, target: Any, precision: Optional[int]=None,
+                         buffer_size: int=DEFAULT_BUFFER_SIZE,
+                         progress: Optional[ProgressObserver]=None)->None:
+    """
+    Saves gpx as xml into an async target, output is the same as of GPX.write_to_file().
+    Tracks are rendered between writes and chunks of about buffer_size characters
+    are written, waiting for drain() of asyncio.StreamWriter after every chunk.
+
+    :param gpx: gpx to save
+    :param target: asyncio.StreamWriter, which gets bytes, or async file
+    :param precision: number of decimal places of coordinates,
+                      None for the shortest exact representation
+    :param buffer_size: number of characters written at once
+    :param progress: observer notified about tracks, points
+                     and bytes written, see gpx_lite.progress
+    """
+    collector: _Collector = _Collector(hasattr(target, 'drain') or is_binary(target))
+    writer: ChunkedWriter = ChunkedWriter(collector, buffer_size)
+    stats: Optional[ProgressStats] = None
+    next_update: int = 0
+    if progress is not None:
+        stats = ProgressStats('write', len(gpx))
+        next_update = progress.every
+        progress.start(stats)
+    writer.write(gpx_header(gpx.version, gpx.creator))
+    for track in gpx:
+        writer.write(track.to_xml(precision))
+        if collector.chunks:
+            await _write(target, collector.chunks)
+        if stats is not None:
+            stats.tracks += 1
+            stats.points += track.get_points_no()
+            if stats.points >= next_update:
+                stats.bytes = writer.written
+                progress.update(stats)
+                next_update = stats.points + progress.every
+    writer.write(GPX_FOOTER)
+    writer.flush()
+    await _write(target, collector.chunks)
+    if stats is not None:
+        stats.bytes = writer.written
+        stats.finish()
+        progress.finish(stats)
+
+
+if __name__ == '__main__':
+    from io import BytesIO
+
+    async def demo()->None:
+        reader: asyncio.StreamReader = asyncio.StreamReader()
+        reader.feed_data(b'<gpx version="1.1" creator="aio"><trk><name>a</name><trkseg>'
+                         b'<trkpt lat="50.0" lon="14.0"><time>2017-11-22T07:03:36Z</time></trkpt>'
+                         b'</trkseg></trk></gpx>')
+        reader.feed_eof()
+        gpx: GPX = await AsyncGPXParser(reader, chunk_size=16).aparse()
+        print(gpx, gpx[0][0][0])
+        out: BytesIO = BytesIO()
+        await awrite_to_file(gpx, out)
+        print(out.getvalue().decode())
+
+    asyncio.run(demo())
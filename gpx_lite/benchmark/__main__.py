@@ -0,0 +1,144 @@
+"""
+Command line runner of the benchmark suite.
+
+Usage:
+
+    python -m gpx_lite.benchmark --tracks 1000 --output current.json
+    python -m gpx_lite.benchmark --tracks 1000 --baseline baseline.json --tolerance 0.2
+    python -m gpx_lite.benchmark --memory --sizes 100,1000,10000 --output memory.json
+    python -m gpx_lite.benchmark --import-time --budget-ms 5
+    python -m gpx_lite.benchmark --check
+
+Exits with status 1 if any benchmark is slower than the baseline
+by more than the tolerance, or if import gpx_lite or from gpx_lite import GPX
+is over the budget or loads modules that should be deferred, or if loaders of gpx_lite
+read different data from the same file with --check.
+"""
+import argparse
+import sys
+from os import path
+from tempfile import TemporaryDirectory
+from typing import List, Dict, Any, Optional
+
+from gpx_lite.benchmark import import_time, consistency
+from gpx_lite.benchmark.generator import generate
+from gpx_lite.benchmark.suite import BENCHMARKS, MEMORY_BENCHMARKS, run, run_memory, compare, report, \
+    load_results, save_results
+
+
+def main(argv: Optional[List[str]]=None)->int:
+    args_parser = argparse.ArgumentParser(prog='python -m gpx_lite.benchmark',
+                                          description='Benchmarks of gpx_lite on a synthetic gpx file.')
+    args_parser.add_argument('--tracks', type=int, default=200, help='number of tracks')
+    args_parser.add_argument('--segments', type=int, default=2, help='segments per track')
+    args_parser.add_argument('--points', type=int, default=200, help='points per segment')
+    args_parser.add_argument('--fractions', action='store_true', help='write times with milliseconds')
+    args_parser.add_argument('--no-names', action='store_true', help='leave out track names and numbers')
+    args_parser.add_argument('--seed', type=int, default=0, help='seed of the generator')
+    args_parser.add_argument('--file', help='benchmark an existing gpx file instead of a synthetic one')
+    args_parser.add_argument('--bench', action='append', choices=sorted(set(BENCHMARKS) | set(MEMORY_BENCHMARKS)),
+                             help='benchmark to run, may be repeated, all by default')
+    args_parser.add_argument('--memory', action='store_true',
+                             help='measure peak and retained memory of loading instead of time')
+    args_parser.add_argument('--import-time', action='store_true',
+                             help='measure startup cost of importing gpx_lite instead of running benchmarks')
+    args_parser.add_argument('--check', action='store_true',
+                             help='check that all loaders read the same data from edge cases '
+                                  'and the synthetic file instead of running benchmarks')
+    args_parser.add_argument('--budget-ms', type=float, default=import_time.BUDGET * 1000,
+                             help='allowed milliseconds of a bare import gpx_lite for --import-time')
+    args_parser.add_argument('--sizes', help='comma separated numbers of tracks of files for --memory, '
+                                             'the value of --tracks by default')
+    args_parser.add_argument('--repeat', type=int, default=5, help='measurements of every benchmark')
+    args_parser.add_argument('--output', help='save results to a json file')
+    args_parser.add_argument('--baseline', help='compare results with a json file')
+    args_parser.add_argument('--tolerance', type=float, default=0.1,
+                             help='allowed relative slowdown against the baseline')
+    args = args_parser.parse_args(argv)
+    available: Dict[str, Any] = MEMORY_BENCHMARKS if args.memory else BENCHMARKS
+    unknown: List[str] = [name for name in args.bench or [] if name not in available]
+    if unknown:
+        args_parser.error('--bench %s is not available%s, choose from %s'
+                          % (', '.join(unknown), ' with --memory' if args.memory else ' without --memory',
+                             ', '.join(sorted(available))))
+
+    if args.import_time:
+        return _import_time(args)
+    file_args: Dict[str, Any] = {'tracks': args.tracks, 'segments': args.segments, 'points': args.points,
+                                 'fractions': args.fractions, 'names': not args.no_names, 'seed': args.seed}
+    with TemporaryDirectory() as tmp:
+        if args.check:
+            return _check(args, file_args, tmp)
+        if args.memory:
+            fnames: List[str] = [args.file] if args.file is not None else []
+            if args.file is None:
+                file_args['tracks'] = [int(size) for size in args.sizes.split(',')] if args.sizes \
+                    else [args.tracks]
+                for tracks in file_args['tracks']:
+                    fnames.append(path.join(tmp, 'synthetic%d.gpx' % tracks))
+                    generate(fnames[-1], **dict(file_args, tracks=tracks))
+            results: Dict[str, Any] = run_memory(fnames, args.bench)
+        else:
+            fname: str = args.file
+            if fname is None:
+                fname = path.join(tmp, 'synthetic.gpx')
+                generate(fname, **file_args)
+            results = run(fname, args.bench, args.repeat)
+    results['meta']['file'] = args.file if args.file is not None else file_args
+
+    for name, result in results['results'].items():
+        if args.memory:
+            print('%-36s peak %7.1f B/point, retained %7.1f B/point, estimate %7.1f B/point' % (
+                name, result['peak_per_point'], result['retained_per_point'], result['estimate_per_point']))
+        else:
+            print('%-16s best %.4f s, mean %.4f s' % (name, result['best'], result['mean']))
+    return _finish(results, args)
+
+
+def _check(args: argparse.Namespace, file_args: Dict[str, Any], tmp: str)->int:
+    fnames: List[str] = consistency.write_cases(tmp)
+    if args.file is not None:
+        fnames.append(args.file)
+    else:
+        fnames.append(path.join(tmp, 'synthetic.gpx'))
+        generate(fnames[-1], **file_args)
+    problems: List[str] = consistency.check(fnames)
+    stop_problems: List[str] = consistency.check_stops()
+    for problem in problems + stop_problems:
+        print(problem)
+    print('%d files checked, %d differences' % (len(fnames), len(problems)))
+    print('Stop detection checked, %d differences' % len(stop_problems))
+    return 1 if problems or stop_problems else 0
+
+
+def _import_time(args: argparse.Namespace)->int:
+    results: Dict[str, Any] = import_time.run(args.repeat, args.budget_ms / 1000)
+    for name, result in results['results'].items():
+        print('%-24s %7.2f ms  %s' % (name, result['best'] * 1000, result['statement']))
+    status: int = _finish(results, args)
+    if results['meta']['over_budget']:
+        print('Over the budget of %.2f ms: %s' % (args.budget_ms, ', '.join(
+            import_time.STATEMENTS[name] for name in results['meta']['over_budget'])))
+        status = 1
+    if results['meta']['deferred_loaded']:
+        print('Deferred modules loaded: %s' % ', '.join(results['meta']['deferred_loaded']))
+        status = 1
+    return status
+
+
+def _finish(results: Dict[str, Any], args: argparse.Namespace)->int:
+    if args.output:
+        save_results(results, args.output)
+    if args.baseline:
+        baseline: Dict[str, Any] = load_results(args.baseline)
+        if baseline['meta'].get('file') != results['meta'].get('file'):
+            print('Warning: baseline was measured on a different file: %s' % baseline['meta'].get('file'))
+        rows = compare(results, baseline, args.tolerance)
+        print(report(rows))
+        if any(regression for _, _, _, regression in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+Checks that all loaders of gpx_lite read the same data from the same file:
+both parser engines, parse() and iterparse(), object and columnar segments
+and parse_parallel() with every track in its own chunk.
+Run on hand written edge cases and on synthetic files, together with
+check_stops() comparing the numpy and pure python stop detection:
+
+    python -m gpx_lite.benchmark --check
+"""
+from array import array
+from math import radians, sin, cos, ceil
+from os import path
+from random import Random
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Any
+
+from gpx_lite import geo
+from gpx_lite.gpx import GPX
+from gpx_lite.parser import GPXParser
+from gpx_lite.utils import NO_TIME, optional_numpy
+
+Snapshot = Tuple[Optional[str], Optional[str], List[Tuple[Optional[str], Optional[int], List[List[Tuple]]]]]
+
+# edge cases every loader must read the same way
+CASES: Dict[str, str] = {
+    'points_without_time':
+        '<gpx xmlns="http://www.topografix.com/GPX/1/1" version="1.1" creator="check">'
+        '<metadata><name>meta</name><time>2000-01-01T00:00:00Z</time></metadata>'
+        '<trk><trkseg>'
+        '<trkpt lat="1" lon="2"></trkpt>'
+        '<trkpt lat="3" lon="4"><time>2017-11-22T07:03:36Z</time></trkpt>'
+        '<trkpt lat="5" lon="6"/>'
+        '</trkseg></trk></gpx>',
+    'nested_name_and_time':
+        '<gpx xmlns="http://www.topografix.com/GPX/1/1" version="1.1" creator="check">'
+        '<metadata><time>2000-01-01T00:00:00Z</time></metadata>'
+        '<trk><name>track</name><number>7</number>'
+        '<extensions><name>trkext</name><time>2001-01-01T00:00:00Z</time></extensions>'
+        '<trkseg>'
+        '<trkpt lat="1" lon="2"><name>ptname</name>'
+        '<extensions><time>2002-01-01T00:00:00Z</time><name>ext</name></extensions></trkpt>'
+        '<trkpt lat="3" lon="4"><time>2017-11-22T07:03:36Z</time>'
+        '<extensions><number>9</number></extensions></trkpt>'
+        '</trkseg></trk></gpx>',
+    'no_namespace':
+        '<gpx version="1.0" creator="check"><trk><name>a</name><trkseg>'
+        '<trkpt lat="1" lon="2"><time>2017-11-22T07:03:36Z</time></trkpt>'
+        '<trkpt lat="3" lon="4"/>'
+        '</trkseg></trk><trk><trkseg><trkpt lat="5" lon="6"/></trkseg></trk></gpx>',
+    'runs_without_time_across_tracks':
+        '<gpx xmlns="http://www.topografix.com/GPX/1/1" version="1.1" creator="check">'
+        '<metadata><time>2000-01-01T00:00:00Z</time></metadata>'
+        '<trk><name>a</name><trkseg>'
+        '<trkpt lat="1" lon="2"><time>2017-11-22T07:03:36Z</time></trkpt>'
+        '<trkpt lat="3" lon="4"/><trkpt lat="5" lon="6"/>'
+        '</trkseg></trk>'
+        '<trk><name>b</name><trkseg><trkpt lat="7" lon="8"/><trkpt lat="9" lon="10"/></trkseg></trk>'
+        '<trk><name>c</name><trkseg><trkpt lat="11" lon="12"/>'
+        '<trkpt lat="13" lon="14"><time>2017-11-22T07:03:37Z</time></trkpt>'
+        '</trkseg></trk></gpx>',
+}
+
+
+def _call(fname: str, method: str='iterparse', **kwargs: Any)->GPX:
+    return getattr(GPXParser(fname, **kwargs), method)()
+
+
+def _parallel(fname: str, workers: int, **kwargs: Any)->GPX:
+    from gpx_lite.parallel import parse_parallel
+
+    # a chunk for every track, chunks start inside runs of points without time
+    return parse_parallel(fname, workers, chunk_size=1, **kwargs)
+
+
+LOADERS: Dict[str, Callable[[str], GPX]] = {
+    'parse': lambda fname: _call(fname, 'parse'),
+    'parse_columnar': lambda fname: _call(fname, 'parse', columnar=True),
+    'parse_epoch': lambda fname: _call(fname, 'parse', epoch_time=True),
+    'iterparse': lambda fname: _call(fname),
+    'iterparse_columnar': lambda fname: _call(fname, columnar=True),
+    'iterparse_expat': lambda fname: _call(fname, engine='expat'),
+    'iterparse_expat_columnar': lambda fname: _call(fname, columnar=True, engine='expat'),
+    'iterparse_expat_epoch': lambda fname: _call(fname, epoch_time=True, engine='expat'),
+    'parse_parallel': lambda fname: _parallel(fname, 1),
+    'parse_parallel_columnar': lambda fname: _parallel(fname, 2, columnar=True),
+}
+
+
+def snapshot(gpx: GPX)->Snapshot:
+    """
+    :param gpx: loaded gpx
+    :return: version, creator and name, number and segments of every track,
+             points as (latitude, longitude, epoch time), comparable with ==
+    """
+    return (gpx.version, gpx.creator,
+            [(track.name, track.number,
+              [[(pt.latitude, pt.longitude, pt.epoch) for pt in seg] for seg in track])
+             for track in gpx])
+
+
+def check(fnames: List[str], names: Optional[List[str]]=None)->List[str]:
+    """
+    Loads every file by all loaders and compares the results with parse().
+
+    :param fnames: paths to gpx files
+    :param names: names of loaders from LOADERS, all by default
+    :return: descriptions of differences, empty if all loaders agree
+    """
+    errors: List[str] = []
+    for fname in fnames:
+        expected: Snapshot = snapshot(LOADERS['parse'](fname))
+        for name in names or list(LOADERS):
+            result: Snapshot = snapshot(LOADERS[name](fname))
+            if result != expected:
+                errors.append('%s: %s differs from parse()\n  expected %s\n  got      %s'
+                              % (path.basename(fname), name, expected, result))
+    return errors
+
+
+# latitudes, times in seconds or None, radius in metres and minimal duration in seconds
+STOP_CASES: Dict[str, Tuple[List[float], List[Optional[int]], float, float]] = {
+    'untimed_inside_and_after':
+        ([50.0, 50.01, 50.0, 50.0, 50.0, 50.01], [0, None, 120, 180, 240, None], 50.0, 120.0),
+    'last_point_untimed':
+        ([50.0] * 11, [60 * i for i in range(10)] + [None], 50.0, 300.0),
+    'only_first_timed':
+        ([50.0] * 5, [0, None, None, None, None], 50.0, 0.0),
+}
+
+
+def _reference_stops(lat: Sequence[float], lon: Sequence[float], time: Sequence[int],
+                     radius_m: float, min_duration_s: float)->List[range]:
+    """
+    Point by point stop detection without candidates, as documented in geo.stop_ranges().
+    """
+    limit: float = sin(min(radius_m / (2 * geo.EARTH_RADIUS), 1.0)) ** 2
+    min_duration: int = max(ceil(min_duration_s * 1e6), 0)
+    result: List[range] = []
+    i: int = 0
+    while i < len(lat):
+        if time[i] == NO_TIME:
+            i += 1
+            continue
+        phi_1, lam_1 = radians(lat[i]), radians(lon[i])
+        last: int = i
+        j: int = i + 1
+        while j < len(lat):
+            phi_2, lam_2 = radians(lat[j]), radians(lon[j])
+            if sin((phi_2 - phi_1) / 2) ** 2 + cos(phi_1) * cos(phi_2) \
+                    * sin((lam_2 - lam_1) / 2) ** 2 > limit:
+                break
+            if time[j] != NO_TIME:
+                last = j
+            j += 1
+        if time[last] - time[i] >= min_duration:
+            result.append(range(i, j))
+            i = j
+        else:
+            i += 1
+    return result
+
+
+def _random_stop_cases(count: int, seed: int=7)->Dict[str, Tuple[List[float], List[Optional[int]], float, float]]:
+    rnd: Random = Random(seed)
+    cases: Dict[str, Tuple[List[float], List[Optional[int]], float, float]] = {}
+    for case in range(count):
+        lat: List[float] = []
+        times: List[Optional[int]] = []
+        second: int = 0
+        for _ in range(rnd.randint(0, 60)):
+            # dwells at a few places with jitter, some points without time
+            lat.append(50.0 + rnd.choice((0.0, 0.0, 0.0003, 0.001)) + rnd.uniform(-0.0001, 0.0001))
+            second += rnd.randint(0, 90)
+            times.append(None if rnd.random() < 0.3 else second)
+        cases['random_%d' % case] = (lat, times, 50.0, rnd.choice((0.0, 60.0, 120.0, 300.0)))
+    return cases
+
+
+def check_stops(random_cases: int=200)->List[str]:
+    """
+    Compares geo.stop_ranges() with numpy and in pure python with a point
+    by point reference on STOP_CASES and random segments with points without time.
+
+    :param random_cases: number of random segments
+    :return: descriptions of differences, empty if all agree
+    """
+    np: Any = optional_numpy()
+    errors: List[str] = []
+    cases = dict(STOP_CASES)
+    cases.update(_random_stop_cases(random_cases))
+    for name, (lat, seconds, radius_m, min_duration_s) in cases.items():
+        lats: array = array('d', lat)
+        lons: array = array('d', [14.0] * len(lat))
+        time: array = array('q', [NO_TIME if value is None else value * 1000000 for value in seconds])
+        expected: List[range] = _reference_stops(lats, lons, time, radius_m, min_duration_s)
+        results: Dict[str, List[range]] = {
+            'python': geo._stop_ranges(lats, lons, time, radius_m, min_duration_s, None)}
+        if np is not None:
+            results['numpy'] = geo._stop_ranges(lats, lons, time, radius_m, min_duration_s, np)
+        for path_name, result in results.items():
+            if result != expected:
+                errors.append('stops %s: %s differs from the reference\n  expected %s\n  got      %s'
+                              % (name, path_name, expected, result))
+    return errors
+
+
+def write_cases(directory: str)->List[str]:
+    """
+    :param directory: where to write files of CASES
+    :return: paths of written files
+    """
+    fnames: List[str] = []
+    for name, xml in CASES.items():
+        fnames.append(path.join(directory, name + '.gpx'))
+        with open(fnames[-1], 'w', encoding='utf-8') as fh:
+            fh.write(xml)
+    return fnames
+
+
+if __name__ == '__main__':
+    from tempfile import TemporaryDirectory
+
+    with TemporaryDirectory() as tmp:
+        problems: List[str] = check(write_cases(tmp)) + check_stops()
+        print('\n'.join(problems) if problems else 'All loaders agree on %d cases' % len(CASES))
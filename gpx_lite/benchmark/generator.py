@@ -0,0 +1,58 @@
+"""
+Deterministic synthetic gpx files for benchmarks.
+The same arguments always give the same file, byte for byte.
+"""
+from random import Random
+from typing import IO, List, Union
+
+from gpx_lite.utils import epoch_to_time
+
+START = 1511334216 * 1000000  # 2017-11-22T07:03:36Z in microseconds
+
+
+def generate(file: Union[str, IO], tracks: int=100, segments: int=2, points: int=100,
+             fractions: bool=False, names: bool=True, seed: int=0)->None:
+    """
+    Writes random walks around Prague as a gpx file.
+
+    :param file: path or text file handler
+    :param tracks: number of tracks
+    :param segments: number of segments in every track
+    :param points: number of points in every segment
+    :param fractions: write times with milliseconds
+    :param names: write name and number of every track
+    :param seed: seed of the random generator
+    """
+    if isinstance(file, str):
+        with open(file, 'w', encoding='utf-8') as fh:
+            return generate(fh, tracks, segments, points, fractions, names, seed)
+    random: Random = Random(seed)
+    file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<gpx xmlns="http://www.topografix.com/GPX/1/1" version="1.1" creator="gpx_lite.benchmark">')
+    for i in range(tracks):
+        lines: List[str] = ['\n<trk>']
+        if names:
+            lines.append('\n<name>%09d_%d</name>\n<number>%d</number>' % (random.randrange(10 ** 9), i, i))
+        time: int = START + random.randrange(86400) * 1000000
+        lat: float = 50.0 + random.random() * 0.2
+        lon: float = 14.3 + random.random() * 0.3
+        for _ in range(segments):
+            lines.append('\n<trkseg>')
+            for _ in range(points):
+                lat = round(lat + random.uniform(-1e-4, 1e-4), 7)
+                lon = round(lon + random.uniform(-1e-4, 1e-4), 7)
+                time += random.randrange(1000, 10000) * 1000 if fractions else random.randrange(1, 10) * 1000000
+                lines.append('\n<trkpt lat="%s" lon="%s">\n<time>%s</time>\n</trkpt>'
+                             % (lat, lon, epoch_to_time(time)))
+            lines.append('\n</trkseg>')
+        lines.append('\n</trk>')
+        file.write(''.join(lines))
+    file.write('\n</gpx>\n')
+
+
+if __name__ == '__main__':
+    from io import StringIO
+
+    out = StringIO()
+    generate(out, tracks=1, segments=1, points=2, fractions=True)
+    print(out.getvalue())
@@ -0,0 +1,96 @@
+"""
+Startup cost of importing gpx_lite, measured in fresh interpreters
+with python -X importtime. Only modules imported by the statement
+and not by an empty interpreter are counted, so interpreter startup
+doesn't add noise.
+"""
+import subprocess
+import sys
+from statistics import median
+from typing import Dict, List, Tuple, Set, Any
+
+STATEMENTS: Dict[str, str] = {
+    'import': 'import gpx_lite',
+    'model': 'from gpx_lite import GPX',
+    'parser': 'import gpx_lite.parser',
+}
+
+_STDLIB_DEFERRED: Tuple[str, ...] = ('typing', 'copy', 're', 'xml.etree.ElementTree', 'tqdm', 'numpy')
+
+# modules that the budgeted statements must not load
+DEFERRED: Dict[str, Tuple[str, ...]] = {
+    'import': ('gpx_lite.gpx',) + _STDLIB_DEFERRED,
+    'model': ('gpx_lite.gpxtrack', 'gpx_lite.geo', 'gpx_lite.writer', 'gpx_lite.progress',
+              'gpx_lite.utils') + _STDLIB_DEFERRED,
+}
+
+BUDGET = 0.005  # seconds for each statement in DEFERRED
+
+
+def _import_times(statement: str)->Dict[str, int]:
+    """
+    :return: cumulative microseconds of top level imports
+    """
+    output: str = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                                 stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+    times: Dict[str, int] = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, module = line.split('|')
+        if not module.startswith('  ') and cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def _loaded_modules(statement: str)->Set[str]:
+    output: str = subprocess.run([sys.executable, '-c', statement + '\nimport sys\nprint(" ".join(sys.modules))'],
+                                 stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout
+    return set(output.split())
+
+
+def measure(statement: str, repeat: int=5)->float:
+    """
+    :param statement: python statement
+    :param repeat: number of fresh interpreters
+    :return: median seconds spent in imports done by the statement
+    """
+    samples: List[float] = []
+    for _ in range(repeat):
+        startup: Dict[str, int] = _import_times('pass')
+        samples.append(sum(time for module, time in _import_times(statement).items()
+                           if module not in startup) / 1e6)
+    return median(samples)
+
+
+def run(repeat: int=5, budget: float=BUDGET)->Dict[str, Any]:
+    """
+    :param repeat: number of fresh interpreters for every statement
+    :param budget: allowed seconds of every statement in DEFERRED
+    :return: results in the json format of gpx_lite.benchmark.suite,
+             with "over_budget" and "deferred_loaded" lists in meta
+             naming the statements and "statement: module" respectively
+    """
+    results: Dict[str, Any] = {}
+    for name, statement in STATEMENTS.items():
+        seconds: float = measure(statement, repeat)
+        results['import_time:' + name] = {'best': seconds, 'mean': seconds, 'times': [seconds],
+                                          'statement': statement}
+    over_budget: List[str] = []
+    deferred_loaded: List[str] = []
+    for name, deferred in DEFERRED.items():
+        if results['import_time:' + name]['best'] > budget:
+            over_budget.append(name)
+        loaded: Set[str] = _loaded_modules(STATEMENTS[name])
+        deferred_loaded.extend('%s: %s' % (name, module) for module in deferred if module in loaded)
+    return {'meta': {'python': sys.version.split()[0], 'repeat': repeat, 'budget': budget,
+                     'over_budget': over_budget, 'deferred_loaded': deferred_loaded},
+            'results': results}
+
+
+if __name__ == '__main__':
+    measured = run(repeat=3)
+    for key, value in measured['results'].items():
+        print('%-24s %7.2f ms  %s' % (key, value['best'] * 1000, value['statement']))
+    print('Over budget: %s, deferred modules loaded: %s' % (
+        measured['meta']['over_budget'], measured['meta']['deferred_loaded']))
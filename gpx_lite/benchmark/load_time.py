@@ -95,14 +95,29 @@ def measure_time(func: Callable,
         out_file.write(string)
 
 
-TEST_DIR = "/home/olga/Documents/GPX/load_test"
-RESULTS_DIR = "/home/olga/Documents/GPX/test_results"
-
-#measure_time(measure_load1, TEST_DIR, RESULTS_DIR,  'tqdm_')
-#measure_time(measure_load1_iter, TEST_DIR, RESULTS_DIR,  'tqdm_iter_')
-#measure_time(measure_conversion, TEST_DIR, RESULTS_DIR,  'try_except_conv_')
-#measure_time(measure_save1, TEST_DIR, RESULTS_DIR, 'save_xml_')
-
-#measure_load1_iter("/home/olga/Documents/GPX/save_raw.gpx") # time =  5.3
-#measure_load1_iter("/home/olga/Documents/GPX/traces-raw.gpx") # time =  5.3
-measure_load1_iter("/home/olga/Documents/GPX/liftago.gpx") # time =  5.3
\ No newline at end of file
+MEASUREMENTS = {'load': measure_load1,
+                'iterparse': measure_load1_iter}
+
+
+if __name__ == '__main__':
+    # see also the reproducible suite: python -m gpx_lite.benchmark
+    import argparse
+    from tempfile import TemporaryDirectory
+    from gpx_lite.benchmark.generator import generate
+
+    args_parser = argparse.ArgumentParser(prog='python -m gpx_lite.benchmark.load_time',
+                                          description='Times loading of every gpx file in a directory.')
+    args_parser.add_argument('test_dir', nargs='?',
+                             help='directory with gpx files, synthetic files of 10, 100 '
+                                  'and 1000 tracks by default')
+    args_parser.add_argument('--results', default='.', help='directory of the result table')
+    args_parser.add_argument('--measure', choices=sorted(MEASUREMENTS), default='iterparse',
+                             help='what is measured')
+    args = args_parser.parse_args()
+    with TemporaryDirectory() as tmp:
+        test_dir: str = args.test_dir
+        if test_dir is None:
+            test_dir = tmp
+            for tracks in (10, 100, 1000):
+                generate(path.join(tmp, 'synthetic%d.gpx' % tracks), tracks=tracks)
+        measure_time(MEASUREMENTS[args.measure], test_dir, args.results, args.measure + '_')
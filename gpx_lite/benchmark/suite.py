@@ -0,0 +1,209 @@
+"""
+Benchmarks of the hot paths of gpx_lite on a synthetic gpx file,
+results are stored as json and compared with a baseline.
+
+Result format of timing benchmarks:
+    {"meta": {"python": ..., "platform": ..., "file": {generator arguments},
+              "size": bytes, "points": number of points, "repeat": ...},
+     "results": {benchmark name: {"best": s, "mean": s, "times": [s, ...]}}}
+
+Result format of memory benchmarks, measured with tracemalloc:
+    {"meta": {"python": ..., "platform": ..., "file": {generator arguments}},
+     "results": {"name[N points]": {"peak": bytes, "retained": bytes, "estimate": bytes,
+                                    "peak_per_point": ..., "retained_per_point": ...,
+                                    "estimate_per_point": ..., "points": N, "size": bytes}}}
+Retained bytes are held by the loaded gpx, estimate is from GPX.memory_usage().
+"""
+import gc
+import json
+import platform
+import timeit
+import tracemalloc
+from os import path, devnull
+from typing import Callable, Dict, List, Tuple, IO, Any, Optional
+
+import gpx_lite
+from gpx_lite.gpx import GPX
+from gpx_lite.benchmark.generator import generate
+
+Benchmark = Callable[[str, GPX], Callable[[], Any]]
+
+
+def _parse(fname: str, gpx: GPX)->Callable[[], Any]:
+    def run()->None:
+        with open(fname, 'r') as fh:
+            gpx_lite.parse(fh)
+    return run
+
+
+def _iterparse(fname: str, gpx: GPX)->Callable[[], Any]:
+    def run()->None:
+        with open(fname, 'r') as fh:
+            gpx_lite.iterparse(fh)
+    return run
+
+
+def _iterparse_expat(fname: str, gpx: GPX)->Callable[[], Any]:
+    def run()->None:
+        with open(fname, 'rb') as fh:
+            gpx_lite.iterparse(fh, engine='expat')
+    return run
+
+
+def _write_to_file(fname: str, gpx: GPX)->Callable[[], Any]:
+    def run()->None:
+        with open(devnull, 'w') as fh:
+            gpx.write_to_file(fh)
+    return run
+
+
+def _clone(fname: str, gpx: GPX)->Callable[[], Any]:
+    return gpx.clone
+
+
+def _deepcopy(fname: str, gpx: GPX)->Callable[[], Any]:
+    from copy import deepcopy
+
+    return lambda: deepcopy(gpx)
+
+
+def _resample(fname: str, gpx: GPX)->Callable[[], Any]:
+    return lambda: gpx.resample(5)
+
+
+def _point_access(fname: str, gpx: GPX)->Callable[[], Any]:
+    def run()->None:
+        for track in gpx:
+            for seg in track:
+                for pt in seg:
+                    pt.latitude, pt.longitude, pt.time
+    return run
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    'parse': _parse,
+    'iterparse': _iterparse,
+    'iterparse_expat': _iterparse_expat,
+    'write_to_file': _write_to_file,
+    'clone': _clone,
+    'deepcopy': _deepcopy,
+    'point_access': _point_access,
+    'resample': _resample,
+}
+
+
+MEMORY_BENCHMARKS: Dict[str, Callable[[IO], GPX]] = {
+    'parse': gpx_lite.parse,
+    'iterparse': gpx_lite.iterparse,
+    'parse_columnar': lambda fh: gpx_lite.parse(fh, columnar=True),
+    'iterparse_columnar': lambda fh: gpx_lite.iterparse(fh, columnar=True),
+}
+
+# compared value of a result, the first one present
+METRICS = ('best', 'peak_per_point')
+
+
+def run(fname: str, names: Optional[List[str]]=None, repeat: int=5)->Dict[str, Any]:
+    """
+    Runs benchmarks on a gpx file, every benchmark is run repeat times
+    on a gpx parsed from the file.
+
+    :param fname: path to gpx file
+    :param names: names of benchmarks from BENCHMARKS, all by default
+    :param repeat: number of measurements of every benchmark
+    :return: results in the json format described in the module docstring
+    """
+    with open(fname, 'r') as fh:
+        gpx: GPX = gpx_lite.parse(fh)
+    results: Dict[str, Any] = {}
+    for name in names or list(BENCHMARKS):
+        times: List[float] = timeit.Timer(BENCHMARKS[name](fname, gpx)).repeat(repeat=repeat, number=1)
+        results[name] = {'best': min(times), 'mean': sum(times) / len(times), 'times': times}
+    return {'meta': {'python': platform.python_version(),
+                     'platform': platform.platform(),
+                     'size': path.getsize(fname),
+                     'points': sum(track.get_points_no() for track in gpx),
+                     'repeat': repeat},
+            'results': results}
+
+
+def run_memory(fnames: List[str], names: Optional[List[str]]=None)->Dict[str, Any]:
+    """
+    Measures peak and retained memory of loading gpx files.
+
+    :param fnames: paths to gpx files, usually of different sizes
+    :param names: names of benchmarks from MEMORY_BENCHMARKS, all by default
+    :return: results in the json format described in the module docstring
+    """
+    results: Dict[str, Any] = {}
+    for fname in fnames:
+        for name in names or list(MEMORY_BENCHMARKS):
+            gc.collect()
+            tracemalloc.start()
+            with open(fname, 'r') as fh:
+                gpx: GPX = MEMORY_BENCHMARKS[name](fh)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            points: int = max(sum(track.get_points_no() for track in gpx), 1)
+            estimate: int = gpx.memory_usage()['total']
+            results['%s[%d points]' % (name, points)] = {
+                'peak': peak, 'retained': retained, 'estimate': estimate,
+                'peak_per_point': peak / points, 'retained_per_point': retained / points,
+                'estimate_per_point': estimate / points,
+                'points': points, 'size': path.getsize(fname)}
+            del gpx
+    return {'meta': {'python': platform.python_version(),
+                     'platform': platform.platform()},
+            'results': results}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float=0.1)->List[Tuple[str, float, float, bool]]:
+    """
+    Compares best times or peak memory per point of benchmarks present in both results.
+
+    :param results: new results
+    :param baseline: stored results
+    :param tolerance: allowed relative slowdown, 0.1 for 10 %
+    :return: (name, baseline value, new value, True if regression) for every benchmark
+    """
+    rows: List[Tuple[str, float, float, bool]] = []
+    for name, result in results['results'].items():
+        if name not in baseline['results']:
+            continue
+        metric: str = next(metric for metric in METRICS if metric in result)
+        before: float = baseline['results'][name][metric]
+        rows.append((name, before, result[metric], result[metric] > before * (1 + tolerance)))
+    return rows
+
+
+def report(rows: List[Tuple[str, float, float, bool]])->str:
+    """
+    :param rows: output of compare()
+    :return: table of compared values
+    """
+    lines: List[str] = ['%-36s %10s %10s %8s' % ('benchmark', 'baseline', 'current', 'ratio')]
+    for name, before, after, regression in rows:
+        lines.append('%-36s %10.4g %10.4g %7.2fx%s' % (name, before, after, after / before if before else 0,
+                                                       '  REGRESSION' if regression else ''))
+    return '\n'.join(lines)
+
+
+def load_results(fname: str)->Dict[str, Any]:
+    with open(fname, 'r') as fh:
+        return json.load(fh)
+
+
+def save_results(results: Dict[str, Any], fname: str)->None:
+    with open(fname, 'w') as fh:
+        json.dump(results, fh, indent=2)
+
+
+if __name__ == '__main__':
+    from tempfile import TemporaryDirectory
+
+    with TemporaryDirectory() as tmp:
+        gpx_file: str = path.join(tmp, 'synthetic.gpx')
+        generate(gpx_file, tracks=10, segments=2, points=50)
+        first = run(gpx_file, repeat=1)
+        print(report(compare(run(gpx_file, repeat=1), first)))
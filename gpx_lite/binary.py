@@ -0,0 +1,185 @@
+"""
+Binary format of gpx for fast repeated loading.
+
+Layout, all numbers little-endian:
+    header: magic b'GPXB', format version (uint16), flags (uint16),
+            size and mtime in ns of the source gpx (int64, 0 if unknown),
+            number of tracks, segments and points, size of metadata (int64)
+    metadata: json with version, creator, track names and numbers,
+              padded with spaces to a multiple of 8 bytes
+    track offsets: int64 * (tracks + 1), indices of first segment of each track
+    segment offsets: int64 * (segments + 1), indices of first point of each segment
+    latitudes: float64 * points
+    longitudes: float64 * points
+    times: int64 * points, microseconds since epoch
+"""
+import json
+import mmap
+import sys
+from array import array
+from os import stat, replace, path as os_path
+from struct import Struct
+from typing import Union, IO, List, Optional, Tuple, Sequence, Dict, Any
+
+from gpx_lite.gpx import GPX
+from gpx_lite.gpxtrack import GPXTrack
+from gpx_lite.gpxcolumnarsegment import GPXColumnarSegment
+
+MAGIC = b'GPXB'
+FORMAT_VERSION = 1
+SIDECAR_EXTENSION = '.gpxb'
+_HEADER = Struct('<4sHHqqqqqq')
+
+
+def _little_endian(column: Sequence, typecode: str)->Any:
+    if sys.byteorder == 'little':
+        return memoryview(column).cast('B')
+    result: array = array(typecode, column)
+    result.byteswap()
+    return result
+
+
+def save_binary(gpx: GPX, file: Union[str, IO],
+                source_stat: Optional[Tuple[int, int]]=None)->None:
+    """
+    Saves gpx in binary format.
+
+    :param gpx: gpx to save
+    :param file: path or binary file handler
+    :param source_stat: size and mtime in ns of the source gpx file,
+                        used to check if sidecar file is up to date
+    """
+    if isinstance(file, str):
+        with open(file, 'wb') as fh:
+            return save_binary(gpx, fh, source_stat)
+    segments: List[GPXColumnarSegment] = [seg for track in gpx for seg in track]
+    track_offsets: array = array('q', [0])
+    for track in gpx:
+        track_offsets.append(track_offsets[-1] + len(track))
+    segment_offsets: array = array('q', [0])
+    for seg in segments:
+        segment_offsets.append(segment_offsets[-1] + len(seg))
+    n_points: int = segment_offsets[-1]
+    meta: bytes = json.dumps({'version': gpx.version,
+                              'creator': gpx.creator,
+                              'names': [track.name for track in gpx],
+                              'numbers': [track.number for track in gpx]}).encode('utf-8')
+    meta += b' ' * (-len(meta) % 8)
+    size, mtime = source_stat if source_stat else (0, 0)
+    start: int = file.tell()
+    file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, size, mtime,
+                            len(gpx), len(segments), n_points, len(meta)))
+    file.write(meta)
+    file.write(_little_endian(track_offsets, 'q'))
+    file.write(_little_endian(segment_offsets, 'q'))
+    columns_start: int = file.tell()
+    for seg, first in zip(segments, segment_offsets):
+        if not len(seg):
+            continue
+        for i, (column, typecode) in enumerate(zip(seg.columns(), 'ddq')):
+            file.seek(columns_start + (i * n_points + first) * 8)
+            file.write(_little_endian(column, typecode))
+    file.seek(start + _HEADER.size + len(meta) + (len(track_offsets) + len(segment_offsets)
+                                                  + 3 * n_points) * 8)
+    file.truncate()
+
+
+def _read_header(fh: IO)->Tuple[int, ...]:
+    header: bytes = fh.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError('File is too short for gpx binary format')
+    values: Tuple[int, ...] = _HEADER.unpack(header)
+    if values[0] != MAGIC:
+        raise ValueError('File is not in gpx binary format')
+    if values[1] != FORMAT_VERSION:
+        raise ValueError('Unsupported version %s of gpx binary format' % values[1])
+    return values
+
+
+def load_binary(path: str)->GPX:
+    """
+    Loads gpx saved by save_binary(). The file is memory-mapped,
+    segments are GPXColumnarSegment reading directly from the mapped file,
+    so loading takes almost no time and only used pages are read from disk.
+    Segments are copied into memory on the first change.
+
+    :param path: path to the binary file
+    :return: loaded gpx
+    """
+    with open(path, 'rb') as fh:
+        _, _, _, _, _, n_tracks, n_segments, n_points, meta_size = _read_header(fh)
+        meta: Dict[str, Any] = json.loads(fh.read(meta_size).decode('utf-8'))
+        data: memoryview = memoryview(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+    position: int = _HEADER.size + meta_size
+
+    def column(length: int, typecode: str)->Sequence:
+        nonlocal position
+        values: memoryview = data[position:position + length * 8].cast(typecode)
+        position += length * 8
+        if sys.byteorder != 'little':
+            values = array(typecode, values)
+            values.byteswap()
+        return values
+
+    track_offsets: Sequence[int] = column(n_tracks + 1, 'q')
+    segment_offsets: Sequence[int] = column(n_segments + 1, 'q')
+    lat: Sequence[float] = column(n_points, 'd')
+    lon: Sequence[float] = column(n_points, 'd')
+    time: Sequence[int] = column(n_points, 'q')
+    segments: List[GPXColumnarSegment] = [
+        GPXColumnarSegment.from_columns(lat[start:end], lon[start:end], time[start:end], shared=True)
+        for start, end in zip(segment_offsets, segment_offsets[1:])]
+    tracks: List[GPXTrack] = [GPXTrack(name, number, segments[start:end])
+                              for name, number, start, end in zip(meta['names'], meta['numbers'],
+                                                                  track_offsets, track_offsets[1:])]
+    return GPX(meta['version'], meta['creator'], tracks)
+
+
+def sidecar_path(path: str)->str:
+    """
+    The extension of an uncompressed file is replaced, traces.gpx -> traces.gpxb,
+    it is appended to the name of a compressed file, traces.gpx.gz -> traces.gpx.gz.gpxb,
+    so that traces.gpx and traces.gpx.gz next to each other have separate sidecars.
+
+    :param path: path to gpx file
+    :return: path to its binary sidecar file
+    """
+    from gpx_lite.compression import compression_from_name
+
+    if compression_from_name(path) is not None:
+        return path + SIDECAR_EXTENSION
+    return os_path.splitext(path)[0] + SIDECAR_EXTENSION
+
+
+def load(path: str, sidecar: bool=True)->GPX:
+    """
+    Loads gpx file, with sidecar=True reuses binary sidecar file
+    next to it if the size and mtime of the gpx file match the ones
+    stored in the sidecar, otherwise parses the gpx and writes the sidecar.
+    Compressed gpx is detected and decompressed, see sidecar_path() for names of sidecars.
+
+    :param path: path to gpx file, possibly compressed
+    :param sidecar: use and update binary sidecar file
+    :return: loaded gpx, segments are GPXColumnarSegment
+    """
+    from gpx_lite.parser import GPXParser
+
+    binary_path: str = sidecar_path(path)
+    source = stat(path)
+    source_stat: Tuple[int, int] = (source.st_size, source.st_mtime_ns)
+    if sidecar:
+        try:
+            with open(binary_path, 'rb') as fh:
+                header: Tuple[int, ...] = _read_header(fh)
+            if header[3:5] == source_stat:
+                return load_binary(binary_path)
+        except (OSError, ValueError):
+            pass
+    gpx: GPX = GPXParser(path, columnar=True).iterparse()
+    if sidecar:
+        try:
+            save_binary(gpx, binary_path + '.tmp', source_stat)
+            replace(binary_path + '.tmp', binary_path)
+        except OSError:
+            pass
+    return gpx
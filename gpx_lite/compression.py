@@ -0,0 +1,258 @@
+"""
+Reading and writing of compressed gpx files.
+
+Input format is detected by magic bytes, output format by file extension
+or given explicitly. Supported formats:
+    'gz': gzip, extensions .gz and .gzip
+    'bz2': bzip2, extension .bz2
+    'xz': xz, extension .xz
+"""
+from contextlib import contextmanager, ExitStack
+from os import path as os_path
+from typing import IO, Dict, List, Iterator, Optional, Union, Any
+
+from gpx_lite.progress import ProgressStats, CountingReader, source_size
+
+MAGIC: Dict[str, bytes] = {'gz': b'\x1f\x8b', 'bz2': b'BZh', 'xz': b'\xfd7zXZ\x00'}
+EXTENSIONS: Dict[str, str] = {'.gz': 'gz', '.gzip': 'gz', '.bz2': 'bz2', '.xz': 'xz'}
+READ_AHEAD_CHUNK = 1024 * 1024
+READ_AHEAD_DEPTH = 4
+
+
+def detect(prefix: bytes)->Optional[str]:
+    """
+    :param prefix: first bytes of a file, at least 6
+    :return: 'gz', 'bz2', 'xz' or None if not compressed
+    """
+    for compression, magic in MAGIC.items():
+        if prefix.startswith(magic):
+            return compression
+    return None
+
+
+def compression_from_name(name: str)->Optional[str]:
+    """
+    :param name: path to file
+    :return: 'gz', 'bz2', 'xz' or None from the file extension
+    """
+    return EXTENSIONS.get(os_path.splitext(name)[1].lower())
+
+
+def _open_compressed(fileobj: Any, compression: str, mode: str)->IO:
+    if compression == 'gz':
+        from gzip import GzipFile
+        return GzipFile(fileobj=fileobj, mode=mode)
+    elif compression == 'bz2':
+        from bz2 import BZ2File
+        return BZ2File(fileobj, mode)
+    elif compression == 'xz':
+        from lzma import LZMAFile
+        return LZMAFile(fileobj, mode)
+    raise ValueError('Unknown compression %s, use one of %s' % (compression, ', '.join(MAGIC)))
+
+
+def _new_decompressor(compression: str)->Any:
+    if compression == 'gz':
+        from zlib import decompressobj, MAX_WBITS
+        return decompressobj(16 + MAX_WBITS)
+    elif compression == 'bz2':
+        from bz2 import BZ2Decompressor
+        return BZ2Decompressor()
+    elif compression == 'xz':
+        from lzma import LZMADecompressor
+        return LZMADecompressor()
+    raise ValueError('Unknown compression %s, use one of %s' % (compression, ', '.join(MAGIC)))
+
+
+class StreamDecompressor:
+    """
+    Incremental decompression of data coming in chunks, e.g. from network,
+    concatenated compressed streams are decompressed one after another.
+
+    Args:
+        compression: 'gz', 'bz2' or 'xz'
+    """
+
+    __slots__ = ('_compression', '_decompressor')
+
+    def __init__(self, compression: str)->None:
+        self._compression: str = compression
+        self._decompressor: Any = _new_decompressor(compression)
+
+    def decompress(self, data: bytes)->bytes:
+        """
+        :param data: next chunk of compressed data
+        :return: decompressed data available so far, may be empty
+        """
+        parts: List[bytes] = []
+        while data:
+            parts.append(self._decompressor.decompress(data))
+            if not self._decompressor.eof:
+                break
+            data = self._decompressor.unused_data
+            self._decompressor = _new_decompressor(self._compression)
+        return b''.join(parts)
+
+
+class _PrefixedReader:
+    """
+    Returns already read data before the rest of the source.
+    """
+
+    __slots__ = ('_prefix', '_source')
+
+    def __init__(self, prefix: Union[str, bytes], source: IO)->None:
+        self._prefix: Union[str, bytes] = prefix
+        self._source: IO = source
+
+    def read(self, size: int=-1)->Union[str, bytes]:
+        prefix: Union[str, bytes] = self._prefix
+        if not prefix:
+            return self._source.read(size)
+        if 0 <= size <= len(prefix):
+            self._prefix = prefix[size:]
+            return prefix[:size]
+        self._prefix = prefix[:0]
+        return prefix + self._source.read(size - len(prefix) if size >= 0 else -1)
+
+
+class ReadAheadReader:
+    """
+    Reads the source in chunks on a background thread, so that reading
+    and decompression overlap with parsing, decompressors release the GIL.
+
+    Args:
+        source: binary or text file handler
+        chunk_size: size of chunks read from the source
+        depth: maximal number of chunks read ahead
+    """
+
+    __slots__ = ('_queue', '_thread', '_chunk', '_position', '_eof', '_stopped')
+
+    def __init__(self, source: IO, chunk_size: int=READ_AHEAD_CHUNK, depth: int=READ_AHEAD_DEPTH)->None:
+        from queue import Queue
+        from threading import Thread
+
+        self._queue: Any = Queue(depth)
+        self._chunk: Union[str, bytes] = b''
+        self._position: int = 0
+        self._eof: bool = False
+        self._stopped: bool = False
+        self._thread: Any = Thread(target=self._fill, args=(source, chunk_size), daemon=True)
+        self._thread.start()
+
+    def _fill(self, source: IO, chunk_size: int)->None:
+        try:
+            while not self._stopped:
+                chunk: Union[str, bytes] = source.read(chunk_size)
+                self._queue.put(chunk)
+                if not chunk:
+                    return
+        except BaseException as error:
+            self._queue.put(error)
+
+    def _next_chunk(self)->bool:
+        chunk: Any = self._queue.get()
+        if isinstance(chunk, BaseException):
+            self._eof = True
+            raise chunk
+        self._chunk = chunk
+        self._position = 0
+        self._eof = not chunk
+        return not self._eof
+
+    def read(self, size: int=-1)->Union[str, bytes]:
+        if self._position >= len(self._chunk) and (self._eof or not self._next_chunk()):
+            return self._chunk[:0]
+        if size < 0:
+            parts: List[Union[str, bytes]] = [self._chunk[self._position:]]
+            while self._next_chunk():
+                parts.append(self._chunk)
+            return parts[0][:0].join(parts)
+        data: Union[str, bytes] = self._chunk[self._position:self._position + size]
+        self._position += len(data)
+        return data
+
+    def close(self)->None:
+        """
+        Stops the background thread.
+        """
+        from queue import Empty
+
+        self._stopped = True
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except Empty:
+                pass
+
+
+@contextmanager
+def open_input(file: Union[str, IO], stats: Optional[ProgressStats]=None,
+               read_ahead: bool=False)->Iterator[Any]:
+    """
+    Opens gpx for reading, compressed input is decompressed in streaming chunks.
+    Only files opened here are closed on exit.
+
+    Usage:
+
+        with open_input('traces.gpx.gz') as source:
+            data = source.read(1024 * 1024)
+
+    :param file: path, binary or text file handler
+    :param stats: progress stats, bytes read from the file, compressed if it is compressed,
+                  are counted into stats.bytes and size of the file is set as stats.total
+    :param read_ahead: read and decompress on a background thread
+    :return: readable stream of xml, text only if file is a text file handler
+    """
+    with ExitStack() as stack:
+        source: Any = stack.enter_context(open(file, 'rb')) if isinstance(file, str) else file
+        if stats is not None:
+            stats.total = source_size(source)
+        if hasattr(source, 'peek'):
+            prefix: Union[str, bytes] = source.peek(6)[:6]
+        else:
+            prefix = source.read(6)
+            source = _PrefixedReader(prefix, source)
+        compression: Optional[str] = detect(prefix) if isinstance(prefix, bytes) else None
+        if stats is not None:
+            source = CountingReader(source, stats)
+        if compression is not None:
+            source = stack.enter_context(_open_compressed(source, compression, 'rb'))
+        if read_ahead:
+            source = ReadAheadReader(source)
+            stack.callback(source.close)
+        yield source
+
+
+@contextmanager
+def open_output(file: Union[str, IO], compression: Optional[str]=None)->Iterator[IO]:
+    """
+    Opens gpx for writing. Only files opened here are closed on exit,
+    a compressed stream written into a given file handler is finished.
+
+    :param file: path or file handler, binary if compression is given
+    :param compression: 'gz', 'bz2' or 'xz', from the extension of the path by default
+    :return: writable stream
+    """
+    with ExitStack() as stack:
+        target: Any = file
+        if isinstance(file, str):
+            if compression is None:
+                compression = compression_from_name(file)
+            target = stack.enter_context(open(file, 'wb'))
+        if compression is not None:
+            target = stack.enter_context(_open_compressed(target, compression, 'wb'))
+        yield target
+
+
+if __name__ == '__main__':
+    from io import BytesIO
+
+    compressed = BytesIO()
+    with open_output(compressed, 'xz') as out:
+        out.write(b'<gpx></gpx>')
+    compressed.seek(0)
+    stats = ProgressStats('parse')
+    with open_input(compressed, stats, read_ahead=True) as xml:
+        print(detect(compressed.getvalue()), xml.read(), stats.bytes, 'compressed bytes read')
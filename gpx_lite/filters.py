@@ -0,0 +1,154 @@
+import re
+from typing import Optional, Tuple, Callable, Union, Pattern, Any
+
+from gpx_lite.utils import NO_TIME, time_to_epoch, to_epoch
+
+BBox = Tuple[float, float, float, float]
+
+
+class FilterSpec:
+    """
+    Filters applied by GPXParser while reading the file, rejected points
+    and tracks are never turned into GPXTrackPoint and GPXTrack objects.
+    All conditions are optional, points and tracks must pass all given ones.
+    Segments and tracks left without points are dropped.
+
+    Usage:
+
+        city = FilterSpec(bbox=(49.94, 14.22, 50.18, 14.71),
+                          start='2017-11-22T06:00:00Z', end='2017-11-22T10:00:00Z',
+                          min_segment_points=10)
+        gpx = gpx_lite.iterparse(fh, filters=city)
+
+    Attributes:
+        bbox: (min_lat, min_lon, max_lat, max_lon), borders included,
+              the box crosses the 180th meridian if min_lon > max_lon
+        start: epoch time in microseconds, points before it are rejected
+        end: epoch time in microseconds, points at or after it are rejected
+        name: regular expression searched in track names
+        min_segment_points: segments with fewer points left are dropped
+        min_track_points: tracks with fewer points left are dropped
+        point: predicate called with latitude, longitude
+               and epoch time in microseconds (utils.NO_TIME if missing)
+        track: predicate called with track name and number strings
+    """
+
+    __slots__ = ('_bbox', '_start', '_end', '_name', '_min_segment_points', '_min_track_points',
+                 '_point', '_track')
+
+    def __init__(self, bbox: Optional[BBox]=None,
+                 start: Any=None, end: Any=None,
+                 name: Optional[Union[str, Pattern]]=None,
+                 min_segment_points: int=1, min_track_points: int=1,
+                 point: Optional[Callable[[float, float, int], bool]]=None,
+                 track: Optional[Callable[[Optional[str], Optional[str]], bool]]=None):
+        """
+        :param bbox: (min_lat, min_lon, max_lat, max_lon) of kept points
+        :param start: datetime, time string or seconds since epoch,
+                      points without time are rejected if start or end is given
+        :param end: datetime, time string or seconds since epoch, not included
+        :param name: regular expression searched in track names,
+                     tracks without name are rejected
+        :param min_segment_points: minimal number of points left in a segment
+        :param min_track_points: minimal number of points left in a track
+        :param point: function(lat, lon, epoch)->bool keeping points
+        :param track: function(name, number)->bool keeping tracks
+        """
+        self._bbox: Optional[BBox] = tuple(bbox) if bbox is not None else None
+        self._start: Optional[int] = to_epoch(start) if start is not None else None
+        self._end: Optional[int] = to_epoch(end) if end is not None else None
+        self._name: Optional[Pattern] = re.compile(name) if name is not None else None
+        self._min_segment_points: int = min_segment_points
+        self._min_track_points: int = min_track_points
+        self._point: Optional[Callable[[float, float, int], bool]] = point
+        self._track: Optional[Callable[[Optional[str], Optional[str]], bool]] = track
+
+    def __repr__(self)->str:
+        return '<FilterSpec %s>' % ', '.join('%s=%r' % (attr[1:], getattr(self, attr))
+                                             for attr in self.__slots__
+                                             if getattr(self, attr) is not None)
+
+    @property
+    def bbox(self)->Optional[BBox]:
+        return self._bbox
+
+    @property
+    def start(self)->Optional[int]:
+        return self._start
+
+    @property
+    def end(self)->Optional[int]:
+        return self._end
+
+    @property
+    def name(self)->Optional[Pattern]:
+        return self._name
+
+    @property
+    def min_segment_points(self)->int:
+        return self._min_segment_points
+
+    @property
+    def min_track_points(self)->int:
+        return self._min_track_points
+
+    @property
+    def filters_points(self)->bool:
+        """
+        :return: True if some points can be rejected
+        """
+        return self._bbox is not None or self._start is not None \
+            or self._end is not None or self._point is not None
+
+    def accept_name(self, name: Optional[str])->bool:
+        """
+        :param name: track name
+        :return: True if the name matches the name pattern
+        """
+        return self._name is None or (name is not None and self._name.search(name) is not None)
+
+    def accept_track(self, name: Optional[str], number: Optional[str])->bool:
+        """
+        :param name: track name
+        :param number: track number
+        :return: True if the track passes name pattern and track predicate
+        """
+        return self.accept_name(name) and (self._track is None or bool(self._track(name, number)))
+
+    def accept_point(self, lat: float, lon: float, time: Optional[Union[str, int]])->bool:
+        """
+        :param lat: latitude in degrees
+        :param lon: longitude in degrees
+        :param time: time string, epoch time in microseconds or None
+        :return: True if the point passes bounding box, time window and point predicate
+        """
+        if self._bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = self._bbox
+            if not min_lat <= lat <= max_lat:
+                return False
+            if min_lon <= max_lon:
+                if not min_lon <= lon <= max_lon:
+                    return False
+            elif max_lon < lon < min_lon:
+                return False
+        if self._start is None and self._end is None and self._point is None:
+            return True
+        epoch: int = time if isinstance(time, int) else time_to_epoch(time)
+        if self._start is not None or self._end is not None:
+            if epoch == NO_TIME:
+                return False
+            if self._start is not None and epoch < self._start:
+                return False
+            if self._end is not None and epoch >= self._end:
+                return False
+        return self._point is None or bool(self._point(lat, lon, epoch))
+
+
+if __name__ == '__main__':
+    spec = FilterSpec(bbox=(50.0, 14.0, 50.1, 14.5), end='2017-11-22T09:00:00Z', name='^8000')
+    print(spec)
+    print('Track 800003627_337: ', spec.accept_track('800003627_337', '0'))
+    print('Track 700003627_337: ', spec.accept_track('700003627_337', '0'))
+    print('Point inside: ', spec.accept_point(50.0164596, 14.4547907, '2017-11-22T07:03:36Z'))
+    print('Point too late: ', spec.accept_point(50.0164596, 14.4547907, '2017-11-22T10:03:36Z'))
+    print('Point outside: ', spec.accept_point(14.4547907, 50.0164596, '2017-11-22T07:03:36Z'))
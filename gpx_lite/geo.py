@@ -0,0 +1,388 @@
+"""
+Batch metrics over columns of a track segment,
+see GPXTrackSegment.columns().
+Computed with numpy over the whole column if it is installed,
+with pure python loops otherwise. Per step values are returned
+as array('d') with one item less than the number of points,
+nan marks steps without value (e.g. points without time).
+"""
+from array import array
+from bisect import bisect_left
+from math import radians, degrees, sin, cos, asin, atan2, sqrt, ceil, nan, isnan
+from operator import itemgetter
+from typing import List, Optional, Sequence, Tuple, Any
+
+from gpx_lite.utils import NO_TIME, optional_numpy
+from gpx_lite.temporal import MAX_TIME
+
+EARTH_RADIUS = 6378.137 * 1000  # metres, the same as in gpxpy
+STOPPED_SPEED = 1 / 3.6  # m/s, slower steps don't count as moving
+STOP_RADIUS = 50.0  # metres, points of a stop are closer to its first point
+STOP_DURATION = 300.0  # seconds, shorter dwells are not stops
+RESAMPLE_METHODS = ('linear', 'nearest', 'previous')
+GAP_POLICIES = ('skip', 'interpolate', 'split')  # split only for tracks and gpx
+
+
+def _to_array(values: Any, typecode: str='d')->array:
+    result: array = array(typecode)
+    result.frombytes(values.tobytes())
+    return result
+
+
+def distances(lat: Sequence[float], lon: Sequence[float])->array:
+    """
+    Haversine distances between consecutive points.
+
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :return: distances in metres
+    """
+    if len(lat) < 2:
+        return array('d')
+    np = optional_numpy()
+    if np is not None:
+        phi = np.radians(np.frombuffer(lat, dtype=np.float64))
+        lam = np.radians(np.frombuffer(lon, dtype=np.float64))
+        a = np.sin(np.diff(phi) / 2) ** 2 \
+            + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(np.diff(lam) / 2) ** 2
+        return _to_array(2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0))))
+    result: array = array('d')
+    phi_1: float = radians(lat[0])
+    lam_1: float = radians(lon[0])
+    for i in range(1, len(lat)):
+        phi_2: float = radians(lat[i])
+        lam_2: float = radians(lon[i])
+        a: float = sin((phi_2 - phi_1) / 2) ** 2 \
+            + cos(phi_1) * cos(phi_2) * sin((lam_2 - lam_1) / 2) ** 2
+        result.append(2 * EARTH_RADIUS * asin(sqrt(min(a, 1.0))))
+        phi_1, lam_1 = phi_2, lam_2
+    return result
+
+
+def bearings(lat: Sequence[float], lon: Sequence[float])->array:
+    """
+    Initial bearings from every point to the next one.
+
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :return: bearings in degrees clockwise from north, 0 <= bearing < 360
+    """
+    if len(lat) < 2:
+        return array('d')
+    np = optional_numpy()
+    if np is not None:
+        phi = np.radians(np.frombuffer(lat, dtype=np.float64))
+        d_lam = np.radians(np.diff(np.frombuffer(lon, dtype=np.float64)))
+        y = np.sin(d_lam) * np.cos(phi[1:])
+        x = np.cos(phi[:-1]) * np.sin(phi[1:]) - np.sin(phi[:-1]) * np.cos(phi[1:]) * np.cos(d_lam)
+        return _to_array(np.degrees(np.arctan2(y, x)) % 360)
+    result: array = array('d')
+    for i in range(1, len(lat)):
+        phi_1: float = radians(lat[i - 1])
+        phi_2: float = radians(lat[i])
+        d_lam: float = radians(lon[i] - lon[i - 1])
+        y: float = sin(d_lam) * cos(phi_2)
+        x: float = cos(phi_1) * sin(phi_2) - sin(phi_1) * cos(phi_2) * cos(d_lam)
+        result.append(degrees(atan2(y, x)) % 360)
+    return result
+
+
+def time_steps(time: Sequence[int])->array:
+    """
+    :param time: epoch times in microseconds
+    :return: seconds between consecutive points
+    """
+    if len(time) < 2:
+        return array('d')
+    np = optional_numpy()
+    if np is not None:
+        t = np.frombuffer(time, dtype=np.int64)
+        steps = np.diff(t) / 1e6
+        steps[(t[:-1] == NO_TIME) | (t[1:] == NO_TIME)] = np.nan
+        return _to_array(steps)
+    return array('d', [nan if t_1 == NO_TIME or t_2 == NO_TIME else (t_2 - t_1) / 1e6
+                       for t_1, t_2 in zip(time, time[1:])])
+
+
+def speeds(lat: Sequence[float], lon: Sequence[float], time: Sequence[int])->array:
+    """
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :param time: epoch times in microseconds
+    :return: speeds in m/s, nan for steps without positive time difference
+    """
+    steps: array = time_steps(time)
+    np = optional_numpy()
+    if np is not None and len(steps):
+        dt = np.frombuffer(steps, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v = np.frombuffer(distances(lat, lon), dtype=np.float64) / dt
+        v[~(dt > 0)] = np.nan
+        return _to_array(v)
+    return array('d', [d / dt if dt > 0 else nan
+                       for d, dt in zip(distances(lat, lon), steps)])
+
+
+def duration(time: Sequence[int])->float:
+    """
+    :param time: epoch times in microseconds
+    :return: seconds between the first and the last time, 0 for less than 2 times
+    """
+    np = optional_numpy()
+    if np is not None and len(time):
+        t = np.frombuffer(time, dtype=np.int64)
+        t = t[t != NO_TIME]
+        return float(t.max() - t.min()) / 1e6 if len(t) else 0.0
+    times = [t for t in time if t != NO_TIME]
+    return (max(times) - min(times)) / 1e6 if times else 0.0
+
+
+def moving_time(lat: Sequence[float], lon: Sequence[float], time: Sequence[int],
+                stopped_speed: float=STOPPED_SPEED)->float:
+    """
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :param time: epoch times in microseconds
+    :param stopped_speed: steps with lower or equal speed in m/s are not counted
+    :return: seconds spent moving
+    """
+    steps: array = time_steps(time)
+    step_speeds: array = speeds(lat, lon, time)
+    np = optional_numpy()
+    if np is not None and len(steps):
+        v = np.frombuffer(step_speeds, dtype=np.float64)
+        return float(np.frombuffer(steps, dtype=np.float64)[v > stopped_speed].sum())
+    return float(sum(dt for dt, v in zip(steps, step_speeds)
+                     if not isnan(v) and v > stopped_speed))
+
+
+def length_2d(lat: Sequence[float], lon: Sequence[float])->float:
+    """
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :return: length in metres, elevation is not taken into account
+    """
+    np = optional_numpy()
+    if np is not None:
+        return float(np.frombuffer(distances(lat, lon), dtype=np.float64).sum())
+    return float(sum(distances(lat, lon)))
+
+
+def gap_ranges(lat: Sequence[float], lon: Sequence[float], time: Sequence[int],
+               max_gap_s: Optional[float]=None, max_jump_m: Optional[float]=None)->List[range]:
+    """
+    Splits points where the time step or the distance to the previous point
+    is too large. Steps without time are not gaps.
+
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :param time: epoch times in microseconds
+    :param max_gap_s: longer steps in seconds start a new piece, None for no limit
+    :param max_jump_m: longer steps in metres start a new piece, None for no limit
+    :return: ranges of indices of consecutive pieces covering all points
+    """
+    size: int = len(lat)
+    if not size:
+        return []
+    checks: List[Tuple[array, float]] = []
+    if max_gap_s is not None:
+        checks.append((time_steps(time), max_gap_s))
+    if max_jump_m is not None:
+        checks.append((distances(lat, lon), max_jump_m))
+    np = optional_numpy()
+    if np is not None and size > 1:
+        mask = np.zeros(size - 1, dtype=bool)
+        for steps, limit in checks:
+            mask |= np.frombuffer(steps, dtype=np.float64) > limit
+        starts: List[int] = [0] + (np.flatnonzero(mask) + 1).tolist()
+    else:
+        starts = [0] + [i for i in range(1, size)
+                        if any(steps[i - 1] > limit for steps, limit in checks)]
+    starts.append(size)
+    return [range(start, end) for start, end in zip(starts, starts[1:])]
+
+
+def stop_ranges(lat: Sequence[float], lon: Sequence[float], time: Sequence[int],
+                radius_m: float=STOP_RADIUS, min_duration_s: float=STOP_DURATION)->List[range]:
+    """
+    Finds stops: points staying within radius_m of the first point of the stop
+    for at least min_duration_s. Points must be sorted by time.
+    Points without time don't start a stop nor count into its duration,
+    but they are part of a stop if they are within the radius.
+
+    A stop can start only at a point whose first timed point min_duration_s later
+    is within the radius too, the candidates are found in one batch
+    and only they are extended point by point.
+
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :param time: epoch times in microseconds
+    :param radius_m: maximal distance from the first point of a stop in metres
+    :param min_duration_s: minimal duration of a stop in seconds
+    :return: ranges of indices of points of the stops
+    """
+    return _stop_ranges(lat, lon, time, radius_m, min_duration_s, optional_numpy())
+
+
+def _stop_ranges(lat: Sequence[float], lon: Sequence[float], time: Sequence[int],
+                 radius_m: float, min_duration_s: float, np: Any)->List[range]:
+    """
+    stop_ranges() with numpy module np, or pure python if np is None,
+    see gpx_lite.benchmark.consistency.check_stops().
+    """
+    size: int = len(lat)
+    if not size:
+        return []
+    # haversine of the central angle, compared without asin and sqrt
+    limit: float = sin(min(radius_m / (2 * EARTH_RADIUS), 1.0)) ** 2
+    min_duration: int = max(ceil(min_duration_s * 1e6), 0)
+    if np is not None:
+        phi = np.radians(np.frombuffer(lat, dtype=np.float64))
+        lam = np.radians(np.frombuffer(lon, dtype=np.float64))
+        t = np.frombuffer(time, dtype=np.int64)
+        # search only timed points, NO_TIME would break the order
+        timed = np.flatnonzero(t != NO_TIME)
+        timed_t = t[timed]
+        # not before the point itself, equal times come before it for min_duration 0
+        ends = np.maximum(np.searchsorted(timed_t, np.minimum(timed_t, MAX_TIME - min_duration) + min_duration),
+                          np.arange(len(timed)))
+        found = ends < len(timed)
+        i = timed[found]
+        k = timed[ends[found]]
+        a = np.sin((phi[k] - phi[i]) / 2) ** 2 + np.cos(phi[i]) * np.cos(phi[k]) * np.sin((lam[k] - lam[i]) / 2) ** 2
+        candidates: List[int] = i[a <= limit].tolist()
+        half_phi: List[float] = (phi / 2).tolist()
+        half_lam: List[float] = (lam / 2).tolist()
+        times: List[int] = t.tolist()
+    else:
+        half_phi = [radians(value) / 2 for value in lat]
+        half_lam = [radians(value) / 2 for value in lon]
+        times = list(time)
+        timed_indices: List[int] = [i for i in range(size) if times[i] != NO_TIME]
+        timed_times: List[int] = [times[i] for i in timed_indices]
+        candidates = []
+        for position, (i, t_i) in enumerate(zip(timed_indices, timed_times)):
+            end: int = max(bisect_left(timed_times, t_i + min_duration), position)
+            if end == len(timed_indices):
+                continue
+            k: int = timed_indices[end]
+            if sin(half_phi[k] - half_phi[i]) ** 2 + cos(2 * half_phi[i]) \
+                    * cos(2 * half_phi[k]) * sin(half_lam[k] - half_lam[i]) ** 2 <= limit:
+                candidates.append(i)
+    result: List[range] = []
+    start: int = 0
+    for i in candidates:
+        if i < start:
+            continue
+        phi_1: float = half_phi[i]
+        lam_1: float = half_lam[i]
+        c_1: float = cos(2 * phi_1)
+        last: int = i  # last timed point within the radius
+        j: int = i + 1
+        while j < size and sin(half_phi[j] - phi_1) ** 2 \
+                + c_1 * cos(2 * half_phi[j]) * sin(half_lam[j] - lam_1) ** 2 <= limit:
+            if times[j] != NO_TIME:
+                last = j
+            j += 1
+        if times[last] - times[i] >= min_duration:
+            result.append(range(i, j))
+            start = j
+    return result
+
+
+def resample(lat: Sequence[float], lon: Sequence[float], time: Sequence[int],
+             step_s: float, method: str='linear',
+             max_gap_s: Optional[float]=None)->Tuple[array, array, array]:
+    """
+    Positions at times that are multiples of step_s since epoch, from the first
+    to the last time of the points, e.g. at every whole second for step_s=1.
+    Points without time are left out, unsorted points are sorted by time.
+    Coordinates are interpolated in degrees, which is precise for steps
+    much shorter than the size of the earth.
+
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :param time: epoch times in microseconds
+    :param step_s: time step in seconds, rounded to microseconds
+    :param method: 'linear' interpolation, 'nearest' point or 'previous' point
+    :param max_gap_s: no positions are generated between points further apart
+                      in seconds, None to interpolate over all gaps
+    :return: array('d') of latitudes, array('d') of longitudes
+             and array('q') of epoch times in microseconds
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError('Unknown method %s, use one of %s' % (method, ', '.join(RESAMPLE_METHODS)))
+    step: int = round(step_s * 1e6)
+    if step < 1:
+        raise ValueError('Step must be at least 1 microsecond, not %s s' % step_s)
+    np = optional_numpy()
+    if np is not None:
+        t = np.frombuffer(time, dtype=np.int64)
+        y = np.frombuffer(lat, dtype=np.float64)
+        x = np.frombuffer(lon, dtype=np.float64)
+        timed = t != NO_TIME
+        if not timed.all():
+            t, y, x = t[timed], y[timed], x[timed]
+        if not len(t):
+            return array('d'), array('d'), array('q')
+        if not (t[1:] >= t[:-1]).all():
+            order = np.argsort(t, kind='stable')
+            t, y, x = t[order], y[order], x[order]
+        grid = np.arange(-(-int(t[0]) // step) * step, int(t[-1]) + 1, step, dtype=np.int64)
+        if method == 'linear':
+            grid_t, point_t = grid.astype(np.float64), t.astype(np.float64)
+            new_y, new_x = np.interp(grid_t, point_t, y), np.interp(grid_t, point_t, x)
+        else:
+            # last point at or before every time of the grid
+            index = np.searchsorted(t, grid, 'right') - 1
+            if method == 'nearest':
+                following = np.minimum(index + 1, len(t) - 1)
+                index = np.where(t[following] - grid < grid - t[index], following, index)
+            new_y, new_x = y[index], x[index]
+        if max_gap_s is not None and len(t) > 1:
+            gaps = np.diff(t) / 1e6 > max_gap_s
+            if gaps.any():
+                interval = np.minimum(np.searchsorted(t, grid, 'right') - 1, len(t) - 2)
+                keep = ~gaps[interval] | (grid == t[interval]) | (grid == t[-1])
+                grid, new_y, new_x = grid[keep], new_y[keep], new_x[keep]
+        return _to_array(new_y), _to_array(new_x), _to_array(grid, 'q')
+    points: List[Tuple[int, float, float]] = sorted(
+        [values for values in zip(time, lat, lon) if values[0] != NO_TIME], key=itemgetter(0))
+    new_lat: array = array('d')
+    new_lon: array = array('d')
+    new_time: array = array('q')
+    if not points:
+        return new_lat, new_lon, new_time
+    last: int = len(points) - 1
+    k: int = 0
+    for t in range(-(-points[0][0] // step) * step, points[-1][0] + 1, step):
+        while k < last and points[k + 1][0] <= t:
+            k += 1
+        t_1, lat_1, lon_1 = points[k]
+        if k < last:
+            t_2, lat_2, lon_2 = points[k + 1]
+            if max_gap_s is not None and t != t_1 and (t_2 - t_1) / 1e6 > max_gap_s:
+                continue
+            if method == 'linear':
+                fraction: float = (t - t_1) / (t_2 - t_1)
+                lat_1 += (lat_2 - lat_1) * fraction
+                lon_1 += (lon_2 - lon_1) * fraction
+            elif method == 'nearest' and t_2 - t < t - t_1:
+                lat_1, lon_1 = lat_2, lon_2
+        new_lat.append(lat_1)
+        new_lon.append(lon_1)
+        new_time.append(t)
+    return new_lat, new_lon, new_time
+
+if __name__ == '__main__':
+    lats = array('d', [50.0164596, 50.0174596, 50.0174596])
+    lons = array('d', [14.4547907, 14.4547907, 14.4567907])
+    times = array('q', [0, 10 * 10 ** 6, 10 * 10 ** 6])
+    print('Distances: ', distances(lats, lons))
+    print('Bearings: ', bearings(lats, lons))
+    print('Speeds: ', speeds(lats, lons, times))
+    print('Length: %.2f m, duration: %.2f s, moving: %.2f s' % (
+        length_2d(lats, lons), duration(times), moving_time(lats, lons, times)))
+    print('Pieces: ', gap_ranges(lats, lons, times, max_jump_m=120))
+    print('Stops: ', stop_ranges(lats, lons, times, radius_m=150, min_duration_s=10))
+    print('Resampled: ', resample(lats, lons, times, 2.5))
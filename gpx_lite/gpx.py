@@ -1,8 +1,31 @@
-from typing import Optional, List, Union, Iterator, Iterable, IO
-from copy import deepcopy
-
-from gpx_lite.gpxtrack import GPXTrack
-from tqdm import tqdm
+"""
+The GPX model class. Everything else is imported by the methods that use it,
+so that from gpx_lite import GPX stays cheap for tools that only need the class,
+see gpx_lite.benchmark.import_time.
+"""
+from __future__ import annotations
+
+from sys import getsizeof
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional, List, Dict, Union, Iterator, Iterable, IO, Tuple, Any
+    from gpx_lite.gpxtrack import GPXTrack
+    from gpx_lite.gpxtracksegment import GPXTrackSegment
+    from gpx_lite.progress import ProgressObserver
+    from gpx_lite.spatial import SpatialIndex
+    from gpx_lite.temporal import TemporalIndex
+
+
+def __getattr__(attr: str):
+    # GPXTrack and GPXTrackSegment used to be importable from here
+    if attr == 'GPXTrack':
+        from gpx_lite.gpxtrack import GPXTrack
+        return GPXTrack
+    if attr == 'GPXTrackSegment':
+        from gpx_lite.gpxtracksegment import GPXTrackSegment
+        return GPXTrackSegment
+    raise AttributeError('module %r has no attribute %r' % (__name__, attr))
 
 
 class GPX:
@@ -86,31 +109,289 @@ class GPX:
     def remove(self, item: GPXTrack):
         self._tracks.remove(item)
 
-    def write_to_file(self, fh: IO)->None:
-        version: str = self.version if self.version else '1.1'
-        creator: str = self.creator if self.creator else 'gpx-lite.py'
-        version_ns: str = version.replace('.', '/')
-        result: List[str] = ['<?xml version="1.0" encoding="UTF-8"?>',
-                             '\n<gpx xmlns="http://www.topografix.com/GPX/%s" ' % version_ns,
-                             'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" ',
-                             'xsi:schemaLocation="http://www.topografix.com/GPX/%s ' % version_ns,
-                             'http://www.topografix.com/GPX/%s/gpx.xsd" ' % version_ns,
-                             'version="%s" ' % version,
-                             'creator="%s">' % creator]
-        for string in result:
-            fh.write(string)
-        with tqdm(total=len(self._tracks), desc="Saving gpx", unit='track') as pbar:
+    def write_to_file(self, fh: Union[str, IO], precision: Optional[int]=None,
+                      buffer_size: Optional[int]=None,
+                      progress: Optional[ProgressObserver]=None,
+                      compression: Optional[str]=None)->None:
+        """
+        Saves gpx as xml. Tracks are rendered into strings
+        and written in chunks of about buffer_size characters.
+
+        :param fh: path, text or binary file handler, paths ending with .gz, .bz2
+                   or .xz are compressed
+        :param precision: number of decimal places of coordinates,
+                          None for the shortest exact representation
+        :param buffer_size: number of characters written at once,
+                            writer.DEFAULT_BUFFER_SIZE by default
+        :param progress: observer notified about tracks, points
+                         and bytes written, see gpx_lite.progress
+        :param compression: 'gz', 'bz2' or 'xz' to compress into a binary file handler
+                            or regardless of the extension of the path
+        """
+        from gpx_lite.writer import GPXWriter, DEFAULT_BUFFER_SIZE
+
+        if buffer_size is None:
+            buffer_size = DEFAULT_BUFFER_SIZE
+        with GPXWriter(fh, self.version, self.creator, precision, buffer_size,
+                       compression, progress, len(self._tracks)) as writer:
             for track in self._tracks:
-                track._write_to_file(fh)
-                pbar.update(1)
-        fh.write('\n</gpx>')
+                writer.write_track(track)
 
     def clone(self)->'GPX':
-        return deepcopy(self)
+        """
+        Copies the gpx, its tracks and segments, points are shared,
+        see GPXTrackSegment.clone() and GPXColumnarSegment.clone().
+
+        :return: copy of gpx
+        """
+        return GPX(self._version, self._creator, [track.clone() for track in self._tracks])
+
+    def memory_usage(self)->Dict[str, int]:
+        """
+        Estimates memory held by the gpx from sys.getsizeof() of its objects,
+        to plan capacity of workers or catch regressions.
+        Objects shared by several tracks or segments are counted for every reference.
+
+        :return: bytes held by 'gpx', 'tracks', 'segments', 'points' and 'strings',
+                 their 'total' and 'external' bytes of numpy arrays or mapped files
+                 viewed by columnar segments, that are not included in the total
+        """
+        from gpx_lite.utils import new_memory_usage, total_memory_usage
+
+        usage: Dict[str, int] = new_memory_usage()
+        usage['gpx'] += getsizeof(self) + getsizeof(self._tracks)
+        for string in (self._version, self._creator):
+            if string is not None:
+                usage['strings'] += getsizeof(string)
+        for track in self._tracks:
+            track.memory_usage(usage)
+        return total_memory_usage(usage)
+
+    def length_2d(self)->float:
+        """
+        :return: sum of lengths of all tracks in metres
+        """
+        return sum(item.length_2d() for item in self._tracks)
+
+    def duration(self)->float:
+        """
+        :return: sum of durations of all tracks in seconds
+        """
+        return sum(item.duration() for item in self._tracks)
+
+    def moving_time(self, stopped_speed: Optional[float]=None)->float:
+        """
+        :param stopped_speed: steps with lower or equal speed in m/s are not counted,
+                              geo.STOPPED_SPEED by default
+        :return: sum of moving times of all tracks in seconds
+        """
+        if stopped_speed is None:
+            from gpx_lite.geo import STOPPED_SPEED as stopped_speed
+        return sum(item.moving_time(stopped_speed) for item in self._tracks)
+
+    def split_on_gaps(self, max_gap_s: Optional[float]=None,
+                      max_jump_m: Optional[float]=None)->'GPX':
+        """
+        Splits every segment by GPXTrackSegment.split_on_gaps(),
+        points are shared with this gpx.
+
+        :param max_gap_s: longer steps in seconds start a new segment, None for no limit
+        :param max_jump_m: longer steps in metres start a new segment, None for no limit
+        :return: new gpx with the split segments
+        """
+        return GPX(self._version, self._creator,
+                   [track.split_on_gaps(max_gap_s, max_jump_m) for track in self._tracks])
+
+    def detect_stops(self, radius_m: Optional[float]=None,
+                     min_duration_s: Optional[float]=None)->List[Tuple[int, int, range]]:
+        """
+        Finds stops in every segment by GPXTrackSegment.detect_stops().
+
+        :param radius_m: maximal distance from the first point of a stop in metres,
+                         geo.STOP_RADIUS by default
+        :param min_duration_s: minimal duration of a stop in seconds,
+                               geo.STOP_DURATION by default
+        :return: track index, segment index and range of indices of points of every stop
+        """
+        from gpx_lite import geo
+
+        if radius_m is None:
+            radius_m = geo.STOP_RADIUS
+        if min_duration_s is None:
+            min_duration_s = geo.STOP_DURATION
+        return [(track_index, segment_index, points)
+                for track_index, track in enumerate(self._tracks)
+                for segment_index, points in track.detect_stops(radius_m, min_duration_s)]
+
+    def resample(self, step_s: float, method: str='linear',
+                 max_gap_s: Optional[float]=None, gaps: str='skip')->'GPX':
+        """
+        Resamples every segment by GPXTrackSegment.resample(),
+        see GPXTrack.resample().
+
+        :param step_s: time step in seconds, positions are at multiples of it since epoch
+        :param method: 'linear' interpolation, 'nearest' point or 'previous' point
+        :param max_gap_s: steps between points longer in seconds are gaps
+        :param gaps: 'skip' for no positions in gaps, 'interpolate' to fill them,
+                     'split' to start a new segment after every gap
+        :return: new gpx with GPXColumnarSegments
+        """
+        return GPX(self._version, self._creator,
+                   [track.resample(step_s, method, max_gap_s, gaps) for track in self._tracks])
+
+    async def awrite_to_file(self, target: Any, precision: Optional[int]=None,
+                             buffer_size: Optional[int]=None,
+                             progress: Optional[ProgressObserver]=None)->None:
+        """
+        Saves gpx as xml into asyncio.StreamWriter or async file,
+        see gpx_lite.aio.awrite_to_file().
+
+        :param target: asyncio.StreamWriter or async file
+        :param precision: number of decimal places of coordinates,
+                          None for the shortest exact representation
+        :param buffer_size: number of characters written at once,
+                            writer.DEFAULT_BUFFER_SIZE by default
+        :param progress: observer notified about tracks, points
+                         and bytes written, see gpx_lite.progress
+        """
+        from gpx_lite.aio import awrite_to_file
+        from gpx_lite.writer import DEFAULT_BUFFER_SIZE
+
+        if buffer_size is None:
+            buffer_size = DEFAULT_BUFFER_SIZE
+        await awrite_to_file(self, target, precision, buffer_size, progress)
+
+    def write_parallel(self, path: str, workers: Optional[int]=None,
+                       shards: Optional[int]=None,
+                       precision: Optional[int]=None)->List[str]:
+        """
+        Saves gpx as xml rendering ranges of tracks in a process pool,
+        into a single file or into several shard files with a manifest,
+        see gpx_lite.parallel.write_parallel().
+
+        :param path: path to the output file
+        :param workers: number of processes, os.cpu_count() by default
+        :param shards: number of shard files, None for a single file
+        :param precision: number of decimal places of coordinates,
+                          None for the shortest exact representation
+        :return: paths of written gpx files
+        """
+        from gpx_lite.parallel import write_parallel
+
+        return write_parallel(self, path, workers, shards, precision)
+
+    def build_spatial_index(self, cell_size: float=0.01)->'SpatialIndex':
+        """
+        Builds grid index for bounding box, radius and nearest point queries,
+        see gpx_lite.spatial.SpatialIndex.
+
+        :param cell_size: size of a grid cell in degrees
+        :return: index of all points
+        """
+        from gpx_lite.spatial import SpatialIndex
+
+        return SpatialIndex.build(self, cell_size)
+
+    def build_temporal_index(self)->'TemporalIndex':
+        """
+        Builds interval index of time spans of tracks and segments
+        for between(), see gpx_lite.temporal.TemporalIndex.
+
+        :return: index of all tracks
+        """
+        from gpx_lite.temporal import TemporalIndex
+
+        return TemporalIndex(self)
+
+    def between(self, start: Any=None, end: Any=None,
+                index: Optional[TemporalIndex]=None)->'GPX':
+        """
+        Points with start <= time < end. Tracks and segments without
+        such points are left out, points are shared with this gpx
+        and columnar segments get memoryviews of its columns.
+
+        :param start: datetime, time string or seconds since epoch, None for no lower bound
+        :param end: datetime, time string or seconds since epoch, None for no upper bound
+        :param index: index built by build_temporal_index(), makes repeated queries
+                      skip tracks outside of the range without looking at their points
+        :return: new gpx with the matching points
+        """
+        from gpx_lite.gpxtrack import GPXTrack
+
+        segments: Dict[int, List[GPXTrackSegment]] = {}
+        if index is not None:
+            for track_index, segment_index, points in index.between(start, end):
+                segments.setdefault(track_index, []).append(
+                    self._tracks[track_index][segment_index]._take(points))
+        else:
+            for track_index, track in enumerate(self._tracks):
+                for seg in track:
+                    segment: GPXTrackSegment = seg.slice_time(start, end)
+                    if len(segment):
+                        segments.setdefault(track_index, []).append(segment)
+        return GPX(self._version, self._creator,
+                   [GPXTrack(self._tracks[i].name, self._tracks[i].number, track_segments)
+                    for i, track_segments in segments.items()])
+
+    def save_binary(self, file: Union[str, IO])->None:
+        """
+        Saves gpx in compact binary format, see gpx_lite.binary.
+        Use gpx_lite.load_binary() to load it.
+
+        :param file: path or binary file handler
+        """
+        from gpx_lite.binary import save_binary
+
+        save_binary(self, file)
+
+    def to_numpy(self)->Tuple[Any, Any, Any, Any, Any]:
+        """
+        Points of all tracks in CSR-like layout, points of segment i
+        are in range segment_offsets[i]:segment_offsets[i + 1],
+        segments of track j are in range track_offsets[j]:track_offsets[j + 1].
+        Track names and numbers are not exported. Requires numpy.
+
+        :return: latitudes, longitudes, epoch times in microseconds,
+                 segment offsets, track offsets
+        """
+        from gpx_lite.utils import columns_to_numpy, import_numpy
+
+        np = import_numpy()
+        track_offsets = np.zeros(len(self._tracks) + 1, dtype=np.int64)
+        np.cumsum([len(track) for track in self._tracks], out=track_offsets[1:])
+        lat, lon, time, segment_offsets = columns_to_numpy(
+            [seg for track in self._tracks for seg in track])
+        return lat, lon, time, segment_offsets, track_offsets
+
+    @classmethod
+    def from_numpy(cls, lat: Any, lon: Any, time: Any, segment_offsets: Any,
+                   track_offsets: Any, version: Optional[str]=None,
+                   creator: Optional[str]=None)->'GPX':
+        """
+        Inverse to to_numpy(). Requires numpy.
+        Segments are GPXColumnarSegment sharing memory with contiguous
+        float64 and int64 input arrays.
+
+        :param lat: latitudes
+        :param lon: longitudes
+        :param time: int64 epoch times in microseconds or datetime64 values
+        :param segment_offsets: segment boundaries, number of segments + 1 values
+        :param track_offsets: track boundaries in segments, number of tracks + 1 values
+        :param version: version of gpx schema
+        :param creator: application that created the data
+        :return: new gpx
+        """
+        from gpx_lite.gpxtrack import GPXTrack
+
+        segments: List[GPXTrackSegment] = GPXTrack.from_numpy(lat, lon, time, segment_offsets).segments
+        offsets: List[int] = [int(i) for i in track_offsets]
+        return cls(version, creator, [GPXTrack(segments=segments[start:end])
+                                      for start, end in zip(offsets, offsets[1:])])
 
 
 if __name__ == '__main__':
 
+    from gpx_lite.gpxtrack import GPXTrack
     from gpx_lite.gpxtrackpoint import GPXTrackPoint as TrackPoint
     from gpx_lite.gpxtracksegment import GPXTrackSegment as TrackSegment
 
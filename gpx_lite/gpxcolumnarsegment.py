@@ -0,0 +1,279 @@
+from array import array
+from sys import getsizeof
+from typing import Union, Optional, List, Dict, Iterator, Iterable, Tuple, Sequence, Any
+
+from gpx_lite.gpxtrackpoint import GPXTrackPoint, point_template
+from gpx_lite.gpxtracksegment import GPXTrackSegment
+from gpx_lite.utils import copy_column, numpy_to_column, encode_times, \
+    new_memory_usage, total_memory_usage, column_memory_usage
+
+
+class GPXColumnarSegment(GPXTrackSegment):
+    """
+    Compact track segment. Points are stored in contiguous columns
+    instead of a list of GPXTrackPoint objects:
+    latitude and longitude as array('d'), time as array('q')
+    of microseconds since epoch (utils.NO_TIME for points without time).
+
+    Points are created on demand, so changing a returned point
+    doesn't change the segment.
+
+    Columns can also be memoryviews of memory shared with numpy arrays,
+    they are copied into own arrays on the first change of the segment.
+
+    Attributes:
+        latitudes: array of latitudes
+        longitudes: array of longitudes
+        times: array of epoch times in microseconds
+    """
+
+    __slots__ = ('_lat', '_lon', '_time', '_shared')
+
+    def __init__(self, points: Optional[Iterable[GPXTrackPoint]]=None):
+        self._lat: Sequence[float] = array('d')
+        self._lon: Sequence[float] = array('d')
+        self._time: Sequence[int] = array('q')
+        self._shared: bool = False
+        if points:
+            self.extend(points)
+
+    @classmethod
+    def from_columns(cls, lat: Sequence[float], lon: Sequence[float],
+                     time: Sequence[int], shared: bool=False)->'GPXColumnarSegment':
+        """
+        Creates segment from columns without copying them.
+
+        :param lat: array('d') of latitudes
+        :param lon: array('d') of longitudes
+        :param time: array('q') of epoch times in microseconds
+        :param shared: columns are used elsewhere and must be copied before change,
+                       always True for columns that are not arrays
+        :return: new segment
+        """
+        if not len(lat) == len(lon) == len(time):
+            raise ValueError('Columns must have the same length, not %s, %s, %s'
+                             % (len(lat), len(lon), len(time)))
+        segment: GPXColumnarSegment = cls()
+        segment._lat = lat
+        segment._lon = lon
+        segment._time = time
+        segment._shared = shared or not isinstance(lat, array) \
+            or not isinstance(lon, array) or not isinstance(time, array)
+        return segment
+
+    @classmethod
+    def from_numpy(cls, lat: Any, lon: Any, time: Any)->'GPXColumnarSegment':
+        """
+        Inverse to to_numpy(). Requires numpy.
+        Contiguous float64 and int64 arrays are used without copying.
+
+        :param lat: latitudes
+        :param lon: longitudes
+        :param time: int64 epoch times in microseconds or datetime64 values
+        :return: new segment
+        """
+        return cls.from_columns(numpy_to_column(lat, 'd'),
+                                numpy_to_column(lon, 'd'),
+                                numpy_to_column(time, 'q'), shared=True)
+
+    def __reduce__(self)->Tuple:
+        return GPXColumnarSegment.from_columns, (copy_column(self._lat, 'd'),
+                                                 copy_column(self._lon, 'd'),
+                                                 copy_column(self._time, 'q'))
+
+    def __repr__(self)-> str:
+        return '<GPXColumnarSegment [..%s points..]>' % len(self._lat)
+
+    def __len__(self)-> int:
+        return len(self._lat)
+
+    def __getitem__(self, key: Union[int, slice])-> \
+            Union[GPXTrackPoint, List[GPXTrackPoint]]:
+        if isinstance(key, int):
+            return GPXTrackPoint(self._lat[key], self._lon[key], self._time[key])
+        elif isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self._lat)))]
+        else:
+            raise TypeError('Index must be int, not {}'.
+                            format(type(key).__name__))
+
+    def __iter__(self)->Iterator[GPXTrackPoint]:
+        for lat, lon, time in zip(self._lat, self._lon, self._time):
+            yield GPXTrackPoint(lat, lon, time)
+
+    def __contains__(self, item: GPXTrackPoint)->bool:
+        return self._index(item) >= 0
+
+    @property
+    def points(self)->List[GPXTrackPoint]:
+        """
+        :return: new list of points, changing it doesn't change the segment
+        """
+        return [pt for pt in self]
+
+    @points.setter
+    def points(self, points: Iterable[GPXTrackPoint]):
+        self._lat = array('d')
+        self._lon = array('d')
+        self._time = array('q')
+        self._shared = False
+        self.extend(points)
+
+    @property
+    def latitudes(self)->Sequence[float]:
+        return self._lat
+
+    @property
+    def longitudes(self)->Sequence[float]:
+        return self._lon
+
+    @property
+    def times(self)->Sequence[int]:
+        return self._time
+
+    def append(self, item: GPXTrackPoint):
+        if self._shared:
+            self._detach()
+        self._lat.append(item._lat)
+        self._lon.append(item._lon)
+        self._time.append(item.epoch)
+
+    def extend(self, items: Iterable[GPXTrackPoint]):
+        for item in items:
+            self.append(item)
+
+    def remove(self, item: GPXTrackPoint):
+        index: int = self._index(item)
+        if index < 0:
+            raise ValueError('GPXColumnarSegment.remove(x): x not in segment')
+        if self._shared:
+            self._detach()
+        del self._lat[index]
+        del self._lon[index]
+        del self._time[index]
+
+    def get_points_no(self)->int:
+        """
+        Gets the number of points in segment.
+        """
+        return len(self._lat)
+
+    def sort_by_time(self)->None:
+        """
+        Chronologically sorts points in segment,
+        points without time go first.
+        :return:
+        """
+        order: List[int] = sorted(range(len(self._time)), key=self._time.__getitem__)
+        self._lat = array('d', [self._lat[i] for i in order])
+        self._lon = array('d', [self._lon[i] for i in order])
+        self._time = array('q', [self._time[i] for i in order])
+        self._shared = False
+
+    def clone(self)->'GPXColumnarSegment':
+        """
+        Copy on write, columns are shared with the segment
+        until the segment or the copy is changed.
+
+        :return: copy of segment
+        """
+        self._shared = True
+        return GPXColumnarSegment.from_columns(self._lat, self._lon, self._time, shared=True)
+
+    def _take(self, points: Sequence[int])->'GPXColumnarSegment':
+        if isinstance(points, range) and points.step == 1:
+            return self._view(points)
+        return GPXColumnarSegment.from_columns(array('d', [self._lat[i] for i in points]),
+                                               array('d', [self._lon[i] for i in points]),
+                                               array('q', [self._time[i] for i in points]))
+
+    def _view(self, points: range)->'GPXColumnarSegment':
+        """
+        Columns of the new segment are memoryviews of the columns of this segment,
+        both segments copy them before change.
+        """
+        self._shared = True
+        return GPXColumnarSegment.from_columns(memoryview(self._lat)[points.start:points.stop],
+                                               memoryview(self._lon)[points.start:points.stop],
+                                               memoryview(self._time)[points.start:points.stop])
+
+    def columns(self)->Tuple[Sequence[float], Sequence[float], Sequence[int]]:
+        """
+        Columns of the segment itself, not a copy.
+        They may be shared with clones, so they must not be changed in place.
+
+        :return: latitudes, longitudes and epoch times in microseconds
+        """
+        return self._lat, self._lon, self._time
+
+    def to_numpy(self)->Tuple[Any, Any, Any]:
+        """
+        Requires numpy. Returned arrays share memory with the segment,
+        until the segment is changed.
+
+        :return: float64 arrays of latitudes and longitudes
+                 and int64 array of epoch times in microseconds
+        """
+        self._shared = True
+        return super().to_numpy()
+
+    def _detach(self)->None:
+        self._lat = copy_column(self._lat, 'd')
+        self._lon = copy_column(self._lon, 'd')
+        self._time = copy_column(self._time, 'q')
+        self._shared = False
+
+    def _index(self, item: GPXTrackPoint)->int:
+        time: int = item.epoch
+        for i, values in enumerate(zip(self._lat, self._lon, self._time)):
+            if values == (item._lat, item._lon, time):
+                return i
+        return -1
+
+    def memory_usage(self, usage: Optional[Dict[str, int]]=None)->Dict[str, int]:
+        """
+        Columns are counted as points, memory of numpy arrays
+        or mapped files viewed by the columns is counted as external.
+
+        :param usage: bytes per category to add to, a new dict with 'total' if None
+        :return: bytes per category
+        """
+        top: bool = usage is None
+        if top:
+            usage = new_memory_usage()
+        usage['segments'] += getsizeof(self)
+        usage['points'] += sum(column_memory_usage(column, usage) for column in self.columns())
+        return total_memory_usage(usage) if top else usage
+
+    def to_xml(self, precision: Optional[int]=None)->str:
+        """
+        Renders the whole segment at once.
+
+        :param precision: number of decimal places of coordinates,
+                          None for the shortest exact representation
+        :return: trkseg element
+        """
+        template: str = point_template(precision)
+        result: List[str] = [template % values for values in
+                             zip(self._lat, self._lon, encode_times(self._time))]
+        result.insert(0, '\n<trkseg>')
+        result.append('\n</trkseg>')
+        return ''.join(result)
+
+
+if __name__ == '__main__':
+
+    x = 50.0164596
+    y = 14.4547907
+    p1 = GPXTrackPoint(x, y, '2017-11-22T07:03:36Z')
+    p2 = GPXTrackPoint(x, x, '2017-12-02T07:03:36.250Z')
+    p3 = GPXTrackPoint(y, y, '2017-11-13T08:11:09Z')
+    seg = GPXColumnarSegment([p1, p2])
+    print('Segment with 2 points: ', seg)
+    seg.append(p3)
+    print('Points: ', seg.points)
+    seg.sort_by_time()
+    print('Sorted: ', seg.points)
+    print('Point in segment: %s' % (p2 in seg))
+    seg.remove(p2)
+    print('Point removed: ', seg[0:])
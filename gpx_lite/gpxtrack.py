@@ -1,8 +1,12 @@
-from typing import Union, Optional, List, Iterator, Iterable, IO
-from copy import deepcopy
+from typing import Union, Optional, List, Dict, Iterator, Iterable, IO, Tuple, Any
+from sys import getsizeof
 
 from gpx_lite.gpxtrackpoint import GPXTrackPoint
 from gpx_lite.gpxtracksegment import GPXTrackSegment
+from gpx_lite.gpxcolumnarsegment import GPXColumnarSegment
+from gpx_lite import geo
+from gpx_lite.utils import columns_to_numpy, numpy_to_column, new_memory_usage, total_memory_usage
+from gpx_lite.writer import track_header, TRACK_FOOTER
 
 
 class GPXTrack:
@@ -106,20 +110,161 @@ class GPXTrack:
         self._segments = [seg for seg in filter(
             lambda seg: len(seg) > 0, self._segments)]
 
+    def to_xml(self, precision: Optional[int]=None)->str:
+        """
+        Renders the whole track at once.
+
+        :param precision: number of decimal places of coordinates,
+                          None for the shortest exact representation
+        :return: trk element
+        """
+        result: List[str] = [track_header(self._name, self._number)]
+        result.extend([seg.to_xml(precision) for seg in self._segments])
+        result.append(TRACK_FOOTER)
+        return ''.join(result)
+
     def _write_to_file(self, fh: IO)->None:
-        result: List[str] = ['\n<trk>', ]
-        if self._name:
-            result.extend(['\n<name>', self._name, '</name>'])
+        fh.write(self.to_xml())
+
+    def clone(self)->'GPXTrack':
+        """
+        Copies the track and its segments, points are shared,
+        see GPXTrackSegment.clone() and GPXColumnarSegment.clone().
+
+        :return: copy of track
+        """
+        return GPXTrack(self._name, self._number, [seg.clone() for seg in self._segments])
+
+    def length_2d(self)->float:
+        """
+        :return: sum of lengths of all segments in metres
+        """
+        return sum(item.length_2d() for item in self._segments)
+
+    def duration(self)->float:
+        """
+        :return: sum of durations of all segments in seconds
+        """
+        return sum(item.duration() for item in self._segments)
+
+    def moving_time(self, stopped_speed: float=geo.STOPPED_SPEED)->float:
+        """
+        :param stopped_speed: steps with lower or equal speed in m/s are not counted
+        :return: sum of moving times of all segments in seconds
+        """
+        return sum(item.moving_time(stopped_speed) for item in self._segments)
+
+    def split_on_gaps(self, max_gap_s: Optional[float]=None,
+                      max_jump_m: Optional[float]=None)->'GPXTrack':
+        """
+        Splits every segment by GPXTrackSegment.split_on_gaps(),
+        points are shared with this track.
+
+        :param max_gap_s: longer steps in seconds start a new segment, None for no limit
+        :param max_jump_m: longer steps in metres start a new segment, None for no limit
+        :return: new track with the split segments
+        """
+        return GPXTrack(self._name, self._number,
+                        [piece for seg in self._segments
+                         for piece in seg.split_on_gaps(max_gap_s, max_jump_m)])
+
+    def detect_stops(self, radius_m: float=geo.STOP_RADIUS,
+                     min_duration_s: float=geo.STOP_DURATION)->List[Tuple[int, range]]:
+        """
+        Finds stops in every segment by GPXTrackSegment.detect_stops().
+
+        :param radius_m: maximal distance from the first point of a stop in metres
+        :param min_duration_s: minimal duration of a stop in seconds
+        :return: segment index and range of indices of points of every stop
+        """
+        return [(segment_index, points) for segment_index, seg in enumerate(self._segments)
+                for points in seg.detect_stops(radius_m, min_duration_s)]
+
+    def resample(self, step_s: float, method: str='linear',
+                 max_gap_s: Optional[float]=None, gaps: str='skip')->'GPXTrack':
+        """
+        Resamples every segment by GPXTrackSegment.resample(),
+        segments without time are left out.
+
+        :param step_s: time step in seconds, positions are at multiples of it since epoch
+        :param method: 'linear' interpolation, 'nearest' point or 'previous' point
+        :param max_gap_s: steps between points longer in seconds are gaps
+        :param gaps: 'skip' for no positions in gaps, 'interpolate' to fill them,
+                     'split' to start a new segment after every gap,
+                     max_gap_s must not be shorter than step_s to split
+        :return: new track with GPXColumnarSegments
+        """
+        if gaps not in geo.GAP_POLICIES:
+            raise ValueError('Unknown gap policy %s, use one of %s'
+                             % (gaps, ', '.join(geo.GAP_POLICIES)))
+        if gaps == 'split' and max_gap_s is not None and max_gap_s < step_s:
+            # every step would be a gap, a segment for every position
+            raise ValueError('Maximal gap %s s is shorter than the step %s s, nothing to split on'
+                             % (max_gap_s, step_s))
+        segments: List[GPXTrackSegment] = []
+        for seg in self._segments:
+            resampled: GPXTrackSegment = seg.resample(step_s, method, max_gap_s,
+                                                      'interpolate' if gaps == 'interpolate' else 'skip')
+            if gaps == 'split' and max_gap_s is not None:
+                # positions around a gap are at least as far apart as the points
+                segments.extend(resampled.split_on_gaps(max_gap_s))
+            elif len(resampled):
+                segments.append(resampled)
+        return GPXTrack(self._name, self._number, segments)
+
+    def memory_usage(self, usage: Optional[Dict[str, int]]=None)->Dict[str, int]:
+        """
+        Estimates bytes held by the track and its segments, see GPX.memory_usage().
+
+        :param usage: bytes per category to add to, a new dict with 'total' if None
+        :return: bytes per category
+        """
+        top: bool = usage is None
+        if top:
+            usage = new_memory_usage()
+        usage['tracks'] += getsizeof(self) + getsizeof(self._segments)
         if self._number is not None:
-            result.extend(['\n<number>', str(self._number), '</number>'])
-        for string in result:
-            fh.write(string)
+            usage['tracks'] += getsizeof(self._number)
+        if self._name is not None:
+            usage['strings'] += getsizeof(self._name)
         for seg in self._segments:
-            seg._write_to_file(fh)
-        fh.write('\n</trk>')
+            seg.memory_usage(usage)
+        return total_memory_usage(usage) if top else usage
 
-    def clone(self)->'GPXTrack':
-        return deepcopy(self)
+    def to_numpy(self)->Tuple[Any, Any, Any, Any]:
+        """
+        Points of all segments in CSR-like layout, points of segment i
+        are in range segment_offsets[i]:segment_offsets[i + 1]. Requires numpy.
+
+        :return: latitudes, longitudes, epoch times in microseconds, segment offsets
+        """
+        return columns_to_numpy(self._segments)
+
+    @classmethod
+    def from_numpy(cls, lat: Any, lon: Any, time: Any, segment_offsets: Any,
+                   name: Optional[str]=None,
+                   number: Optional[int]=None)->'GPXTrack':
+        """
+        Inverse to to_numpy(). Requires numpy.
+        Segments are GPXColumnarSegment sharing memory with contiguous
+        float64 and int64 input arrays.
+
+        :param lat: latitudes
+        :param lon: longitudes
+        :param time: int64 epoch times in microseconds or datetime64 values
+        :param segment_offsets: segment boundaries, number of segments + 1 values
+        :param name: track name
+        :param number: track number
+        :return: new track
+        """
+        lat_column = numpy_to_column(lat, 'd')
+        lon_column = numpy_to_column(lon, 'd')
+        time_column = numpy_to_column(time, 'q')
+        offsets: List[int] = [int(i) for i in segment_offsets]
+        return cls(name, number, [GPXColumnarSegment.from_columns(lat_column[start:end],
+                                                                  lon_column[start:end],
+                                                                  time_column[start:end])
+                                  for start, end in zip(offsets, offsets[1:])])
 
 
 if __name__ == '__main__':
@@ -1,7 +1,24 @@
 from datetime import datetime
-from typing import Callable, List, IO
+from sys import getsizeof
+from typing import List, IO, Optional, Union, Dict
 
-from gpx_lite.utils import parse_time
+from gpx_lite.utils import NO_TIME, time_to_epoch, epoch_to_time, epoch_to_datetime, \
+    new_memory_usage, total_memory_usage
+
+POINT_XML = '\n<trkpt lat="%s" lon="%s">\n<time>%s</time>\n</trkpt>'
+
+
+def point_template(precision: Optional[int]=None)->str:
+    """
+    :param precision: number of decimal places of coordinates,
+                      None for the shortest exact representation
+    :return: %-format template of trkpt element for latitude, longitude and time
+    """
+    if precision is None:
+        return POINT_XML
+    if precision < 0:
+        raise ValueError('Precision must be non-negative, not %s' % precision)
+    return '\n<trkpt lat="%.{0}f" lon="%.{0}f">\n<time>%s</time>\n</trkpt>'.format(int(precision))
 
 
 class GPXTrackPoint:
@@ -12,28 +29,34 @@ class GPXTrackPoint:
         latitude: float
         longitude: float
         time:   datetime
+        epoch:  int, microseconds since epoch, decoded once and cached
 
     """
-    __slots__ = ('_lat', '_lon', '_time')
+    __slots__ = ('_lat', '_lon', '_time', '_epoch')
 
-    def __init__(self, lat: float, lon: float, time: str) -> None:
+    def __init__(self, lat: float, lon: float, time: Optional[Union[str, int]]) -> None:
         """
         :param lat: point latitude
         :param lon: point longitude
-        :param time: time
+        :param time: time as a string, or decoded to microseconds since epoch
         """
         self._lat: float = lat
         self._lon: float = lon
-        self._time: str = time
+        if isinstance(time, int):
+            self._time: Optional[str] = None
+            self._epoch: Optional[int] = time
+        else:
+            self._time = time
+            self._epoch = None if time is not None else NO_TIME
 
     def __eq__(self, other: 'GPXTrackPoint') -> bool:
         if self._lat != other._lat:
             return False
         if self._lon != other._lon:
             return False
-        if self._time != other._time:
-            return False
-        return True
+        if self._time is not None and other._time is not None:
+            return self._time == other._time
+        return self.epoch == other.epoch
 
     def time_difference(self, track_point):
         #code from https://github.com/tkrajina/gpxpy/tree/master/gpxpy
@@ -47,30 +70,20 @@ class GPXTrackPoint:
         time_difference : float
             Time difference returned in seconds
         """
-        if not self.time or not track_point or not track_point.time:
+        if not track_point:
             return None
-
-        time_1 = self.time
-        time_2 = track_point.time
-
-        if time_1 == time_2:
-            return 0
-
-        if time_1 > time_2:
-            delta = time_1 - time_2
-        else:
-            delta = time_2 - time_1
-
-        if delta is None:
+        epoch_1: int = self.epoch
+        epoch_2: int = track_point.epoch
+        if epoch_1 == NO_TIME or epoch_2 == NO_TIME:
             return None
-        return (delta.days * 86400) + delta.seconds
+        return abs(epoch_1 - epoch_2) // 1000000
 
     def __repr__(self) -> str:
         return '<GPXTrackPoint(%f, %f, %s)>' % \
-               (self._lat, self._lon, self._time)
+               (self._lat, self._lon, self.time_string)
 
     def __str__(self) -> str:
-        return 'trkpt:%s %s %s' % (self._lat, self._lon, self._time)
+        return 'trkpt:%s %s %s' % (self._lat, self._lon, self.time_string)
 
     @property
     def latitude(self) -> float:
@@ -81,17 +94,51 @@ class GPXTrackPoint:
         return self._lon
 
     @property
-    def time(self, parser: Callable = parse_time) -> datetime:
-        return parser(self._time)
+    def time(self) -> Optional[datetime]:
+        return epoch_to_datetime(self.epoch)
+
+    @property
+    def epoch(self) -> int:
+        if self._epoch is None:
+            self._epoch = time_to_epoch(self._time)
+        return self._epoch
 
-    def to_xml(self) -> str:
-        return "\n<trkpt lat=\"{}\" lon=\"{}\">\n<time>{}</time>\n</trkpt>".format(self._lat, self._lon, self._time)
+    @property
+    def time_string(self) -> Optional[str]:
+        if self._time is None:
+            return epoch_to_time(self._epoch)
+        return self._time
+
+    def to_xml(self, precision: Optional[int] = None) -> str:
+        """
+        :param precision: number of decimal places of coordinates,
+                          None for the shortest exact representation
+        :return: trkpt element
+        """
+        return point_template(precision) % (self._lat, self._lon, self.time_string)
+
+    def memory_usage(self, usage: Optional[Dict[str, int]]=None)->Dict[str, int]:
+        """
+        Estimates bytes held by the point, see GPX.memory_usage().
+
+        :param usage: bytes per category to add to, a new dict with 'total' if None
+        :return: bytes per category
+        """
+        top: bool = usage is None
+        if top:
+            usage = new_memory_usage()
+        usage['points'] += getsizeof(self) + getsizeof(self._lat) + getsizeof(self._lon)
+        if self._epoch is not None:
+            usage['points'] += getsizeof(self._epoch)
+        if self._time is not None:
+            usage['strings'] += getsizeof(self._time)
+        return total_memory_usage(usage) if top else usage
 
     def to_xml_old(self) -> str:
         print("depricated!")
         return ''.join(['\n<trkpt lat="%f" lon="%f">'
                         % (self._lat, self._lon),
-                        '\n<time>', self._time,
+                        '\n<time>', self.time_string,
                         '</time>\n</trkpt>'])
 
     def _write_to_file(self, fh: IO) -> None:
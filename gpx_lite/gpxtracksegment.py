@@ -1,7 +1,11 @@
-from typing import Union, Optional, List, Iterator, Iterable, IO
-from copy import deepcopy
+from array import array
+from typing import Union, Optional, List, Dict, Iterator, Iterable, IO, Tuple, Sequence, Any
+from sys import getsizeof
+from operator import attrgetter
 
-from gpx_lite.gpxtrackpoint import GPXTrackPoint
+from gpx_lite import geo, temporal
+from gpx_lite.gpxtrackpoint import GPXTrackPoint, point_template
+from gpx_lite.utils import import_numpy, numpy_to_column, new_memory_usage, total_memory_usage
 
 
 class GPXTrackSegment:
@@ -58,24 +62,214 @@ class GPXTrackSegment:
 
     def sort_by_time(self)->None:
         """
-        Chronologically sorts points in segment
+        Chronologically sorts points in segment by decoded epoch time,
+        points without time go first.
         :return:
         """
-        self._points.sort(key=lambda pt: pt._time)
+        self._points.sort(key=attrgetter('epoch'))
 
 
-    def clone(self):
+    def clone(self)->'GPXTrackSegment':
         """
+        Copies the list of points, points are shared with the segment,
+        they can't be changed.
 
-        :return: deepcopy of segment
+        :return: copy of segment
         """
-        return deepcopy(self)
+        return GPXTrackSegment(self._points[:])
 
-    def _write_to_file(self, fh:IO)->None:
-        fh.write('\n<trkseg>')
+    def slice_time(self, start: temporal.TimeValue=None,
+                   end: temporal.TimeValue=None)->'GPXTrackSegment':
+        """
+        Points with start <= time < end, found by binary search
+        if the segment is sorted by time. Points are shared with this segment.
+
+        :param start: datetime, time string or seconds since epoch, None for no lower bound
+        :param end: datetime, time string or seconds since epoch, None for no upper bound
+        :return: new segment
+        """
+        t_0, t_1 = temporal.time_bounds(start, end)
+        return self._take(temporal.select(self.columns()[2], t_0, t_1))
+
+    def _take(self, points: Sequence[int])->'GPXTrackSegment':
+        """
+        :param points: range or list of indices
+        :return: new segment with the given points
+        """
+        if isinstance(points, range) and points.step == 1:
+            return GPXTrackSegment(self._points[points.start:points.stop])
+        return GPXTrackSegment([self._points[i] for i in points])
+
+    def _view(self, points: range)->'GPXTrackSegment':
+        """
+        :param points: range of indices with step 1
+        :return: new segment with the given points, sharing them with this segment
+        """
+        return self._take(points)
+
+    def columns(self)->Tuple[Sequence[float], Sequence[float], Sequence[int]]:
+        """
+        Latitudes, longitudes and times of points as contiguous columns.
+
+        :return: array('d') of latitudes, array('d') of longitudes
+                 and array('q') of epoch times in microseconds
+        """
+        return (array('d', [pt._lat for pt in self._points]),
+                array('d', [pt._lon for pt in self._points]),
+                array('q', [pt.epoch for pt in self._points]))
+
+    def to_numpy(self)->Tuple[Any, Any, Any]:
+        """
+        Requires numpy.
+
+        :return: float64 arrays of latitudes and longitudes
+                 and int64 array of epoch times in microseconds,
+                 utils.NO_TIME (NaT in datetime64[us] view) for points without time
+        """
+        np = import_numpy()
+        lat, lon, time = self.columns()
+        return (np.frombuffer(lat, dtype=np.float64),
+                np.frombuffer(lon, dtype=np.float64),
+                np.frombuffer(time, dtype=np.int64))
+
+    @classmethod
+    def from_numpy(cls, lat: Any, lon: Any, time: Any)->'GPXTrackSegment':
+        """
+        Inverse to to_numpy(). Requires numpy.
+
+        :param lat: latitudes
+        :param lon: longitudes
+        :param time: int64 epoch times in microseconds or datetime64 values
+        :return: new segment
+        """
+        lat_column = numpy_to_column(lat, 'd')
+        lon_column = numpy_to_column(lon, 'd')
+        time_column = numpy_to_column(time, 'q')
+        return cls([GPXTrackPoint(values[0], values[1], values[2])
+                    for values in zip(lat_column, lon_column, time_column)])
+
+    def length_2d(self)->float:
+        """
+        :return: length in metres
+        """
+        lat, lon, _ = self.columns()
+        return geo.length_2d(lat, lon)
+
+    def distances(self)->array:
+        """
+        :return: array('d') of distances between consecutive points in metres
+        """
+        lat, lon, _ = self.columns()
+        return geo.distances(lat, lon)
+
+    def speeds(self)->array:
+        """
+        :return: array('d') of speeds between consecutive points in m/s,
+                 nan if time difference is not positive
+        """
+        return geo.speeds(*self.columns())
+
+    def bearings(self)->array:
+        """
+        :return: array('d') of bearings from every point to the next one in degrees
+        """
+        lat, lon, _ = self.columns()
+        return geo.bearings(lat, lon)
+
+    def duration(self)->float:
+        """
+        :return: seconds between the earliest and the latest point
+        """
+        return geo.duration(self.columns()[2])
+
+    def moving_time(self, stopped_speed: float=geo.STOPPED_SPEED)->float:
+        """
+        :param stopped_speed: steps with lower or equal speed in m/s are not counted
+        :return: seconds spent moving
+        """
+        return geo.moving_time(*self.columns(), stopped_speed=stopped_speed)
+
+    def split_on_gaps(self, max_gap_s: Optional[float]=None,
+                      max_jump_m: Optional[float]=None)->List['GPXTrackSegment']:
+        """
+        Splits the segment where the time step or the distance between consecutive
+        points is too large, e.g. a whole day of a logger in one segment.
+        Points are shared with this segment, not copied.
+
+        :param max_gap_s: longer steps in seconds start a new segment, None for no limit
+        :param max_jump_m: longer steps in metres start a new segment, None for no limit
+        :return: new segments, no segment for an empty segment
+        """
+        return [self._view(points) for points in geo.gap_ranges(*self.columns(),
+                                                                max_gap_s=max_gap_s,
+                                                                max_jump_m=max_jump_m)]
+
+    def detect_stops(self, radius_m: float=geo.STOP_RADIUS,
+                     min_duration_s: float=geo.STOP_DURATION)->List[range]:
+        """
+        Finds stops, points staying within radius_m of the first point of the stop
+        for at least min_duration_s. Points must be sorted by time.
+
+        :param radius_m: maximal distance from the first point of a stop in metres
+        :param min_duration_s: minimal duration of a stop in seconds
+        :return: ranges of indices of points of the stops, segment[r.start:r.stop]
+                 are the points of stop r
+        """
+        return geo.stop_ranges(*self.columns(), radius_m=radius_m,
+                               min_duration_s=min_duration_s)
+
+    def resample(self, step_s: float, method: str='linear',
+                 max_gap_s: Optional[float]=None, gaps: str='skip')->'GPXTrackSegment':
+        """
+        Positions at a fixed time step, interpolated in bulk over the time column,
+        see geo.resample(). Points without time are left out.
+
+        :param step_s: time step in seconds, positions are at multiples of it since epoch
+        :param method: 'linear' interpolation, 'nearest' point or 'previous' point
+        :param max_gap_s: steps between points longer in seconds are gaps
+        :param gaps: 'skip' for no positions in gaps, 'interpolate' to fill them
+        :return: new GPXColumnarSegment
+        """
+        from gpx_lite.gpxcolumnarsegment import GPXColumnarSegment
+
+        if gaps not in geo.GAP_POLICIES[:2]:
+            raise ValueError('Unknown gap policy %s, use one of %s'
+                             % (gaps, ', '.join(geo.GAP_POLICIES[:2])))
+        return GPXColumnarSegment.from_columns(*geo.resample(
+            *self.columns(), step_s=step_s, method=method,
+            max_gap_s=max_gap_s if gaps == 'skip' else None))
+
+    def memory_usage(self, usage: Optional[Dict[str, int]]=None)->Dict[str, int]:
+        """
+        Estimates bytes held by the segment and its points, see GPX.memory_usage().
+
+        :param usage: bytes per category to add to, a new dict with 'total' if None
+        :return: bytes per category
+        """
+        top: bool = usage is None
+        if top:
+            usage = new_memory_usage()
+        usage['segments'] += getsizeof(self) + getsizeof(self._points)
         for pt in self._points:
-            pt._write_to_file(fh)
-        fh.write('\n</trkseg>')
+            pt.memory_usage(usage)
+        return total_memory_usage(usage) if top else usage
+
+    def to_xml(self, precision: Optional[int]=None)->str:
+        """
+        Renders the whole segment at once.
+
+        :param precision: number of decimal places of coordinates,
+                          None for the shortest exact representation
+        :return: trkseg element
+        """
+        template: str = point_template(precision)
+        result: List[str] = [template % (pt._lat, pt._lon, pt.time_string) for pt in self._points]
+        result.insert(0, '\n<trkseg>')
+        result.append('\n</trkseg>')
+        return ''.join(result)
+
+    def _write_to_file(self, fh:IO)->None:
+        fh.write(self.to_xml())
 
 
 
@@ -102,3 +296,6 @@ if __name__ == '__main__':
     for p in seg:
         print(p)
 
+    print('Split on gaps over a day: ', seg.split_on_gaps(max_gap_s=24 * 3600))
+    print('Stops: ', seg.detect_stops())
+    print('Resampled to days: ', seg.resample(24 * 3600, max_gap_s=30 * 24 * 3600))
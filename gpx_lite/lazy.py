@@ -0,0 +1,227 @@
+"""
+Random access to tracks of large gpx files.
+
+Index file layout (name.gpxi next to the gpx), all numbers little-endian:
+    header: magic b'GPXI', format version (uint16), flags (uint16),
+            size and mtime in ns of the gpx (int64),
+            number of tracks, size of gpx header (int64)
+    gpx header: bytes of the gpx up to the end of the root start tag,
+                padded with spaces to a multiple of 8 bytes
+    track starts: int64 * tracks, offsets of <trk> tags
+    track ends: int64 * tracks, offsets just after </trk> tags
+"""
+import mmap
+import sys
+from array import array
+from collections import OrderedDict
+from io import BytesIO
+from os import stat, replace, path as os_path
+from struct import Struct
+from typing import List, Tuple, Union, Iterator, Optional, Any
+
+from gpx_lite.gpxtrack import GPXTrack
+from gpx_lite.gpx import GPX
+from gpx_lite.scanner import scan_tracks, root_tag, root_attributes
+
+MAGIC = b'GPXI'
+FORMAT_VERSION = 1
+INDEX_EXTENSION = '.gpxi'
+_HEADER = Struct('<4sHHqqqq')
+
+
+def index_path(path: str)->str:
+    """
+    :param path: path to gpx file
+    :return: path to its track index file
+    """
+    return os_path.splitext(path)[0] + INDEX_EXTENSION
+
+
+def _read_index(path: str, source_stat: Tuple[int, int])->Optional[Tuple[bytes, array, array]]:
+    try:
+        with open(path, 'rb') as fh:
+            header: bytes = fh.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, version, _, size, mtime, n_tracks, header_size = _HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION or (size, mtime) != source_stat:
+                return None
+            gpx_header: bytes = fh.read(header_size + -header_size % 8)[:header_size]
+            columns: List[array] = []
+            for _ in range(2):
+                column: array = array('q')
+                column.frombytes(fh.read(n_tracks * 8))
+                if sys.byteorder != 'little':
+                    column.byteswap()
+                columns.append(column)
+    except (OSError, ValueError):
+        return None
+    if len(columns[1]) != n_tracks:
+        return None
+    return gpx_header, columns[0], columns[1]
+
+
+def _write_index(path: str, source_stat: Tuple[int, int], gpx_header: bytes,
+                 starts: array, ends: array)->None:
+    with open(path + '.tmp', 'wb') as fh:
+        fh.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, source_stat[0], source_stat[1],
+                              len(starts), len(gpx_header)))
+        fh.write(gpx_header + b' ' * (-len(gpx_header) % 8))
+        for column in (starts, ends):
+            if sys.byteorder != 'little':
+                column = array('q', column)
+                column.byteswap()
+            fh.write(column.tobytes())
+    replace(path + '.tmp', path)
+
+
+class LazyGPX:
+    """
+    Gpx file opened for random access to its tracks. Byte ranges of tracks
+    are found by a byte level scan on the first open and saved into index
+    file name.gpxi next to the gpx, that is reused while size and mtime
+    of the gpx are unchanged. The gpx is memory-mapped, only requested
+    tracks are parsed and recently used ones are kept in LRU cache.
+
+    Usage:
+
+        with LazyGPX('traces.gpx', cache_size=64) as gpx:
+            track = gpx[12345]
+            for track in gpx[100:200]:
+                ...
+
+    Attributes:
+        version: version of gpx schema
+        creator: application that created the gpx
+    """
+
+    __slots__ = ('_path', '_columnar', '_epoch_time', '_cache_size', '_cache',
+                 '_header', '_footer', '_starts', '_ends', '_file', '_data', '_version', '_creator')
+
+    def __init__(self, path: str, columnar: bool=False, epoch_time: bool=False,
+                 cache_size: int=128, index: bool=True)->None:
+        """
+        :param path: path to gpx file
+        :param columnar: load segments as compact GPXColumnarSegment
+        :param epoch_time: store decoded epoch time in points instead of strings
+        :param cache_size: maximal number of parsed tracks kept in memory
+        :param index: use and update the index file
+        """
+        self._path: str = path
+        self._columnar: bool = columnar
+        self._epoch_time: bool = epoch_time
+        self._cache_size: int = cache_size
+        self._cache: 'OrderedDict[int, GPXTrack]' = OrderedDict()
+        self._file = open(path, 'rb')
+        source = stat(self._file.fileno())
+        source_stat: Tuple[int, int] = (source.st_size, source.st_mtime_ns)
+        self._data: Any = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if source.st_size else b''
+        stored: Optional[Tuple[bytes, array, array]] = _read_index(index_path(path), source_stat) \
+            if index else None
+        if stored is not None:
+            self._header, self._starts, self._ends = stored
+        else:
+            header_end, _ = root_tag(self._data)
+            self._header: bytes = self._data[:header_end]
+            self._starts, self._ends = scan_tracks(self._data, header_end)
+            if index:
+                try:
+                    _write_index(index_path(path), source_stat, self._header, self._starts, self._ends)
+                except OSError:
+                    pass
+        root: bytes = root_tag(self._header)[1]
+        self._footer: bytes = b'</' + root + b'>'
+        self._version, self._creator = root_attributes(self._header, root)
+
+    def __enter__(self)->'LazyGPX':
+        return self
+
+    def __exit__(self, *args)->None:
+        self.close()
+
+    def close(self)->None:
+        """
+        Closes the memory-mapped file, cached tracks stay usable.
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+        self._cache.clear()
+
+    def __repr__(self)->str:
+        return '<LazyGPX %s [..%s tracks, %s cached..]>' % (self._path, len(self._starts), len(self._cache))
+
+    def __len__(self)->int:
+        return len(self._starts)
+
+    def __getitem__(self, key: Union[int, slice])->Union[GPXTrack, List[GPXTrack]]:
+        if isinstance(key, int):
+            if key < 0:
+                key += len(self._starts)
+            if not 0 <= key < len(self._starts):
+                raise IndexError('Track index out of range')
+            return self._track(key)
+        elif isinstance(key, slice):
+            return [self._track(i) for i in range(*key.indices(len(self._starts)))]
+        else:
+            raise TypeError('Index must be int, not {}'.
+                            format(type(key).__name__))
+
+    def __iter__(self)->Iterator[GPXTrack]:
+        for i in range(len(self._starts)):
+            yield self._track(i)
+
+    @property
+    def version(self)->Optional[str]:
+        return self._version
+
+    @property
+    def creator(self)->Optional[str]:
+        return self._creator
+
+    def byte_range(self, index: int)->Tuple[int, int]:
+        """
+        :param index: track index
+        :return: offsets of the <trk> tag and just after the </trk> tag
+        """
+        return self._starts[index], self._ends[index]
+
+    def _track(self, index: int)->GPXTrack:
+        track: Optional[GPXTrack] = self._cache.get(index)
+        if track is not None:
+            self._cache.move_to_end(index)
+            return track
+        from gpx_lite.parser import GPXParser
+
+        data: bytes = b''.join([self._header, self._data[self._starts[index]:self._ends[index]], self._footer])
+        track = next(GPXParser(BytesIO(data), self._columnar, self._epoch_time).stream())
+        self._cache[index] = track
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return track
+
+    def to_gpx(self)->GPX:
+        """
+        :return: gpx with all tracks loaded
+        """
+        return GPX(self._version, self._creator, list(self))
+
+
+if __name__ == '__main__':
+    from tempfile import TemporaryDirectory
+
+    with TemporaryDirectory() as tmp:
+        fn = os_path.join(tmp, 'lazy.gpx')
+        with open(fn, 'w') as out:
+            out.write('<?xml version="1.0"?>\n<gpx version="1.1" creator="lazy">'
+                      + ''.join('\n<trk><name>%d</name><trkseg><trkpt lat="50.0" lon="14.0">'
+                                '<time>2017-11-22T07:03:3%dZ</time></trkpt></trkseg></trk>' % (i, i)
+                                for i in range(5))
+                      + '\n</gpx>')
+        with LazyGPX(fn, cache_size=2) as lazy_gpx:
+            print(lazy_gpx, lazy_gpx.version, lazy_gpx.creator)
+            print('Track 3: ', lazy_gpx[3], lazy_gpx[3][0][0])
+            print('Last two: ', lazy_gpx[-2:])
+            print(lazy_gpx)
+        print('Index file: ', os_path.exists(index_path(fn)))
@@ -0,0 +1,180 @@
+import json
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from os import remove, cpu_count, path as os_path
+from shutil import copyfileobj
+from typing import List, Tuple, Optional, Callable, Iterable, TypeVar
+
+from gpx_lite.compression import compression_from_name, open_output
+from gpx_lite.filters import FilterSpec
+from gpx_lite.gpx import GPX
+from gpx_lite.gpxtrack import GPXTrack
+from gpx_lite.scanner import scan_tracks, root_tag, root_attributes
+from gpx_lite.writer import ChunkedWriter, gpx_header, GPX_FOOTER
+
+MB = 1000 * 1000
+
+_Task = Tuple[str, int, int, bytes, bytes, bool, bool, Optional[FilterSpec]]
+_WriteTask = Tuple[List[GPXTrack], str, Optional[str], Optional[int]]
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def _map(func: Callable[[T], R], tasks: List[T], workers: Optional[int])->Iterable[R]:
+    if workers == 1 or len(tasks) < 2:
+        return map(func, tasks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, tasks))
+
+
+def _parse_range(task: _Task)->List[GPXTrack]:
+    from gpx_lite.parser import GPXParser
+
+    path, start, end, header, footer, columnar, epoch_time, filters = task
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        data: bytes = fh.read(end - start)
+    parser = GPXParser(BytesIO(b''.join([header, data, footer])), columnar, epoch_time, filters)
+    return [track for track in parser.stream()]
+
+
+def _tasks(path: str, chunk_size: int, columnar: bool, epoch_time: bool,
+           filters: Optional[FilterSpec])->Tuple[Optional[str], Optional[str], List[_Task]]:
+    with open(path, 'rb') as fh:
+        data: mmap.mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        header_end, root = root_tag(data)
+        header: bytes = data[:header_end]
+        starts, ends = scan_tracks(data, header_end)
+    finally:
+        data.close()
+    footer: bytes = b'</' + root + b'>'
+    version, creator = root_attributes(header, root)
+    tasks: List[_Task] = []
+    first: int = 0
+    for i in range(len(starts)):
+        if ends[i] - starts[first] >= chunk_size or i == len(starts) - 1:
+            tasks.append((path, starts[first], ends[i], header, footer, columnar, epoch_time, filters))
+            first = i + 1
+    return version, creator, tasks
+
+
+def parse_parallel(path: str, workers: Optional[int]=None,
+                   columnar: bool=False, epoch_time: bool=False,
+                   filters: Optional[FilterSpec]=None, chunk_size: int=32 * MB)->GPX:
+    """
+    Parses one large gpx file on several cores. The file is scanned
+    for <trk> byte offsets, consecutive tracks are grouped into chunks
+    of about chunk_size bytes, chunks are parsed by GPXParser.stream()
+    in a process pool and tracks are merged in their original order.
+    The result is the same as of GPXParser.iterparse(), chunks start at tracks
+    and nothing is read outside of tracks, e.g. from <metadata>, so chunks
+    don't depend on each other, see gpx_lite.benchmark.consistency.
+
+    :param path: path to gpx file
+    :param workers: number of processes, os.cpu_count() by default
+    :param columnar: load segments as compact GPXColumnarSegment
+    :param epoch_time: store decoded epoch time in points instead of strings
+    :param filters: filters applied while reading, predicates must be picklable
+    :param chunk_size: approximate number of bytes parsed by one task
+    :return: gpx with loaded data
+    """
+    version, creator, tasks = _tasks(path, chunk_size, columnar, epoch_time, filters)
+    gpx: GPX = GPX(version, creator)
+    for tracks in _map(_parse_range, tasks, workers):
+        gpx.extend(tracks)
+    return gpx
+
+
+def _write_range(task: _WriteTask)->str:
+    tracks, path, header, precision = task
+    # binary, so newlines are not translated, compressed by the extension of path
+    with open_output(path) as fh:
+        writer: ChunkedWriter = ChunkedWriter(fh)
+        if header is not None:
+            writer.write(header)
+        for track in tracks:
+            writer.write(track.to_xml(precision))
+        if header is not None:
+            writer.write(GPX_FOOTER)
+        writer.flush()
+    return path
+
+
+def _split(gpx: GPX, parts: int)->List[Tuple[int, int]]:
+    """
+    Splits tracks into contiguous ranges with about the same number of points.
+    """
+    sizes: List[int] = [track.get_points_no() + 1 for track in gpx]
+    total: int = sum(sizes)
+    ranges: List[Tuple[int, int]] = []
+    start: int = 0
+    done: int = 0
+    for i, size in enumerate(sizes):
+        done += size
+        if done * parts >= total * (len(ranges) + 1) or i == len(sizes) - 1:
+            ranges.append((start, i + 1))
+            start = i + 1
+    return ranges
+
+
+def write_parallel(gpx: GPX, path: str, workers: Optional[int]=None,
+                   shards: Optional[int]=None, precision: Optional[int]=None)->List[str]:
+    """
+    Saves gpx as xml using several processes.
+
+    Without shards, ranges of tracks are rendered into temporary files
+    path.partNNNNN in parallel, then they are joined after the gpx header
+    into a single file with the same bytes as the output of GPX.write_to_file().
+    Paths ending with .gz, .bz2 or .xz are compressed while joining.
+
+    With shards=N, N independent valid gpx files path_stem.NNNNN.gpx are written,
+    together with path_stem.manifest.json listing the range of tracks
+    [first_track, end_track) in each shard. Shards of a compressed path
+    are compressed in the workers and keep its extension, path_stem.NNNNN.gpx.gz.
+
+    :param gpx: gpx to save
+    :param path: path to the output file
+    :param workers: number of processes, os.cpu_count() by default
+    :param shards: number of shard files, None for a single file
+    :param precision: number of decimal places of coordinates,
+                      None for the shortest exact representation
+    :return: paths of written gpx files, manifest is not included
+    """
+    header: str = gpx_header(gpx.version, gpx.creator)
+    if shards is not None:
+        stem: str = path
+        suffix: str = ''
+        if compression_from_name(path) is not None:
+            stem, suffix = os_path.splitext(path)
+        stem = os_path.splitext(stem)[0]
+        ranges: List[Tuple[int, int]] = _split(gpx, shards)
+        tasks: List[_WriteTask] = [(gpx[start:end], '%s.%05d.gpx%s' % (stem, i, suffix), header, precision)
+                                   for i, (start, end) in enumerate(ranges)]
+        paths: List[str] = list(_map(_write_range, tasks, workers))
+        manifest = {'version': gpx.version,
+                    'creator': gpx.creator,
+                    'tracks': len(gpx),
+                    'shards': [{'path': os_path.basename(shard), 'first_track': start, 'end_track': end}
+                               for shard, (start, end) in zip(paths, ranges)]}
+        with open(stem + '.manifest.json', 'w') as fh:
+            json.dump(manifest, fh, indent=2)
+        return paths
+    ranges = _split(gpx, 4 * (workers or cpu_count() or 1))
+    tasks = [(gpx[start:end], '%s.part%05d' % (path, i), None, precision)
+             for i, (start, end) in enumerate(ranges)]
+    parts: List[str] = []
+    try:
+        parts = list(_map(_write_range, tasks, workers))
+        with open_output(path) as fh:
+            fh.write(header.encode('utf-8'))
+            for part in parts:
+                with open(part, 'rb') as part_fh:
+                    copyfileobj(part_fh, fh, 1024 * 1024)
+            fh.write(GPX_FOOTER.encode('utf-8'))
+    finally:
+        for _, part, _, _ in tasks:
+            if os_path.exists(part):
+                remove(part)
+    return [path]
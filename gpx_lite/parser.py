@@ -1,15 +1,20 @@
-from typing import IO, Callable, List, Dict
-from xml.etree.ElementTree import ElementTree, iterparse
-from os import fstat
-from tqdm import tqdm
+from array import array
+from typing import IO, Callable, List, Dict, Iterator, Optional, Union
+from xml.etree.ElementTree import ElementTree, Element, ParseError, iterparse
+from xml.parsers.expat import ParserCreate, ExpatError
 
-from gpx_lite.gpx import GPX, GPXTrack
+from gpx_lite.gpx import GPX
+from gpx_lite.gpxtrack import GPXTrack
 from gpx_lite.gpxtrackpoint import GPXTrackPoint
 from gpx_lite.gpxtracksegment import GPXTrackSegment
-from gpx_lite.utils import parse_xml
-
-
+from gpx_lite.gpxcolumnarsegment import GPXColumnarSegment
+from gpx_lite.filters import FilterSpec
+from gpx_lite.progress import ProgressObserver, ProgressStats
+from gpx_lite.compression import open_input
+from gpx_lite.utils import parse_xml, time_to_epoch, decode_times
 
+ENGINES = ('etree', 'expat')
+EXPAT_BUFFER_SIZE = 1 << 20  # bytes fed to expat at once
 
 
 class GPXParser:
@@ -17,7 +22,20 @@ class GPXParser:
     Parser for gpx tracks.
 
     Args:
-       file:  file handler
+       file:  path or file handler, gzip, bzip2 and xz compressed input is detected
+              and decompressed while reading, see gpx_lite.compression
+       columnar: if True, segments are loaded as compact GPXColumnarSegment
+       epoch_time: if True, points store time decoded to microseconds since epoch
+                   instead of the raw string
+       filters: FilterSpec applied while reading, rejected points and tracks
+                are skipped without creating objects for them
+       progress: ProgressObserver notified about bytes, elements, points
+                 and tracks read, see gpx_lite.progress
+       engine: 'etree' reads with xml.etree.ElementTree,
+               'expat' reads with xml.parsers.expat callbacks without building elements,
+               only trk, name, number, trkseg, trkpt and time elements in their
+               exact places and in the namespace of the root element are read
+       read_ahead: read and decompress the file on a background thread
 
     Usage:
 
@@ -30,84 +48,452 @@ class GPXParser:
 
     """
 
-    __slots__ = ('_gpx', '_source')
+    __slots__ = ('_gpx', '_source', '_columnar', '_epoch_time', '_filters', '_progress', '_engine',
+                 '_read_ahead')
 
-    def __init__(self, file: IO)->None:
-        self._source: IO = file
+    def __init__(self, file: Union[str, IO], columnar: bool=False, epoch_time: bool=False,
+                 filters: Optional[FilterSpec]=None,
+                 progress: Optional[ProgressObserver]=None, engine: str='etree',
+                 read_ahead: bool=False)->None:
+        if engine not in ENGINES:
+            raise ValueError('Unknown engine %s, use one of %s' % (engine, ', '.join(ENGINES)))
+        self._source: Union[str, IO] = file
         self._gpx: GPX = GPX()
+        self._columnar: bool = columnar
+        self._epoch_time: bool = epoch_time
+        self._filters: Optional[FilterSpec] = filters
+        self._progress: Optional[ProgressObserver] = progress
+        self._engine: str = engine
+        self._read_ahead: bool = read_ahead
 
     def parse(self, xml_parser: Callable = parse_xml)->GPX:
         """
         Parser for relatively small gpx files.
         By default uses xml.etree.ElementTree.fromstring() method
         inside helper function, that also removes namespace from the root tag.
+        With the expat engine the file is read incrementally as by iterparse().
 
-        :param xml_parser: function returning ElementTree with tags that don't contain namespace
+        :param xml_parser: function returning ElementTree with tags that don't contain namespace,
+                           not used by the expat engine
         :return: gpx with loaded data
         """
-        xml: ElementTree = xml_parser(self._source.read())
+        if self._engine == 'expat':
+            return self.iterparse()
+        observer: Optional[ProgressObserver] = self._progress
+        stats: Optional[ProgressStats] = ProgressStats('parse') if observer is not None else None
+        with open_input(self._source, stats, self._read_ahead) as source:
+            if observer is not None:
+                observer.start(stats)
+            xml: ElementTree = xml_parser(source.read())
+        root: Element = xml.getroot() if isinstance(xml, ElementTree) else xml
+        self._gpx.version = root.get('version')
+        self._gpx.creator = root.get('creator')
+        filters: Optional[FilterSpec] = self._filters
         for trk in xml.iterfind('trk'):
+                name: Optional[Element] = trk.find('name')
+                number: Optional[Element] = trk.find('number')
+                if filters is not None and not filters.accept_track(
+                        name.text if name is not None else None,
+                        number.text if number is not None else None):
+                    continue
                 new_track: GPXTrack = GPXTrack()
-                try:
-                    new_track.name = trk.find('name').text
-                except AttributeError:
-                    pass
-                try:
-                    new_track.number = trk.find('number').text
-                except AttributeError:
-                    pass
+                if name is not None:
+                    new_track.name = name.text
+                if number is not None:
+                    new_track.number = number.text
                 for seg in trk.iterfind('trkseg'):
-                    new_segment: GPXTrackSegment = GPXTrackSegment()
-                    for point in seg.iterfind('trkpt'):
-                        values: Dict[str, str] = point.attrib
-                        try:
-                            point.attrib['time'] = point.find('time').text
-                        except AttributeError:
-                            point.attrib['time'] = None
-                        new_point = GPXTrackPoint(float(values['lat']),
-                                                  float(values['lon']),
-                                                  values['time'])
-                        new_segment.append(new_point)
-                    new_track.append(new_segment)
-                self._gpx.append(new_track)
+                    if self._columnar:
+                        new_segment: GPXTrackSegment = self._parse_columns(seg)
+                    else:
+                        new_segment = self._parse_points(seg)
+                    if filters is None or len(new_segment) >= filters.min_segment_points:
+                        new_track.append(new_segment)
+                if filters is None or new_track.get_points_no() >= filters.min_track_points:
+                    self._gpx.append(new_track)
+                if stats is not None:
+                    stats.tracks += 1
+                    stats.points += new_track.get_points_no()
+        if stats is not None:
+            stats.finish()
+            observer.finish(stats)
         return self._gpx
 
+    def _parse_points(self, seg: Element)->GPXTrackSegment:
+        filters: Optional[FilterSpec] = self._filters
+        filter_points: bool = filters is not None and filters.filters_points
+        new_segment: GPXTrackSegment = GPXTrackSegment()
+        for point in seg.iterfind('trkpt'):
+            values: Dict[str, str] = point.attrib
+            try:
+                point.attrib['time'] = point.find('time').text
+            except AttributeError:
+                point.attrib['time'] = None
+            lat: float = float(values['lat'])
+            lon: float = float(values['lon'])
+            if filter_points and not filters.accept_point(lat, lon, values['time']):
+                continue
+            new_point = GPXTrackPoint(lat, lon,
+                                      time_to_epoch(values['time']) if self._epoch_time
+                                      else values['time'])
+            new_segment.append(new_point)
+        return new_segment
+
+    def _parse_columns(self, seg: Element)->GPXColumnarSegment:
+        filters: Optional[FilterSpec] = self._filters
+        filter_points: bool = filters is not None and filters.filters_points
+        lats: array = array('d')
+        lons: array = array('d')
+        times: List[Optional[str]] = []
+        for point in seg.iterfind('trkpt'):
+            lat: float = float(point.attrib['lat'])
+            lon: float = float(point.attrib['lon'])
+            time: Optional[Element] = point.find('time')
+            text: Optional[str] = time.text if time is not None else None
+            if filter_points and not filters.accept_point(lat, lon, text):
+                continue
+            lats.append(lat)
+            lons.append(lon)
+            times.append(text)
+        return GPXColumnarSegment.from_columns(lats, lons, decode_times(times))
+
     def iterparse(self)->GPX:
         """
-        Incremental reading for large gpx files using xml.etree.ElementTree.iterparse().
+        Incremental reading for large gpx files using xml.etree.ElementTree.iterparse()
+        or expat, depending on the engine.
         Loads data from filehandler to gpx object.
 
         :return: gpx with loaded data
         """
+        self._gpx.tracks = [track for track in self._tracks()]
+        return self._gpx
+
+    def stream(self)->Iterator[GPXTrack]:
+        """
+        Streaming reading for gpx files that don't fit into memory.
+        Yields every track as soon as its closing tag is read,
+        processed elements are removed from the tree, so memory used
+        is bounded by the largest track, not by the whole file.
+        Version and creator are stored in gpx attribute of the parser.
+
+        Usage:
+
+            with open(filename, 'r') as gpx_file:
+                for track in GPXParser(gpx_file).stream():
+                    ...
+
+        :return: iterator over tracks in the order they appear in file
+        """
+        return self._tracks()
+
+    def _tracks(self)->Iterator[GPXTrack]:
+        observer: Optional[ProgressObserver] = self._progress
+        stats: Optional[ProgressStats] = ProgressStats('parse') if observer is not None else None
+        with open_input(self._source, stats, self._read_ahead) as source:
+            if observer is not None:
+                observer.start(stats)
+            if self._engine == 'expat':
+                yield from self._iter_tracks_expat(source, stats)
+            else:
+                yield from self._iter_tracks(source, stats)
+        if stats is not None:
+            stats.finish()
+            observer.finish(stats)
+
+    def _iter_tracks(self, source: IO, stats: Optional[ProgressStats])->Iterator[GPXTrack]:
+        columnar: bool = self._columnar
+        epoch_time: bool = self._epoch_time
+        filters: Optional[FilterSpec] = self._filters
+        filter_points: bool = filters is not None and filters.filters_points
+        min_segment_points: int = filters.min_segment_points if filters is not None else 0
+        skip: bool = False
         points: List[GPXTrackPoint] = []
-        segments: List[GPXTrackSegment]= []
-        tracks: List[GPXTrack] = []
-        name: str = ''
-        number: str = ''
-        time: str = ''
-        file_size = fstat(self._source.fileno()).st_size
-        with tqdm(total=file_size, unit_scale=True, unit='b', desc="Loading gpx") as pbar:
-            for _, elem in iterparse(self._source):
-                if 'name' in elem.tag:
+        lats: array = array('d')
+        lons: array = array('d')
+        times: List[Optional[str]] = []
+        segments: List[GPXTrackSegment] = []
+        name: Optional[str] = None
+        number: Optional[str] = None
+        time: Optional[str] = None
+        root: Optional[Element] = None
+        # tags of the root namespace, set by the root element, as in the expat engine
+        trk: str = ''
+        trkseg: str = ''
+        trkpt: str = ''
+        name_tag: str = ''
+        number_tag: str = ''
+        time_tag: str = ''
+        # depth of the current element, root has depth 1
+        depth: int = 0
+        in_trk: bool = False
+        in_seg: bool = False
+        in_point: bool = False
+        observer: Optional[ProgressObserver] = self._progress
+        next_update: int = observer.every if observer is not None else 0
+        for event, elem in iterparse(source, events=('start', 'end')):
+            tag: str = elem.tag
+            if event == 'start':
+                depth += 1
+                if depth == 4:
+                    if in_seg and tag == trkpt:
+                        in_point = True
+                        time = None
+                elif depth == 3:
+                    if in_trk and tag == trkseg:
+                        in_seg = True
+                elif depth == 2:
+                    if tag == trk:
+                        in_trk = True
+                        name = None
+                        number = None
+                        skip = False
+                elif depth == 1:
+                    root = elem
+                    self._gpx.version = elem.get('version')
+                    self._gpx.creator = elem.get('creator')
+                    namespace: str = tag[:tag.rfind('}') + 1]
+                    trk, trkseg, trkpt = namespace + 'trk', namespace + 'trkseg', namespace + 'trkpt'
+                    name_tag, number_tag, time_tag = namespace + 'name', namespace + 'number', namespace + 'time'
+                continue
+            level: int = depth
+            depth -= 1
+            if level == 5:
+                if in_point and tag == time_tag:
+                    time = elem.text
+            elif level == 4:
+                if in_point:
+                    in_point = False
+                    if stats is not None:
+                        stats.points += 1
+                    if skip:
+                        pass
+                    elif filter_points:
+                        lat: float = float(elem.attrib['lat'])
+                        lon: float = float(elem.attrib['lon'])
+                        if not filters.accept_point(lat, lon, time):
+                            pass
+                        elif columnar:
+                            lats.append(lat)
+                            lons.append(lon)
+                            times.append(time)
+                        else:
+                            points.append(GPXTrackPoint(lat, lon, time_to_epoch(time) if epoch_time else time))
+                    elif columnar:
+                        lats.append(float(elem.attrib['lat']))
+                        lons.append(float(elem.attrib['lon']))
+                        times.append(time)
+                    else:
+                        points.append(GPXTrackPoint(float(elem.attrib['lat']),
+                                                    float(elem.attrib['lon']),
+                                                    time_to_epoch(time) if epoch_time else time))
+            elif level == 3:
+                if not in_trk:
+                    pass
+                elif tag == name_tag:
                     name = elem.text
-                elif 'number' in elem.tag:
+                    skip = filters is not None and not filters.accept_name(name)
+                elif tag == number_tag:
                     number = elem.text
-                elif 'time' in elem.tag:
-                    time = elem.text
-                elif 'trkpt' in elem.tag:
-                    points.append(GPXTrackPoint(float(elem.attrib['lat']),
-                                                float(elem.attrib['lon']),
-                                                time))
-                elif 'trkseg' in elem.tag:
-                    segments.append(GPXTrackSegment([p for p in points]))
-                    points.clear()
-                elif 'trk' in elem.tag:
-                    tracks.append(GPXTrack(name, number, [s for s in segments]))
-                    segments.clear()
-                elem.clear()
-                pbar.update(52)
-            self._gpx = GPX(tracks=tracks)
-        return self._gpx
+                elif in_seg:
+                    if columnar:
+                        if len(lats) >= min_segment_points and not skip:
+                            segments.append(GPXColumnarSegment.from_columns(lats, lons, decode_times(times)))
+                        lats, lons, times = array('d'), array('d'), []
+                    else:
+                        if len(points) >= min_segment_points and not skip:
+                            segments.append(GPXTrackSegment(points))
+                        points = []
+                    in_seg = False
+            elif level == 2:
+                if in_trk:
+                    in_trk = False
+                    if stats is not None:
+                        stats.tracks += 1
+                    if filters is None or (not skip and filters.accept_track(name, number)
+                                           and sum(len(seg) for seg in segments) >= filters.min_track_points):
+                        yield GPXTrack(name, number, segments)
+                    segments = []
+                del root[:]
+            elem.clear()
+            if stats is not None:
+                stats.elements += 1
+                if stats.elements >= next_update:
+                    observer.update(stats)
+                    next_update += observer.every
+
+    def _iter_tracks_expat(self, source: IO, stats: Optional[ProgressStats])->Iterator[GPXTrack]:
+        feed: Callable[[Union[str, bytes]], List[GPXTrack]] = self._expat_feeder(stats)
+        while True:
+            data: Union[str, bytes] = source.read(EXPAT_BUFFER_SIZE)
+            yield from feed(data)
+            if not data:
+                break
+
+    def _expat_feeder(self, stats: Optional[ProgressStats])->Callable[[Union[str, bytes]], List[GPXTrack]]:
+        """
+        Push interface of the expat engine, xml is given in chunks
+        as they come, e.g. from network by gpx_lite.aio.
+        Version and creator are stored in gpx attribute of the parser.
+
+        :param stats: progress stats counting elements, points and tracks, or None
+        :return: function taking next chunk of xml, bytes or text, empty at the end
+                 of input, and returning tracks finished in the chunk
+        """
+        columnar: bool = self._columnar
+        epoch_time: bool = self._epoch_time
+        filters: Optional[FilterSpec] = self._filters
+        filter_points: bool = filters is not None and filters.filters_points
+        min_segment_points: int = filters.min_segment_points if filters is not None else 0
+        observer: Optional[ProgressObserver] = self._progress
+        next_update: int = observer.every if observer is not None else 0
+        parser = ParserCreate(namespace_separator=' ')
+        parser.buffer_text = True
+        # tags of the root namespace, set by the root element
+        trk: str = ''
+        trkseg: str = ''
+        trkpt: str = ''
+        name_tag: str = ''
+        number_tag: str = ''
+        time_tag: str = ''
+        # depth of the current element, root has depth 1
+        depth: int = 0
+        in_trk: bool = False
+        in_seg: bool = False
+        point: Optional[Dict[str, str]] = None
+        capture: Optional[str] = None
+        text: Optional[str] = None
+        skip: bool = False
+        points: List[GPXTrackPoint] = []
+        lats: array = array('d')
+        lons: array = array('d')
+        times: List[Optional[str]] = []
+        segments: List[GPXTrackSegment] = []
+        name: Optional[str] = None
+        number: Optional[str] = None
+        time: Optional[str] = None
+        finished: List[GPXTrack] = []
+
+        def start(tag: str, attrs: Dict[str, str])->None:
+            nonlocal depth, in_trk, in_seg, point, capture, text, skip, name, number, time
+            nonlocal trk, trkseg, trkpt, name_tag, number_tag, time_tag
+            depth += 1
+            text = None
+            if stats is not None:
+                stats.elements += 1
+            if depth == 4:
+                if in_seg and tag == trkpt:
+                    point = attrs
+                    time = None
+            elif depth == 5:
+                if point is not None and tag == time_tag:
+                    capture = 'time'
+            elif depth == 3:
+                if in_trk:
+                    if tag == trkseg:
+                        in_seg = True
+                    elif tag == name_tag:
+                        capture = 'name'
+                    elif tag == number_tag:
+                        capture = 'number'
+            elif depth == 2:
+                if tag == trk:
+                    in_trk = True
+                    skip = False
+                    name = None
+                    number = None
+            elif depth == 1:
+                self._gpx.version = attrs.get('version')
+                self._gpx.creator = attrs.get('creator')
+                namespace: str = tag[:tag.rfind(' ') + 1]
+                trk, trkseg, trkpt = namespace + 'trk', namespace + 'trkseg', namespace + 'trkpt'
+                name_tag, number_tag, time_tag = namespace + 'name', namespace + 'number', namespace + 'time'
+
+        def characters(data: str)->None:
+            # text of an element may come in several parts at the ends of fed buffers
+            nonlocal text
+            text = data if text is None else text + data
+
+        def end(tag: str)->None:
+            nonlocal depth, in_trk, in_seg, point, capture, skip, name, number, time
+            nonlocal points, lats, lons, times, segments
+            level: int = depth
+            depth -= 1
+            if capture is not None and level == (5 if capture == 'time' else 3):
+                if capture == 'time':
+                    time = text
+                elif capture == 'name':
+                    name = text
+                    skip = filters is not None and not filters.accept_name(name)
+                else:
+                    number = text
+                capture = None
+            elif level == 4:
+                if point is None:
+                    return
+                if stats is not None:
+                    stats.points += 1
+                if skip:
+                    pass
+                elif filter_points:
+                    lat: float = float(point['lat'])
+                    lon: float = float(point['lon'])
+                    if not filters.accept_point(lat, lon, time):
+                        pass
+                    elif columnar:
+                        lats.append(lat)
+                        lons.append(lon)
+                        times.append(time)
+                    else:
+                        points.append(GPXTrackPoint(lat, lon, time_to_epoch(time) if epoch_time else time))
+                elif columnar:
+                    lats.append(float(point['lat']))
+                    lons.append(float(point['lon']))
+                    times.append(time)
+                else:
+                    points.append(GPXTrackPoint(float(point['lat']),
+                                                float(point['lon']),
+                                                time_to_epoch(time) if epoch_time else time))
+                point = None
+            elif level == 3:
+                if not in_seg:
+                    return
+                if columnar:
+                    if len(lats) >= min_segment_points and not skip:
+                        segments.append(GPXColumnarSegment.from_columns(lats, lons, decode_times(times)))
+                    lats, lons, times = array('d'), array('d'), []
+                else:
+                    if len(points) >= min_segment_points and not skip:
+                        segments.append(GPXTrackSegment(points))
+                    points = []
+                in_seg = False
+            elif level == 2:
+                if not in_trk:
+                    return
+                if stats is not None:
+                    stats.tracks += 1
+                if filters is None or (not skip and filters.accept_track(name, number)
+                                       and sum(len(seg) for seg in segments) >= filters.min_track_points):
+                    finished.append(GPXTrack(name, number, segments))
+                segments = []
+                in_trk = False
+
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = characters
+
+        def feed(data: Union[str, bytes])->List[GPXTrack]:
+            nonlocal finished, next_update
+            try:
+                parser.Parse(data, not data)
+            except ExpatError as error:
+                raise ParseError(str(error)) from error
+            tracks: List[GPXTrack] = finished
+            finished = []
+            if stats is not None and data and stats.elements >= next_update:
+                observer.update(stats)
+                next_update = (stats.elements // observer.every + 1) * observer.every
+            return tracks
+
+        return feed
 
 
 if __name__ == '__main__':
@@ -0,0 +1,226 @@
+"""
+Progress and metrics hooks of parsing and writing.
+
+Parsers and writers take an optional ProgressObserver, they call its
+start() at the beginning of a phase, update() every observer.every
+counted items and finish() at the end, always with the ProgressStats
+of the phase. Without observer nothing is counted.
+
+Phases:
+    'parse': items are xml elements, done and total are bytes read
+    'write': items are points, done and total are tracks written
+"""
+from time import perf_counter
+from os import fstat
+from typing import IO, Callable, Dict, Optional, Union, Any
+
+DEFAULT_EVERY = 10000
+
+
+class ProgressStats:
+    """
+    Counters of one phase.
+
+    Attributes:
+        phase: 'parse' or 'write'
+        total: total amount of work in the unit of done, None if unknown
+        bytes: bytes read, UTF-8 encoded size for text files, or characters written
+        elements: xml elements parsed
+        points: points parsed or written
+        tracks: tracks parsed or written
+        elapsed: seconds since the start of the phase
+    """
+
+    __slots__ = ('phase', 'total', 'bytes', 'elements', 'points', 'tracks', '_start', '_end')
+
+    def __init__(self, phase: str, total: Optional[int]=None)->None:
+        self.phase: str = phase
+        self.total: Optional[int] = total
+        self.bytes: int = 0
+        self.elements: int = 0
+        self.points: int = 0
+        self.tracks: int = 0
+        self._start: float = perf_counter()
+        self._end: Optional[float] = None
+
+    def __repr__(self)->str:
+        return '<ProgressStats %s %s bytes, %s elements, %s points, %s tracks in %.2f s>' % (
+            self.phase, self.bytes, self.elements, self.points, self.tracks, self.elapsed)
+
+    @property
+    def done(self)->int:
+        """
+        :return: bytes read when parsing, tracks written when writing
+        """
+        return self.tracks if self.phase == 'write' else self.bytes
+
+    @property
+    def elapsed(self)->float:
+        return (self._end if self._end is not None else perf_counter()) - self._start
+
+    def finish(self)->None:
+        """
+        Stops the clock of the phase.
+        """
+        self._end = perf_counter()
+
+    def rate(self, counter: str)->float:
+        """
+        :param counter: 'bytes', 'elements', 'points' or 'tracks'
+        :return: items per second
+        """
+        elapsed: float = self.elapsed
+        return getattr(self, counter) / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self)->Dict[str, Any]:
+        return {'phase': self.phase, 'total': self.total, 'bytes': self.bytes,
+                'elements': self.elements, 'points': self.points, 'tracks': self.tracks,
+                'elapsed': self.elapsed}
+
+
+class ProgressObserver:
+    """
+    Base observer, does nothing. Subclasses override start(), update() and finish().
+
+    Attributes:
+        every: number of items between two calls of update()
+    """
+
+    __slots__ = ('every',)
+
+    def __init__(self, every: int=DEFAULT_EVERY)->None:
+        if every < 1:
+            raise ValueError('Every must be positive, not %s' % every)
+        self.every: int = every
+
+    def start(self, stats: ProgressStats)->None:
+        pass
+
+    def update(self, stats: ProgressStats)->None:
+        pass
+
+    def finish(self, stats: ProgressStats)->None:
+        pass
+
+
+class CallbackObserver(ProgressObserver):
+    """
+    Calls callback(event, stats) with event 'start', 'update' or 'finish'.
+    """
+
+    __slots__ = ('_callback',)
+
+    def __init__(self, callback: Callable[[str, ProgressStats], Any], every: int=DEFAULT_EVERY)->None:
+        super().__init__(every)
+        self._callback: Callable[[str, ProgressStats], Any] = callback
+
+    def start(self, stats: ProgressStats)->None:
+        self._callback('start', stats)
+
+    def update(self, stats: ProgressStats)->None:
+        self._callback('update', stats)
+
+    def finish(self, stats: ProgressStats)->None:
+        self._callback('finish', stats)
+
+
+class MetricsObserver(ProgressObserver):
+    """
+    Collects final counters and timings of finished phases.
+
+    Attributes:
+        stats: ProgressStats of the last finished run of every phase
+        timings: seconds of the last finished run of every phase
+    """
+
+    __slots__ = ('stats',)
+
+    def __init__(self, every: int=DEFAULT_EVERY)->None:
+        super().__init__(every)
+        self.stats: Dict[str, ProgressStats] = {}
+
+    @property
+    def timings(self)->Dict[str, float]:
+        return {phase: stats.elapsed for phase, stats in self.stats.items()}
+
+    def finish(self, stats: ProgressStats)->None:
+        self.stats[stats.phase] = stats
+
+
+class TqdmObserver(ProgressObserver):
+    """
+    Progress bar, requires tqdm.
+    Keyword arguments are passed to tqdm.
+    """
+
+    __slots__ = ('_kwargs', '_bar')
+
+    def __init__(self, every: int=DEFAULT_EVERY, **kwargs)->None:
+        super().__init__(every)
+        self._kwargs: Dict[str, Any] = kwargs
+        self._bar: Any = None
+
+    def start(self, stats: ProgressStats)->None:
+        try:
+            from tqdm import tqdm
+        except ImportError:
+            raise ImportError('tqdm is required, install it with: pip install gpx-lite[progress]')
+        kwargs: Dict[str, Any] = {'desc': 'Saving gpx', 'unit': 'track'} if stats.phase == 'write' \
+            else {'desc': 'Loading gpx', 'unit': 'b', 'unit_scale': True}
+        kwargs.update(self._kwargs)
+        self._bar = tqdm(total=stats.total, **kwargs)
+
+    def update(self, stats: ProgressStats)->None:
+        self._bar.update(stats.done - self._bar.n)
+
+    def finish(self, stats: ProgressStats)->None:
+        self.update(stats)
+        self._bar.close()
+        self._bar = None
+
+
+class CountingReader:
+    """
+    File handler wrapper counting bytes read into stats.bytes,
+    text is counted by its UTF-8 encoded size.
+    """
+
+    __slots__ = ('_source', '_stats')
+
+    def __init__(self, source: IO, stats: ProgressStats)->None:
+        self._source: IO = source
+        self._stats: ProgressStats = stats
+
+    def read(self, size: int=-1)->Union[str, bytes]:
+        data: Union[str, bytes] = self._source.read(size)
+        self._stats.bytes += len(data) if isinstance(data, bytes) else len(data.encode('utf-8'))
+        return data
+
+
+def source_size(source: IO)->Optional[int]:
+    """
+    :param source: file handler
+    :return: size of the file in bytes, None if unknown
+    """
+    try:
+        return fstat(source.fileno()).st_size
+    except (AttributeError, OSError):
+        return None
+
+
+if __name__ == '__main__':
+    from io import StringIO
+
+    metrics = MetricsObserver(every=1)
+    progress = CallbackObserver(lambda event, stats: print(event, stats), every=2)
+    stats = ProgressStats('parse', 11)
+    reader = CountingReader(StringIO('<gpx></gpx>'), stats)
+    for observer in (progress, metrics):
+        observer.start(stats)
+    reader.read(5)
+    progress.update(stats)
+    reader.read()
+    stats.finish()
+    for observer in (progress, metrics):
+        observer.finish(stats)
+    print(metrics.timings)
@@ -0,0 +1,74 @@
+"""
+Byte level scanning of gpx files, finds tracks without parsing xml.
+Works with bytes, mmap or any other object with find() and slicing.
+Tags with namespace prefix (<gpx:trk>) are not recognized.
+"""
+from array import array
+from re import match
+from typing import Tuple, Optional, Any
+
+_WHITESPACE = (b'>', b' ', b'\t', b'\n', b'\r')
+
+
+def scan_tracks(data: Any, start: int=0)->Tuple[array, array]:
+    """
+    Finds byte ranges of <trk> elements.
+
+    :param data: content of gpx file
+    :param start: offset to start scanning from
+    :return: array('q') of offsets of <trk> tags and
+             array('q') of offsets just after matching </trk> tags
+    """
+    starts: array = array('q')
+    ends: array = array('q')
+    position: int = data.find(b'<trk', start)
+    while position >= 0:
+        if data[position + 4:position + 5] in _WHITESPACE:
+            end: int = data.find(b'</trk>', position)
+            if end < 0:
+                raise ValueError('Track at byte %s is not closed' % position)
+            starts.append(position)
+            ends.append(end + 6)
+            position = data.find(b'<trk', end + 6)
+        else:
+            position = data.find(b'<trk', position + 4)
+    return starts, ends
+
+
+def root_tag(data: Any)->Tuple[int, bytes]:
+    """
+    Finds the start tag of the root element, skipping xml declaration,
+    processing instructions, comments and doctype.
+
+    :param data: content of gpx file
+    :return: offset just after the root start tag and name of the root tag
+    """
+    from gpx_lite.compression import detect
+
+    compression: Optional[str] = detect(bytes(data[:6]))
+    if compression is not None:
+        raise ValueError('Gpx is compressed (%s), tracks can be found only in uncompressed gpx' % compression)
+    position: int = data.find(b'<')
+    while position >= 0 and data[position + 1:position + 2] in (b'?', b'!'):
+        if data[position + 1:position + 4] == b'!--':
+            position = data.find(b'-->', position)
+        position = data.find(b'>', position)
+        position = data.find(b'<', position) if position >= 0 else -1
+    if position < 0:
+        raise ValueError('No root element found')
+    end: int = data.find(b'>', position)
+    if end < 0:
+        raise ValueError('Root element is not closed')
+    return end + 1, match(rb'[^\s/>]+', bytes(data[position + 1:end + 1])).group()
+
+
+def root_attributes(header: bytes, root: bytes)->Tuple[Optional[str], Optional[str]]:
+    """
+    :param header: content of gpx file up to the end of the root start tag
+    :param root: name of the root tag
+    :return: version and creator of the gpx
+    """
+    from xml.etree.ElementTree import fromstring
+
+    elem = fromstring(header + b'</' + root + b'>')
+    return elem.get('version'), elem.get('creator')
@@ -0,0 +1,249 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from math import floor, radians, cos, sin, asin, sqrt, pi
+from struct import Struct
+from typing import List, Tuple, Iterator, Union, IO, Any
+
+from gpx_lite.geo import EARTH_RADIUS
+from gpx_lite.utils import optional_numpy, copy_column
+
+MAGIC = b'GPXS'
+FORMAT_VERSION = 1
+_HEADER = Struct('<4sHHdqqqq')
+
+PointIndex = Tuple[int, int, int]
+
+
+class SpatialIndex:
+    """
+    Uniform grid over all track points of a gpx, answers bounding box,
+    radius and k-nearest queries with (track, segment, point) indices.
+    Points are sorted by grid cells, cells are found by binary search.
+    The index keeps its own copy of coordinates, it is not updated
+    when the gpx changes.
+
+    Usage:
+
+        index = gpx.build_spatial_index(cell_size=0.01)
+        for track, segment, point in index.radius(50.08, 14.42, 500):
+            ...
+        index.save('fleet.gpxs')
+        index = SpatialIndex.load('fleet.gpxs')
+
+    Attributes:
+        cell_size: size of a grid cell in degrees
+    """
+
+    __slots__ = ('_cell_size', '_track_offsets', '_segment_offsets',
+                 '_lat', '_lon', '_order', '_cell_keys', '_cell_starts')
+
+    def __init__(self, cell_size: float, track_offsets: array, segment_offsets: array,
+                 lat: array, lon: array, order: array, cell_keys: array, cell_starts: array):
+        """
+        Use SpatialIndex.build() or SpatialIndex.load() to create the index.
+        """
+        self._cell_size: float = cell_size
+        self._track_offsets: array = track_offsets
+        self._segment_offsets: array = segment_offsets
+        self._lat: array = lat
+        self._lon: array = lon
+        self._order: array = order
+        self._cell_keys: array = cell_keys
+        self._cell_starts: array = cell_starts
+
+    @classmethod
+    def build(cls, gpx: Any, cell_size: float=0.01)->'SpatialIndex':
+        """
+        Bulk builds the index, with numpy if it is installed.
+
+        :param gpx: gpx or any iterable of tracks
+        :param cell_size: size of a grid cell in degrees
+        :return: new index
+        """
+        if not cell_size > 0:
+            raise ValueError('Cell size must be positive, not %s' % cell_size)
+        track_offsets: array = array('q', [0])
+        segment_offsets: array = array('q', [0])
+        lat: array = array('d')
+        lon: array = array('d')
+        for track in gpx:
+            for seg in track:
+                seg_lat, seg_lon, _ = seg.columns()
+                lat.frombytes(memoryview(seg_lat).cast('B'))
+                lon.frombytes(memoryview(seg_lon).cast('B'))
+                segment_offsets.append(len(lat))
+            track_offsets.append(len(segment_offsets) - 1)
+        columns: int = cls._columns(cell_size)
+        np = optional_numpy()
+        if np is not None:
+            keys = np.floor((np.frombuffer(lat, dtype=np.float64) + 90) / cell_size).astype(np.int64) * columns \
+                + np.floor((np.frombuffer(lon, dtype=np.float64) + 180) / cell_size).astype(np.int64)
+            order = np.argsort(keys, kind='stable')
+            cell_keys, cell_starts = np.unique(keys[order], return_index=True)
+            order, cell_keys, cell_starts = (copy_column(values.astype(np.int64), 'q')
+                                             for values in (order, cell_keys, cell_starts))
+        else:
+            keys: List[int] = [floor((y + 90) / cell_size) * columns + floor((x + 180) / cell_size)
+                               for y, x in zip(lat, lon)]
+            order = array('q', sorted(range(len(keys)), key=keys.__getitem__))
+            cell_keys = array('q')
+            cell_starts = array('q')
+            for position, point in enumerate(order):
+                if not cell_keys or cell_keys[-1] != keys[point]:
+                    cell_keys.append(keys[point])
+                    cell_starts.append(position)
+        cell_starts.append(len(order))
+        return cls(cell_size, track_offsets, segment_offsets, lat, lon, order, cell_keys, cell_starts)
+
+    @staticmethod
+    def _columns(cell_size: float)->int:
+        return floor(360 / cell_size) + 2
+
+    def __len__(self)->int:
+        return len(self._lat)
+
+    def __repr__(self)->str:
+        return '<SpatialIndex [..%s points, %s cells..]>' % (len(self._lat), len(self._cell_keys))
+
+    @property
+    def cell_size(self)->float:
+        return self._cell_size
+
+    def _point_index(self, point: int)->PointIndex:
+        segment: int = bisect_right(self._segment_offsets, point) - 1
+        track: int = bisect_right(self._track_offsets, segment) - 1
+        return track, segment - self._track_offsets[track], point - self._segment_offsets[segment]
+
+    def _candidates(self, min_lat: float, min_lon: float,
+                    max_lat: float, max_lon: float)->Iterator[int]:
+        """
+        Points in cells overlapping the box, longitudes within -180..180.
+        """
+        cell: float = self._cell_size
+        columns: int = self._columns(cell)
+        first_column: int = floor((max(min_lon, -180) + 180) / cell)
+        last_column: int = floor((min(max_lon, 180) + 180) / cell)
+        for row in range(floor((max(min_lat, -90) + 90) / cell), floor((min(max_lat, 90) + 90) / cell) + 1):
+            start: int = bisect_left(self._cell_keys, row * columns + first_column)
+            end: int = bisect_right(self._cell_keys, row * columns + last_column)
+            if start < end:
+                yield from self._order[self._cell_starts[start]:self._cell_starts[end]]
+
+    def _bbox(self, min_lat: float, min_lon: float,
+              max_lat: float, max_lon: float)->List[int]:
+        if min_lon <= max_lon:
+            boxes = [(min_lon, max_lon)]
+        else:
+            boxes = [(min_lon, 180.0), (-180.0, max_lon)]
+        lat, lon = self._lat, self._lon
+        return sorted(point for box_min, box_max in boxes
+                      for point in self._candidates(min_lat, box_min, max_lat, box_max)
+                      if min_lat <= lat[point] <= max_lat and box_min <= lon[point] <= box_max)
+
+    def bbox(self, min_lat: float, min_lon: float,
+             max_lat: float, max_lon: float)->List[PointIndex]:
+        """
+        Points inside the bounding box, borders included.
+        If min_lon > max_lon, the box crosses the 180th meridian.
+
+        :return: (track, segment, point) indices in gpx order
+        """
+        return [self._point_index(point) for point in self._bbox(min_lat, min_lon, max_lat, max_lon)]
+
+    def _radius(self, lat: float, lon: float, radius: float)->List[Tuple[float, int]]:
+        d_lat: float = radius / EARTH_RADIUS * 180 / pi
+        if abs(lat) + d_lat >= 90 or radius >= pi * EARTH_RADIUS / 2:
+            box: Tuple[float, float, float, float] = (lat - d_lat, -180.0, lat + d_lat, 180.0)
+        else:
+            d_lon: float = min(180.0, d_lat / cos(radians(abs(lat) + d_lat)))
+            box = (lat - d_lat, (lon - d_lon + 180) % 360 - 180, lat + d_lat, (lon + d_lon + 180) % 360 - 180)
+            if d_lon >= 180:
+                box = (lat - d_lat, -180.0, lat + d_lat, 180.0)
+        phi: float = radians(lat)
+        lam: float = radians(lon)
+        result: List[Tuple[float, int]] = []
+        for point in self._bbox(*box):
+            phi_2: float = radians(self._lat[point])
+            a: float = sin((phi_2 - phi) / 2) ** 2 \
+                + cos(phi) * cos(phi_2) * sin((radians(self._lon[point]) - lam) / 2) ** 2
+            distance: float = 2 * EARTH_RADIUS * asin(sqrt(min(a, 1.0)))
+            if distance <= radius:
+                result.append((distance, point))
+        return result
+
+    def radius(self, lat: float, lon: float, radius: float)->List[PointIndex]:
+        """
+        Points within the haversine distance from the given point.
+
+        :param lat: latitude of the centre in degrees
+        :param lon: longitude of the centre in degrees
+        :param radius: distance in metres
+        :return: (track, segment, point) indices in gpx order
+        """
+        return [self._point_index(point) for _, point in self._radius(lat, lon, radius)]
+
+    def nearest(self, lat: float, lon: float, k: int=1)->List[Tuple[PointIndex, float]]:
+        """
+        k points nearest to the given point, searched by radius queries
+        with growing radius.
+
+        :param lat: latitude in degrees
+        :param lon: longitude in degrees
+        :param k: number of points
+        :return: ((track, segment, point), distance in metres) sorted by distance
+        """
+        k = min(k, len(self._lat))
+        if k <= 0:
+            return []
+        radius: float = self._cell_size / 180 * pi * EARTH_RADIUS
+        while True:
+            found: List[Tuple[float, int]] = self._radius(lat, lon, radius)
+            if len(found) >= k or radius > pi * EARTH_RADIUS:
+                break
+            radius *= 2
+        found.sort()
+        return [(self._point_index(point), distance) for distance, point in found[:k]]
+
+    def save(self, file: Union[str, IO])->None:
+        """
+        :param file: path or binary file handler
+        """
+        if isinstance(file, str):
+            with open(file, 'wb') as fh:
+                return self.save(fh)
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, self._cell_size, len(self._track_offsets),
+                                len(self._segment_offsets), len(self._lat), len(self._cell_keys)))
+        for column in (self._track_offsets, self._segment_offsets, self._lat, self._lon,
+                       self._order, self._cell_keys, self._cell_starts):
+            if sys.byteorder != 'little':
+                column = array(column.typecode, column)
+                column.byteswap()
+            file.write(column.tobytes())
+
+    @classmethod
+    def load(cls, file: Union[str, IO])->'SpatialIndex':
+        """
+        Loads index saved by save(), all numbers are stored little-endian.
+
+        :param file: path or binary file handler
+        :return: loaded index
+        """
+        if isinstance(file, str):
+            with open(file, 'rb') as fh:
+                return cls.load(fh)
+        magic, version, _, cell_size, n_tracks, n_segments, n_points, n_cells = \
+            _HEADER.unpack(file.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError('File is not a spatial index')
+        if version != FORMAT_VERSION:
+            raise ValueError('Unsupported version %s of spatial index' % version)
+        columns: List[array] = []
+        for length, typecode in ((n_tracks, 'q'), (n_segments, 'q'), (n_points, 'd'), (n_points, 'd'),
+                                 (n_points, 'q'), (n_cells, 'q'), (n_cells + 1, 'q')):
+            column: array = array(typecode)
+            column.frombytes(file.read(length * 8))
+            if sys.byteorder != 'little':
+                column.byteswap()
+            columns.append(column)
+        return cls(cell_size, *columns)
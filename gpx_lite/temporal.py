@@ -0,0 +1,313 @@
+"""
+Time range queries over epoch time columns, see GPXTrackSegment.columns().
+Sorted columns are searched by binary search, unsorted ones are scanned
+or, in TemporalIndex, searched in a sorted copy.
+Time ranges are half-open [start, end), points without time never match.
+Points of many sources are ordered by time with merge_by_time().
+"""
+from array import array
+from bisect import bisect_left
+from itertools import chain, islice
+from operator import attrgetter, itemgetter
+from struct import Struct
+from typing import Callable, Iterable, Iterator, List, Tuple, Sequence, Optional, Union, Any
+
+from gpx_lite.utils import NO_TIME, optional_numpy, to_epoch
+
+MAX_TIME = 2 ** 63 - 1
+RUN_SIZE = 1000000  # points sorted in memory at once by external merge_by_time()
+RUN_BLOCK = 65536  # points in a block of a run file
+RUN_FAN_IN = 64  # run files merged at once
+_BLOCK_HEADER = Struct('=q')
+
+TimeValue = Union[Any, str, int, float, None]
+SegmentMatch = Tuple[int, int, Sequence[int]]
+
+
+def time_bounds(start: TimeValue, end: TimeValue)->Tuple[int, int]:
+    """
+    :param start: start of the range as datetime, string or seconds since epoch,
+                  None for no lower bound
+    :param end: end of the range, not included, None for no upper bound
+    :return: epoch times in microseconds
+    """
+    return (NO_TIME + 1 if start is None else max(to_epoch(start), NO_TIME + 1),
+            MAX_TIME if end is None else to_epoch(end))
+
+
+def is_sorted(time: Sequence[int])->bool:
+    """
+    :param time: epoch times
+    :return: True if the times are in ascending order
+    """
+    if len(time) < 2:
+        return True
+    np = optional_numpy()
+    if np is not None:
+        t = np.frombuffer(time, dtype=np.int64)
+        return bool((t[1:] >= t[:-1]).all())
+    return all(t_1 <= t_2 for t_1, t_2 in zip(time, time[1:]))
+
+
+def time_span(time: Sequence[int])->Tuple[int, int]:
+    """
+    :param time: epoch times
+    :return: the earliest and the latest time,
+             (MAX_TIME, NO_TIME) if there is no time
+    """
+    np = optional_numpy()
+    if np is not None and len(time):
+        t = np.frombuffer(time, dtype=np.int64)
+        t = t[t != NO_TIME]
+        return (int(t.min()), int(t.max())) if len(t) else (MAX_TIME, NO_TIME)
+    times: List[int] = [t for t in time if t != NO_TIME]
+    return (min(times), max(times)) if times else (MAX_TIME, NO_TIME)
+
+
+def select(time: Sequence[int], start: int, end: int,
+           sorted_time: Optional[bool]=None)->Sequence[int]:
+    """
+    Points with start <= time < end.
+
+    :param time: epoch times
+    :param start: start of the range in microseconds
+    :param end: end of the range in microseconds, not included
+    :param sorted_time: time is known to be sorted or not, None to check it
+    :return: range of indices for sorted time, list of indices otherwise
+    """
+    if sorted_time is None:
+        sorted_time = is_sorted(time)
+    if sorted_time:
+        return range(bisect_left(time, start), bisect_left(time, end))
+    return [i for i, t in enumerate(time) if start <= t < end]
+
+
+class TemporalIndex:
+    """
+    Interval index of the time spans of tracks and segments of a gpx.
+    Tracks are kept sorted by their earliest and by their latest time,
+    so tracks outside of a queried range are skipped without looking
+    at their points. Points of matching segments are found by binary search,
+    unsorted segments are searched in a sorted copy of their times.
+    The index is not updated when the gpx changes.
+
+    Usage:
+
+        index = gpx.build_temporal_index()
+        morning = gpx.between('2017-11-22T08:00:00Z', '2017-11-22T09:00:00Z', index)
+    """
+
+    __slots__ = ('_segment_offsets', '_times', '_orders', '_segment_min', '_segment_max',
+                 '_track_min', '_track_max', '_by_min', '_by_max', '_sorted_min', '_sorted_max')
+
+    def __init__(self, gpx: Any):
+        """
+        :param gpx: gpx or any iterable of tracks
+        """
+        self._segment_offsets: array = array('q', [0])
+        self._times: List[Sequence[int]] = []
+        self._orders: List[Optional[array]] = []
+        self._segment_min: array = array('q')
+        self._segment_max: array = array('q')
+        self._track_min: array = array('q')
+        self._track_max: array = array('q')
+        for track in gpx:
+            first: int = len(self._times)
+            for seg in track:
+                time: Sequence[int] = seg.columns()[2]
+                order: Optional[array] = None
+                if not is_sorted(time):
+                    order = array('q', sorted(range(len(time)), key=time.__getitem__))
+                    time = array('q', [time[i] for i in order])
+                self._times.append(time)
+                self._orders.append(order)
+                segment_min, segment_max = time_span(time)
+                self._segment_min.append(segment_min)
+                self._segment_max.append(segment_max)
+            self._segment_offsets.append(len(self._times))
+            self._track_min.append(min(self._segment_min[first:], default=MAX_TIME))
+            self._track_max.append(max(self._segment_max[first:], default=NO_TIME))
+        tracks: range = range(len(self._track_min))
+        self._by_min: array = array('q', sorted(tracks, key=self._track_min.__getitem__))
+        self._by_max: array = array('q', sorted(tracks, key=self._track_max.__getitem__))
+        self._sorted_min: array = array('q', [self._track_min[i] for i in self._by_min])
+        self._sorted_max: array = array('q', [self._track_max[i] for i in self._by_max])
+
+    def __repr__(self)->str:
+        return '<TemporalIndex [..%s tracks, %s segments..]>' % (len(self._track_min), len(self._times))
+
+    def tracks(self, start: TimeValue=None, end: TimeValue=None)->List[int]:
+        """
+        :param start: start of the range as datetime, string or seconds since epoch,
+                      None for no lower bound
+        :param end: end of the range, not included, None for no upper bound
+        :return: sorted indices of tracks with some time in the range
+        """
+        t_0, t_1 = time_bounds(start, end)
+        started: int = bisect_left(self._sorted_min, t_1)
+        ended: int = bisect_left(self._sorted_max, t_0)
+        if started < len(self._sorted_max) - ended:
+            return sorted(i for i in self._by_min[:started] if self._track_max[i] >= t_0)
+        return sorted(i for i in self._by_max[ended:] if self._track_min[i] < t_1)
+
+    def between(self, start: TimeValue=None, end: TimeValue=None)->List[SegmentMatch]:
+        """
+        :param start: start of the range as datetime, string or seconds since epoch,
+                      None for no lower bound
+        :param end: end of the range, not included, None for no upper bound
+        :return: (track, segment, point indices) of segments with some points
+                 in the range, point indices are a range or a sorted list
+        """
+        t_0, t_1 = time_bounds(start, end)
+        result: List[SegmentMatch] = []
+        for track in self.tracks(start, end):
+            first: int = self._segment_offsets[track]
+            for i in range(first, self._segment_offsets[track + 1]):
+                if self._segment_max[i] < t_0 or self._segment_min[i] >= t_1:
+                    continue
+                points: Sequence[int] = select(self._times[i], t_0, t_1, True)
+                if self._orders[i] is not None:
+                    points = sorted(self._orders[i][points.start:points.stop])
+                result.append((track, i - first, points))
+        return result
+
+
+def _runs(sources: Tuple[Any, ...])->List[Any]:
+    from gpx_lite.gpx import GPX
+    from gpx_lite.gpxtrack import GPXTrack
+
+    runs: List[Any] = []
+    for source in sources:
+        if isinstance(source, GPX):
+            for track in source:
+                runs.extend(track)
+        elif isinstance(source, GPXTrack):
+            runs.extend(source)
+        else:
+            runs.append(source)
+    return runs
+
+
+def _points(run: Any)->Iterator[Any]:
+    from gpx_lite.gpxtrackpoint import GPXTrackPoint
+    from gpx_lite.gpxtracksegment import GPXTrackSegment
+
+    if isinstance(run, GPXTrackSegment):
+        yield from run
+        return
+    for item in run:
+        if isinstance(item, GPXTrackPoint):
+            yield item
+        else:
+            yield from _points(item)
+
+
+def merge_by_time(*sources: Any, external: bool=False, run_size: int=RUN_SIZE,
+                  directory: Optional[str]=None)->Iterator[Any]:
+    """
+    Merges points of sources into one stream ordered by time. Points without
+    time go first, points with the same time keep the order of the sources.
+
+    Without external, every run must be sorted by time and the runs are merged
+    lazily by a heap (k-way merge). Segments of gpx and track sources are
+    separate runs, any other source is a single run: a segment or an iterable
+    of points, segments or tracks, e.g. gpx_lite.iter_tracks().
+
+    With external, sources needn't be sorted. Points are sorted in runs
+    of run_size points spilled to temporary files, which are then merged, so
+    memory used is bounded by run_size points even for data larger than memory.
+    If all points fit into one run, nothing is spilled. Spilled points
+    are restored with epoch time, as from columnar segments.
+
+    Usage:
+
+        for point in merge_by_time(*(vehicle_gpx(day) for day in days)):
+            ...
+
+        with open('traces.gpx', 'rb') as fh:
+            ordered = GPXColumnarSegment(merge_by_time(gpx_lite.iter_tracks(fh), external=True))
+
+    :param sources: gpx, tracks, segments or iterables of points, segments or tracks
+    :param external: sort unsorted sources with temporary files
+    :param run_size: number of points sorted in memory at once, with external
+    :param directory: directory of temporary files, system default by default
+    :return: iterator over points ordered by time
+    """
+    from heapq import merge
+
+    runs: List[Any] = _runs(sources)
+    if not external:
+        return merge(*[_points(run) for run in runs], key=attrgetter('epoch'))
+    if run_size < 1:
+        raise ValueError('Run size must be positive, not %s' % run_size)
+    return _external_merge(chain.from_iterable(_points(run) for run in runs), run_size, directory)
+
+
+def _write_run(path: str, records: Iterable[Tuple[int, float, float]])->None:
+    records = iter(records)
+    with open(path, 'wb') as fh:
+        while True:
+            block: List[Tuple[int, float, float]] = list(islice(records, RUN_BLOCK))
+            if not block:
+                return
+            time, lat, lon = zip(*block)
+            fh.write(_BLOCK_HEADER.pack(len(block)))
+            fh.write(array('q', time).tobytes())
+            fh.write(array('d', lat).tobytes())
+            fh.write(array('d', lon).tobytes())
+
+
+def _read_run(path: str)->Iterator[Tuple[int, float, float]]:
+    with open(path, 'rb') as fh:
+        while True:
+            header: bytes = fh.read(_BLOCK_HEADER.size)
+            if not header:
+                return
+            size: int = _BLOCK_HEADER.unpack(header)[0]
+            columns: List[array] = [array('q'), array('d'), array('d')]
+            for column in columns:
+                column.frombytes(fh.read(size * column.itemsize))
+            yield from zip(*columns)
+
+
+def _external_merge(points: Iterator[Any], run_size: int, directory: Optional[str])->Iterator[Any]:
+    from heapq import merge
+    from os import path as os_path
+    from tempfile import TemporaryDirectory
+    from gpx_lite.gpxtrackpoint import GPXTrackPoint
+
+    key: Callable[[Any], int] = attrgetter('epoch')
+    chunk: List[Any] = list(islice(points, run_size))
+    chunk.sort(key=key)
+    # a single point of look-ahead, so at most run_size + 1 points are held
+    peek: Any = next(points, None)
+    if peek is None:
+        yield from chunk
+        return
+    with TemporaryDirectory(prefix='gpx_lite_', dir=directory) as tmp:
+        runs: List[str] = []
+        while chunk:
+            runs.append(os_path.join(tmp, '%d.run' % len(runs)))
+            _write_run(runs[-1], ((pt.epoch, pt._lat, pt._lon) for pt in chunk))
+            chunk = []
+            if peek is not None:
+                chunk.append(peek)
+                chunk.extend(islice(points, run_size - 1))
+                chunk.sort(key=key)
+                peek = next(points, None)
+        while len(runs) > RUN_FAN_IN:
+            # merged run replaces its group, so equal times keep their order
+            groups: List[List[str]] = [runs[i:i + RUN_FAN_IN] for i in range(0, len(runs), RUN_FAN_IN)]
+            runs = []
+            for group in groups:
+                runs.append(group[0] + 'm')
+                _write_run(runs[-1], merge(*[_read_run(run) for run in group], key=itemgetter(0)))
+        for time, lat, lon in merge(*[_read_run(run) for run in runs], key=itemgetter(0)):
+            yield GPXTrackPoint(lat, lon, time)
+
+
+if __name__ == '__main__':
+    times = array('q', [NO_TIME, 0, 10 * 10 ** 6, 20 * 10 ** 6])
+    print('Sorted: ', is_sorted(times), ', span: ', time_span(times))
+    print('Points in [5 s, 20 s): ', select(times, 5 * 10 ** 6, 20 * 10 ** 6))
+    print('Points in [5 s, 20 s) unsorted: ', select(times[::-1], 5 * 10 ** 6, 20 * 10 ** 6))
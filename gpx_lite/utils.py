@@ -1,7 +1,71 @@
-from datetime import datetime
-from typing import Callable
-from re import sub
-import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from array import array
+from typing import Callable, Optional, Sequence, Tuple, Iterable, Dict, List, Union, Any
+from sys import getsizeof
+
+
+NO_TIME = -2 ** 63  # epoch value of points without time
+EPOCH = datetime(1970, 1, 1)
+_FRACTION_SCALE = (0, 100000, 10000, 1000, 100, 10, 1)
+_day_seconds: Dict[str, int] = {}
+_day_strings: Dict[int, str] = {}
+_SECONDS_Z: List[str] = ['%02dZ' % i for i in range(60)]
+
+
+def _date_to_seconds(date: str)->int:
+    seconds: Optional[int] = _day_seconds.get(date)
+    if seconds is None:
+        if not (date.isascii() and date[4] == date[7] == '-' and date[:4].isdigit()
+                and date[5:7].isdigit() and date[8:10].isdigit()):
+            raise ValueError('Invalid date %s' % date)
+        seconds = (datetime(int(date[0:4]), int(date[5:7]), int(date[8:10])) - EPOCH).days * 86400
+        if len(_day_seconds) > 100000:
+            _day_seconds.clear()
+        _day_seconds[date] = seconds
+    return seconds
+
+
+def _time_of_day(string: str)->Optional[int]:
+    """
+    Time part of YYYY-MM-DDTHH:MM:SS[.ffffff]Z strings, fast path
+    of time_to_epoch() and decode_times(). Fields must be ASCII digits,
+    so int() doesn't accept signs or spaces in them.
+
+    :return: microseconds since midnight or None for other layouts
+    """
+    length: int = len(string)
+    if length == 20 and string[19] == 'Z':
+        fraction: int = 0
+    elif 21 < length < 28 and string[19] == '.' and string[-1] == 'Z':
+        digits: str = string[20:-1]
+        if not (digits.isascii() and digits.isdigit()):
+            return None
+        fraction = int(digits) * _FRACTION_SCALE[length - 21]
+    else:
+        return None
+    hour: str = string[11:13]
+    minute: str = string[14:16]
+    second: str = string[17:19]
+    if not (string[10] == 'T' and string[13] == string[16] == ':' and string.isascii()
+            and hour.isdigit() and minute.isdigit() and second.isdigit()
+            and hour < '24' and minute < '60' and second < '60'):
+        return None
+    return (int(hour) * 3600 + int(minute) * 60 + int(second)) * 1000000 + fraction
+
+
+def _fast_epoch(string: str)->Optional[int]:
+    """
+    Fast path for YYYY-MM-DDTHH:MM:SS[.ffffff]Z strings.
+
+    :return: microseconds since epoch or None for other layouts
+    """
+    time_of_day: Optional[int] = _time_of_day(string)
+    if time_of_day is None:
+        return None
+    try:
+        return _date_to_seconds(string[:10]) * 1000000 + time_of_day
+    except ValueError:
+        return None
 
 
 def parse_time(string: str, parser: Callable = datetime.strptime)->datetime:
@@ -10,6 +74,10 @@ def parse_time(string: str, parser: Callable = datetime.strptime)->datetime:
     :param parser: function to convert string to datetime
     :return: datetime.datetime
     """
+    if parser == datetime.strptime:
+        epoch: Optional[int] = _fast_epoch(string)
+        if epoch is not None:
+            return EPOCH + timedelta(microseconds=epoch)
     date_formats = ["%Y-%m-%dT%H:%M:%S.%fZ",
                     '%Y-%m-%dT%H:%M:%SZ']
     for df in date_formats:
@@ -20,15 +88,270 @@ def parse_time(string: str, parser: Callable = datetime.strptime)->datetime:
     raise ValueError('Invalid time format in string %s' % string)
 
 
-def parse_xml(xml_string: str, parser: Callable=ET.fromstring)->ET.ElementTree:
+def time_to_epoch(string: Optional[str])->int:
+    """
+    :param string: date and time as a string or None
+    :return: microseconds since 1970-01-01T00:00:00Z or NO_TIME
+    """
+    if string is None:
+        return NO_TIME
+    epoch: Optional[int] = _fast_epoch(string)
+    if epoch is None:
+        delta: timedelta = parse_time(string) - EPOCH
+        epoch = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return epoch
+
+
+def to_epoch(value: Union[datetime, str, int, float])->int:
+    """
+    :param value: datetime (naive one is taken as UTC), date and time
+                  as a gpx or ISO 8601 string, or seconds since epoch
+    :return: microseconds since 1970-01-01T00:00:00Z
+    """
+    if isinstance(value, str):
+        try:
+            return time_to_epoch(value)
+        except ValueError:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        delta: timedelta = value - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return int(round(value * 1000000))
+
+
+def decode_times(strings: Iterable[Optional[str]])->array:
+    """
+    Batch version of time_to_epoch(), converts times of a whole segment
+    in one pass, date part is decoded once for consecutive points.
+
+    :param strings: dates and times as strings or None
+    :return: array('q') of microseconds since epoch, NO_TIME for None
+    """
+    result: array = array('q')
+    append = result.append
+    time_of_day = _time_of_day
+    last_date: str = ''
+    day: int = 0
+    for string in strings:
+        if string is None:
+            append(NO_TIME)
+            continue
+        clock: Optional[int] = time_of_day(string)
+        if clock is None:
+            append(time_to_epoch(string))
+            continue
+        if string[:10] != last_date:
+            try:
+                day = _date_to_seconds(string[:10]) * 1000000
+            except ValueError:
+                append(time_to_epoch(string))
+                continue
+            last_date = string[:10]
+        append(day + clock)
+    return result
+
+
+def epoch_to_datetime(epoch: int)->Optional[datetime]:
+    """
+    :param epoch: microseconds since 1970-01-01T00:00:00Z or NO_TIME
+    :return: datetime.datetime or None
+    """
+    if epoch == NO_TIME:
+        return None
+    return EPOCH + timedelta(microseconds=epoch)
+
+
+def epoch_to_time(epoch: int)->Optional[str]:
+    """
+    Inverse to time_to_epoch(), fraction of second is written
+    with 3 digits if possible, with 6 digits otherwise,
+    zero fraction is omitted.
+
+    :param epoch: microseconds since 1970-01-01T00:00:00Z or NO_TIME
+    :return: date and time as a string or None
+    """
+    if epoch == NO_TIME:
+        return None
+    seconds, micro = divmod(epoch, 1000000)
+    days, seconds = divmod(seconds, 86400)
+    date: Optional[str] = _day_strings.get(days)
+    if date is None:
+        dt: datetime = EPOCH + timedelta(days=days)
+        date = '%04d-%02d-%02d' % (dt.year, dt.month, dt.day)
+        if len(_day_strings) > 100000:
+            _day_strings.clear()
+        _day_strings[days] = date
+    string: str = '%sT%02d:%02d:%02d' % (date, seconds // 3600, seconds // 60 % 60, seconds % 60)
+    if not micro:
+        return string + 'Z'
+    if not micro % 1000:
+        return '%s.%03dZ' % (string, micro // 1000)
+    return '%s.%06dZ' % (string, micro)
+
+
+def encode_times(epochs: Iterable[int])->List[Optional[str]]:
+    """
+    Batch version of epoch_to_time(), date, hour and minute are formatted
+    once for consecutive points.
+
+    :param epochs: microseconds since epoch or NO_TIME
+    :return: dates and times as strings, None for NO_TIME
+    """
+    result: List[Optional[str]] = []
+    append = result.append
+    seconds_z: List[str] = _SECONDS_Z
+    last_minute: Optional[int] = None
+    prefix: str = ''
+    for epoch in epochs:
+        if epoch == NO_TIME:
+            append(None)
+            continue
+        seconds: int = epoch // 1000000
+        minute: int = seconds // 60
+        if minute != last_minute:
+            prefix = epoch_to_time(minute * 60000000)[:17]
+            last_minute = minute
+        micro: int = epoch - seconds * 1000000
+        if not micro:
+            append(prefix + seconds_z[seconds - minute * 60])
+        elif not micro % 1000:
+            append('%s%02d.%03dZ' % (prefix, seconds - minute * 60, micro // 1000))
+        else:
+            append('%s%02d.%06dZ' % (prefix, seconds - minute * 60, micro))
+    return result
+
+
+def copy_column(column: Sequence, typecode: str)->array:
+    """
+    :param column: array or memoryview with items of the typecode
+    :param typecode: array typecode, 'd' or 'q'
+    :return: new array with copy of the data
+    """
+    result: array = array(typecode)
+    result.frombytes(memoryview(column).cast('B'))
+    return result
+
+
+MEMORY_CATEGORIES = ('gpx', 'tracks', 'segments', 'points', 'strings')
+
+
+def new_memory_usage()->Dict[str, int]:
+    """
+    :return: zero bytes for every category of MEMORY_CATEGORIES and for
+             'external', memory viewed by columns but not owned by them
+    """
+    usage: Dict[str, int] = dict.fromkeys(MEMORY_CATEGORIES, 0)
+    usage['external'] = 0
+    return usage
+
+
+def total_memory_usage(usage: Dict[str, int])->Dict[str, int]:
+    """
+    :param usage: bytes per category
+    :return: the same dict with 'total' of MEMORY_CATEGORIES, external memory is not included
+    """
+    usage['total'] = sum(usage[category] for category in MEMORY_CATEGORIES)
+    return usage
+
+
+def column_memory_usage(column: Sequence, usage: Dict[str, int])->int:
+    """
+    :param column: array or memoryview
+    :param usage: bytes per category, viewed memory is added to 'external'
+    :return: bytes held by the column
+    """
+    if isinstance(column, array):
+        return getsizeof(column)
+    usage['external'] += memoryview(column).nbytes
+    return getsizeof(column)
+
+
+def import_numpy()->Any:
+    """
+    Imports numpy, that is an optional dependency of gpx-lite.
+
+    :return: numpy module
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('numpy is required, install it with: pip install gpx-lite[numpy]')
+    return numpy
+
+
+_numpy: Any = False  # numpy module or None once looked up by optional_numpy()
+
+
+def optional_numpy()->Any:
+    """
+    Numpy is looked up on the first call only, so that the pure python
+    fallbacks don't retry a failing import on every call.
+
+    :return: numpy module or None if numpy is not installed
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy as _numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+def columns_to_numpy(segments: Sequence[Any])->Tuple[Any, Any, Any, Any]:
+    """
+    Concatenates columns of segments into numpy arrays.
+
+    :param segments: track segments
+    :return: latitudes, longitudes, epoch times in microseconds
+             and offsets of segments in them
+    """
+    np = import_numpy()
+    columns = [seg.columns() for seg in segments]
+    lengths = [len(c[0]) for c in columns]
+    offsets = np.zeros(len(columns) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    lat = np.concatenate([np.frombuffer(c[0], dtype=np.float64) for c in columns]
+                         or [np.empty(0, dtype=np.float64)])
+    lon = np.concatenate([np.frombuffer(c[1], dtype=np.float64) for c in columns]
+                         or [np.empty(0, dtype=np.float64)])
+    time = np.concatenate([np.frombuffer(c[2], dtype=np.int64) for c in columns]
+                          or [np.empty(0, dtype=np.int64)])
+    return lat, lon, time, offsets
+
+
+def numpy_to_column(values: Any, typecode: str)->Sequence:
+    """
+    Wraps numpy array as a column without copying,
+    if it is contiguous and of the right type, otherwise converts it.
+
+    :param values: numpy array or sequence of numbers
+    :param typecode: 'd' for float64, 'q' for int64 column
+    :return: memoryview of the data
+    """
+    np = import_numpy()
+    if typecode == 'q' and np.asarray(values).dtype.kind == 'M':
+        values = np.asarray(values).astype('datetime64[us]').view(np.int64)
+    values = np.ascontiguousarray(values, dtype=np.float64 if typecode == 'd' else np.int64)
+    return memoryview(values).cast('B').cast(typecode)
+
+
+def parse_xml(xml_string: Union[str, bytes], parser: Optional[Callable]=None)->Any:
     """
     Helper function to remove namespace and read ElementTree from string.
     
-    :param xml_string: xml represented as a single string
-    :param parser: function to read xml from string
+    :param xml_string: xml represented as a single string or bytes
+    :param parser: function to read xml from string, xml.etree.ElementTree.fromstring() by default
     :return: ElementTree
     """
-    xml_string = sub(r'\sxmlns="[^"]+"', '', xml_string, count=1) #otherwise ns will appear in tags
+    from re import sub
+
+    if parser is None:
+        from xml.etree.ElementTree import fromstring as parser
+    pattern: Union[str, bytes] = rb'\sxmlns="[^"]+"' if isinstance(xml_string, bytes) else r'\sxmlns="[^"]+"'
+    xml_string = sub(pattern, xml_string[:0], xml_string, count=1) #otherwise ns will appear in tags
     return parser(xml_string)
 
 
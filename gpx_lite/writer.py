@@ -0,0 +1,280 @@
+from io import RawIOBase, BufferedIOBase
+from typing import IO, List, Optional, Union, Any
+
+from gpx_lite.progress import ProgressObserver, ProgressStats
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+GPX_FOOTER = '\n</gpx>'
+TRACK_FOOTER = '\n</trk>'
+
+
+def gpx_header(version: Optional[str]=None, creator: Optional[str]=None)->str:
+    """
+    :param version: version of gpx schema, 1.1 by default
+    :param creator: application that created the gpx, gpx-lite.py by default
+    :return: xml declaration and gpx start tag
+    """
+    version = version if version else '1.1'
+    creator = creator if creator else 'gpx-lite.py'
+    version_ns: str = version.replace('.', '/')
+    return ''.join(['<?xml version="1.0" encoding="UTF-8"?>',
+                    '\n<gpx xmlns="http://www.topografix.com/GPX/%s" ' % version_ns,
+                    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" ',
+                    'xsi:schemaLocation="http://www.topografix.com/GPX/%s ' % version_ns,
+                    'http://www.topografix.com/GPX/%s/gpx.xsd" ' % version_ns,
+                    'version="%s" ' % version,
+                    'creator="%s">' % creator])
+
+
+def track_header(name: Optional[str]=None, number: Optional[Union[int, str]]=None)->str:
+    """
+    :param name: name of the track
+    :param number: number of the track
+    :return: trk start tag with name and number elements
+    """
+    result: List[str] = ['\n<trk>']
+    if name:
+        result.extend(['\n<name>', name, '</name>'])
+    if number is not None:
+        result.extend(['\n<number>', str(number), '</number>'])
+    return ''.join(result)
+
+
+def is_binary(fh: IO)->bool:
+    """
+    :param fh: file handler
+    :return: True if the file handler expects bytes
+    """
+    mode = getattr(fh, 'mode', '')
+    return isinstance(fh, (RawIOBase, BufferedIOBase)) or (isinstance(mode, str) and 'b' in mode)
+
+
+class ChunkedWriter:
+    """
+    Collects strings and writes them to file handler in large chunks,
+    encoded to UTF-8 if the file handler is binary.
+
+    Args:
+        fh: text or binary file handler
+        buffer_size: number of characters collected before writing
+
+    Attributes:
+        written: number of characters or bytes written to the file handler
+    """
+
+    __slots__ = ('_fh', '_buffer', '_size', '_buffer_size', '_binary', 'written')
+
+    def __init__(self, fh: IO, buffer_size: int=DEFAULT_BUFFER_SIZE)->None:
+        self._fh: IO = fh
+        self._buffer: List[str] = []
+        self._size: int = 0
+        self._buffer_size: int = buffer_size
+        self._binary: bool = is_binary(fh)
+        self.written: int = 0
+
+    def write(self, string: str)->None:
+        self._buffer.append(string)
+        self._size += len(string)
+        if self._size >= self._buffer_size:
+            self.flush()
+
+    def flush(self)->None:
+        """
+        Writes collected strings to the file handler.
+        """
+        if not self._buffer:
+            return
+        chunk: Union[str, bytes] = ''.join(self._buffer)
+        if self._binary:
+            chunk = chunk.encode('utf-8')
+        self._fh.write(chunk)
+        self.written += len(chunk)
+        self._buffer = []
+        self._size = 0
+
+
+class GPXWriter:
+    """
+    Streaming gpx writer. The gpx header is written on enter, tracks
+    or segments as they are produced and closing tags on exit, so memory
+    used is bounded by buffer_size and doesn't depend on size of the output.
+    If the block exits with an exception, closing tags are not written.
+
+    Args:
+        file: path, text or binary file handler, paths ending with .gz, .bz2
+              or .xz are compressed
+        version: version of gpx schema, 1.1 by default
+        creator: application that created the gpx, gpx-lite.py by default
+        precision: number of decimal places of coordinates,
+                   None for the shortest exact representation
+        buffer_size: number of characters written at once
+        compression: 'gz', 'bz2' or 'xz' to compress into a binary file handler
+                     or regardless of the extension of the path
+        progress: observer notified about tracks, points
+                  and bytes written, see gpx_lite.progress
+        total: number of tracks to be written, if known, for progress
+
+    Usage:
+
+        with GPXWriter('filtered.gpx.gz') as writer:
+            for track in gpx_lite.iter_tracks('traces.gpx.gz', filters=spec):
+                writer.write_track(track)
+
+        with GPXWriter(fh) as writer:
+            writer.start_track('bus 12')
+            for segment in segments:
+                writer.write_segment(segment)
+    """
+
+    __slots__ = ('_file', '_version', '_creator', '_precision', '_buffer_size', '_compression',
+                 '_progress', '_total', '_stats', '_next_update', '_stack', '_writer', '_in_track')
+
+    def __init__(self, file: Union[str, IO], version: Optional[str]=None, creator: Optional[str]=None,
+                 precision: Optional[int]=None, buffer_size: int=DEFAULT_BUFFER_SIZE,
+                 compression: Optional[str]=None, progress: Optional[ProgressObserver]=None,
+                 total: Optional[int]=None)->None:
+        self._file: Union[str, IO] = file
+        self._version: Optional[str] = version
+        self._creator: Optional[str] = creator
+        self._precision: Optional[int] = precision
+        self._buffer_size: int = buffer_size
+        self._compression: Optional[str] = compression
+        self._progress: Optional[ProgressObserver] = progress
+        self._total: Optional[int] = total
+        self._stats: Optional[ProgressStats] = None
+        self._next_update: int = 0
+        self._stack: Any = None
+        self._writer: Optional[ChunkedWriter] = None
+        self._in_track: bool = False
+
+    def __enter__(self)->'GPXWriter':
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback)->None:
+        self.close(complete=exc_type is None)
+
+    @property
+    def written(self)->int:
+        """
+        :return: number of characters or bytes written to the file, before compression
+        """
+        return self._writer.written if self._writer is not None else 0
+
+    def open(self)->'GPXWriter':
+        """
+        Opens the output and writes the gpx header.
+
+        :return: self
+        """
+        from contextlib import ExitStack
+
+        if self._writer is not None:
+            raise ValueError('GPXWriter is already open')
+        self._stack = ExitStack()
+        target: Any = self._file
+        if isinstance(target, str) or self._compression is not None:
+            from gpx_lite.compression import open_output
+
+            target = self._stack.enter_context(open_output(target, self._compression))
+        self._writer = ChunkedWriter(target, self._buffer_size)
+        if self._progress is not None:
+            self._stats = ProgressStats('write', self._total)
+            self._next_update = self._progress.every
+            self._progress.start(self._stats)
+        self._writer.write(gpx_header(self._version, self._creator))
+        return self
+
+    def _check_open(self)->ChunkedWriter:
+        if self._writer is None:
+            raise ValueError('GPXWriter is not open')
+        return self._writer
+
+    def _update(self, points: int)->None:
+        stats: ProgressStats = self._stats
+        stats.points += points
+        if stats.points >= self._next_update:
+            stats.bytes = self._writer.written
+            self._progress.update(stats)
+            self._next_update = stats.points + self._progress.every
+
+    def write_track(self, track: Any)->None:
+        """
+        Writes a whole track, a track started by start_track() is ended first.
+
+        :param track: GPXTrack
+        """
+        writer: ChunkedWriter = self._check_open()
+        self.end_track()
+        writer.write(track.to_xml(self._precision))
+        if self._stats is not None:
+            self._stats.tracks += 1
+            self._update(track.get_points_no())
+
+    def start_track(self, name: Optional[str]=None, number: Optional[Union[int, str]]=None)->None:
+        """
+        Starts a track written segment by segment, a previous track is ended first.
+
+        :param name: name of the track
+        :param number: number of the track
+        """
+        writer: ChunkedWriter = self._check_open()
+        self.end_track()
+        writer.write(track_header(name, number))
+        self._in_track = True
+
+    def write_segment(self, segment: Any)->None:
+        """
+        Writes a segment into the started track, starts a track without name if needed.
+
+        :param segment: GPXTrackSegment or GPXColumnarSegment
+        """
+        writer: ChunkedWriter = self._check_open()
+        if not self._in_track:
+            self.start_track()
+        writer.write(segment.to_xml(self._precision))
+        if self._stats is not None:
+            self._update(len(segment))
+
+    def end_track(self)->None:
+        """
+        Ends the track started by start_track(), does nothing if there is none.
+        """
+        if not self._in_track:
+            return
+        self._writer.write(TRACK_FOOTER)
+        self._in_track = False
+        if self._stats is not None:
+            self._stats.tracks += 1
+
+    def close(self, complete: bool=True)->None:
+        """
+        Writes closing tags and closes files opened by the writer.
+
+        :param complete: write closing tags, False leaves the output unfinished
+        """
+        if self._writer is None:
+            return
+        try:
+            if complete:
+                self.end_track()
+                self._writer.write(GPX_FOOTER)
+            self._writer.flush()
+            if self._stats is not None:
+                self._stats.bytes = self._writer.written
+                self._stats.finish()
+                self._progress.finish(self._stats)
+        finally:
+            self._writer = None
+            self._stack.close()
+
+
+if __name__ == '__main__':
+    from io import StringIO
+    from gpx_lite.gpxtrackpoint import GPXTrackPoint
+    from gpx_lite.gpxtracksegment import GPXTrackSegment
+
+    out = StringIO()
+    with GPXWriter(out, creator='writer demo') as gpx_writer:
+        gpx_writer.start_track('demo', 1)
+        gpx_writer.write_segment(GPXTrackSegment([GPXTrackPoint(50.0, 14.0, '2017-11-22T07:03:36Z')]))
+    print(out.getvalue())
@@ -1,4 +1,4 @@
-from setuptools import setup
+from setuptools import setup, find_packages
 
 with open("README.md", "r") as fh:
     long_description = fh.read()
@@ -13,7 +13,8 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url='https://github.com/aicenter/gpx_lite',
-    packages=['gpx_lite'],
-    install_requires=['typing>=3.6.2','tqdm'],
+    packages=find_packages(include=['gpx_lite', 'gpx_lite.*']),
+    python_requires='>=3.7',
+    extras_require={'numpy': ['numpy'], 'progress': ['tqdm']},
 
 )